@@ -0,0 +1,380 @@
+"""
+This file benchmarks the speed and memory use of the genetic algorithm on fake
+data of several sizes, so that the effect of changes can be measured.
+Instructions on how to run this file can be found in the README.md in this
+directory.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# Allow running from any directory, as the fake data and src code are imported
+# from the repo root
+repo_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, repo_directory)
+
+import numpy as np
+import pandas as pd
+from fake_data_generation.generate_fake_data import (fake_data_excel_file,
+                                                     generate_fake_data)
+from src.data_load import DataLoader
+from src.ProblemIndex import ProblemIndex
+from src.Params import Params
+from src.Schedule import Schedule
+from src.GeneticAlgorithm import GeneticAlgorithm
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Function to read the arguments from the command line
+
+    :param argv: list of command line arguments, read from sys.argv if not given
+    :returns: namespace of the arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""Benchmark schedule generation, scoring, mutation,
+        recombination, evolution and report saving on fake data, and write the
+        results to a JSON file."""
+    )
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        default=["20x5", "200x50", "2000x200"],
+        help="[str] Problem sizes to benchmark, as STUDENTSxWARDS. Default is "
+        "20x5 200x50 2000x200.",
+    )
+    parser.add_argument(
+        "--params",
+        "-p",
+        type=str,
+        default=os.path.join(repo_directory, "config", "params.yml"),
+        help="[str] The parameters file. Default is config/params.yml.",
+    )
+    parser.add_argument(
+        "--population",
+        type=int,
+        default=None,
+        help="[int] Number of schedules in the population. Default is "
+        "numberOfChromosomes in the parameters file.",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=20,
+        help="[int] Number of times each individual function is timed. "
+        "Default is 20.",
+    )
+    parser.add_argument(
+        "--report_repeats",
+        type=int,
+        default=1,
+        help="[int] Number of times save_report and building its workbook "
+        "are timed. Default is 1.",
+    )
+    parser.add_argument(
+        "--max_generations",
+        type=int,
+        default=100,
+        help="[int] Maximum number of generations for each run of the genetic "
+        "algorithm. Default is 100.",
+    )
+    parser.add_argument(
+        "--time_limit",
+        type=float,
+        default=300,
+        help="[float] Maximum seconds for each run of the genetic algorithm. "
+        "Default is 300.",
+    )
+    parser.add_argument(
+        "--memory_generations",
+        type=int,
+        default=5,
+        help="[int] Number of generations run while measuring peak memory. "
+        "Default is 5.",
+    )
+    parser.add_argument(
+        "--seed",
+        "-s",
+        type=int,
+        default=0,
+        help="[int] Seed for the fake data and the genetic algorithm. Default "
+        "is 0.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        default=None,
+        help="[str] JSON file the results are written to. Default is "
+        "benchmarks/results/benchmark [datetime].json.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="[str] JSON file from an earlier benchmark to compare the results "
+        "against.",
+    )
+    return parser.parse_args(argv)
+
+
+def time_calls(function, repeats: int) -> dict:
+    """
+    Function to time repeated calls of a function
+
+    :param function: function with no arguments to be timed
+    :param repeats: integer number of calls
+    :returns: dictionary of the number of calls and the total, mean and minimum seconds
+    """
+    durations = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {
+        "calls": repeats,
+        "total_s": float(np.sum(durations)),
+        "mean_s": float(np.mean(durations)),
+        "min_s": float(np.min(durations)),
+    }
+
+
+def load_problem(num_students: int, num_wards: int, seed: int) -> tuple:
+    """
+    Function to generate fake data and convert it into the inputs of the genetic algorithm
+
+    :param num_students: integer number of students to generate
+    :param num_wards: integer number of wards to generate
+    :param seed: integer seed for the fake data
+    :returns: slots, wards, placements, number of weeks and ProblemIndex
+    """
+    input_file = fake_data_excel_file(
+        *generate_fake_data(num_students, num_wards, seed))
+    dataload = DataLoader()
+    dataload.readData(io.BytesIO(input_file))
+    num_weeks = dataload.schedule_weeks()
+    slots, wards, placements = dataload.preprocData(num_weeks)
+    index = ProblemIndex(slots, wards, placements, num_weeks)
+    return slots, wards, placements, num_weeks, index
+
+
+def benchmark_scale(num_students: int, num_wards: int, params: Params,
+                    args: argparse.Namespace) -> dict:
+    """
+    Function to benchmark one problem size
+
+    :param num_students: integer number of students
+    :param num_wards: integer number of wards
+    :param params: Params for the genetic algorithm
+    :param args: namespace of the command line arguments
+    :returns: dictionary of the results for this problem size
+    """
+    pop_size = args.population or params.ui_params.numberOfChromosomes
+    start = time.perf_counter()
+    slots, wards, placements, num_weeks, index = load_problem(
+        num_students, num_wards, args.seed)
+    load_s = time.perf_counter() - start
+    problem = (slots, wards, placements, num_weeks)
+
+    # Individual functions, on schedules from a seeded population. The fitness
+    # cache is turned off so that repeated calls are scored each time
+    uncached_params = params.override({"schedule_params": {"fitness_cache_mb": 0}})
+    ga = GeneticAlgorithm(*problem[:3], pop_size, num_weeks, 0, index,
+                          uncached_params, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    def generate():
+        Schedule(*problem, index, ga.evaluator,
+                 uncached_params).schedule_generation(rng)
+    generation = time_calls(generate, args.repeats)
+
+    ga.seed_schedules()
+    schedules = [schedule["schedule"] for schedule in ga.schedules]
+    timings = {
+        "schedule_generation": generation,
+        "get_fitness": time_calls(
+            lambda: schedules[rng.randrange(len(schedules))].get_fitness(),
+            args.repeats),
+        "mutation": time_calls(
+            lambda: schedules[rng.randrange(len(schedules))].mutation(
+                ga.num_mutations, rng),
+            args.repeats),
+        "recombination": time_calls(
+            lambda: schedules[0].recombination(
+                schedules[rng.randrange(1, len(schedules))],
+                int(np.round(num_weeks / ga.recomb_points, 0)), 1, rng),
+            args.repeats),
+    }
+
+    # A full run of the genetic algorithm, to convergence or the limits
+    ga = GeneticAlgorithm(*problem[:3], pop_size, num_weeks, 0, index, params,
+                          seed=args.seed)
+    start = time.perf_counter()
+    ga.seed_schedules()
+    seed_s = time.perf_counter() - start
+    continue_eval, chosen_schedule, fitness, iteration, _, _ = ga.evaluate()
+    time_to_threshold = (time.perf_counter() - start
+                         if fitness > ga.fitness_threshold else None)
+    generations = 0
+    evolve_start = time.perf_counter()
+    while (continue_eval and generations < args.max_generations
+           and time.perf_counter() - start < args.time_limit):
+        continue_eval, chosen_schedule, fitness, iteration, _ = ga.evolve()
+        generations += 1
+        if time_to_threshold is None and fitness > ga.fitness_threshold:
+            time_to_threshold = time.perf_counter() - start
+    evolve_s = time.perf_counter() - evolve_start
+    cache_stats = ga.evaluator.cache.stats()
+    timings["evolve"] = {
+        "calls": generations,
+        "total_s": evolve_s,
+        "mean_s": evolve_s / generations if generations else None,
+    }
+    best = max(ga.schedules, key=lambda schedule: schedule["fitness"])["schedule"]
+    if chosen_schedule is None:
+        best.populate_schedule()
+        chosen_schedule = best
+    timings["save_report"] = time_calls(
+        lambda: chosen_schedule.save_report(0), args.report_repeats)
+    # Workbooks are built when they are first downloaded, so are timed apart
+    timings["report_workbook"] = time_calls(
+        lambda: chosen_schedule.report.build_workbook(), args.report_repeats)
+
+    # Peak memory is measured separately, as tracing slows the run down
+    tracemalloc.start()
+    ga = GeneticAlgorithm(*problem[:3], pop_size, num_weeks, 0, index, params,
+                          seed=args.seed)
+    ga.seed_schedules()
+    for i in range(args.memory_generations):
+        ga.evolve()
+    peak_traced = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "students": num_students,
+        "wards": num_wards,
+        "placements": len(placements),
+        "num_weeks": num_weeks,
+        "population": pop_size,
+        "load_s": load_s,
+        "timings": timings,
+        "schedules_per_s": 1 / generation["mean_s"],
+        "seed_population_s": seed_s,
+        "generations": generations,
+        "generations_per_s": generations / evolve_s if evolve_s else None,
+        "converged": not continue_eval,
+        "final_fitness": float(fitness),
+        "fitness_threshold": ga.fitness_threshold,
+        "time_to_threshold_s": time_to_threshold,
+        "fitness_cache": cache_stats,
+        "peak_traced_memory_mb": peak_traced / 2**20,
+    }
+
+
+def environment() -> dict:
+    """
+    Function to describe the code version and machine the benchmark ran on
+
+    :returns: dictionary of the environment details
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"],
+                                cwd=repo_directory, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: dict, previous: dict):
+    """
+    Function to print how the results have changed since an earlier benchmark
+
+    :param results: dictionary of this benchmark's results
+    :param previous: dictionary of an earlier benchmark's results
+    :returns: no explicit return, prints a table of the ratio of new to old values
+    """
+    previous_scales = {(scale["students"], scale["wards"]): scale
+                       for scale in previous["scales"]}
+    rows = []
+    for scale in results["scales"]:
+        old = previous_scales.get((scale["students"], scale["wards"]))
+        if old is None:
+            continue
+        row = {"scale": f"{scale['students']}x{scale['wards']}"}
+        for name, timing in scale["timings"].items():
+            if timing["mean_s"] and old["timings"].get(name, {}).get("mean_s"):
+                row[f"{name} time"] = timing["mean_s"] / old["timings"][name]["mean_s"]
+        for name in ["schedules_per_s", "generations_per_s",
+                     "time_to_threshold_s", "peak_traced_memory_mb"]:
+            if scale[name] and old.get(name):
+                row[name] = scale[name] / old[name]
+        rows.append(row)
+    print("\nRatio of new to old values (time below 1 is faster):")
+    print(pd.DataFrame(rows).set_index("scale").round(3).T.to_string())
+
+
+def main(argv: list = None) -> dict:
+    """
+    Function to run the benchmarks at each problem size and write the results
+
+    :param argv: list of command line arguments, read from sys.argv if not given
+    :returns: dictionary of the results, which is also written to a JSON file
+    """
+    args = parse_args(argv)
+    params = Params.load(args.params)
+    results = {**environment(), "seed": args.seed, "scales": []}
+    for scale in args.scales:
+        num_students, num_wards = (int(n) for n in scale.lower().split("x"))
+        print(f"Benchmarking {num_students} students and {num_wards} wards")
+        result = benchmark_scale(num_students, num_wards, params, args)
+        results["scales"].append(result)
+        print(f"  {result['schedules_per_s']:.1f} schedules/s, "
+              f"{result['generations_per_s'] or 0:.2f} generations/s, "
+              f"final fitness {result['final_fitness']:.4f}, "
+              f"fitness cache hit rate {result['fitness_cache']['hit_rate']:.1%}, "
+              f"peak traced memory {result['peak_traced_memory_mb']:.1f}MB")
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        results["max_rss_mb"] = max_rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+    output = args.output
+    if output is None:
+        now = datetime.now().strftime("%d-%m-%Y %H-%M")
+        output = os.path.join(repo_directory, "benchmarks", "results",
+                              f"benchmark {now}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            compare(results, json.load(file))
+    return results
+
+
+if __name__ == "__main__":
+    main()
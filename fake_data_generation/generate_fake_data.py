@@ -5,20 +5,30 @@ repo. Field values are generated randomly independently of each other.
 Instructions on how to run this file can be found in the README.md in this
 directory.
 """
-from src.Schedule import Schedule
 import argparse
 import json
 import numpy as np
 import pandas as pd
 import random
 import io
+import os
 
-class FakeData():
-    # Get arguments from command line
-    # (If args are not specified default values will be used.)
+# Config files describing the fields, relative to the repo root
+config_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "config")
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Function to read the arguments from the command line
+    (If args are not specified default values will be used.)
+
+    :param argv: list of command line arguments, read from sys.argv if not given
+    :returns: namespace of the arguments
+    """
     parser = argparse.ArgumentParser(
         description="""The purpose of `generate_fake_data.py` is to create a
-        `.csv` file with fake data with the following intended applications: 
+        `.csv` file with fake data with the following intended applications:
         An example of how data needs to be formatted to be passed into the
         model and to test the setup and running of the repo."""
     )
@@ -60,20 +70,29 @@ class FakeData():
     )
 
     # Read arguments from the command line
-    args = parser.parse_args()
-
-    import os
-
-    cwd = os.getcwd()
-    print(cwd)
-
-
+    return parser.parse_args(argv)
+
+
+def generate_fake_data(number_of_students: int = 20,
+                       number_of_wards: int = 5,
+                       seed: int = None) -> tuple:
+    """
+    Function to randomly generate the students, wards and placements tabs of
+    an input file
+
+    :param number_of_students: integer number of students records to generate
+    :param number_of_wards: integer number of wards to generate
+    :param seed: integer seed so the result is reproducible, different each
+    time if not given
+    :returns: student, ward and placement dataframes
+    """
     # Set seed if specified:
-    if args.seed is not None:
-        np.random.seed(seed=args.seed)
+    np_rng = np.random.RandomState(seed)
+    py_rng = random.Random(seed)
 
     # Load fake_data_description.json to get columns required for training data
-    with open("config/fake_data_description.json", "r") as file:
+    with open(os.path.join(config_directory, "fake_data_description.json"),
+              "r") as file:
         data_columns = json.load(file)
 
     # Create dataframe with original data fields
@@ -88,21 +107,22 @@ class FakeData():
 
     # Load data_categories.json to get the data categories required for each
     # field in the fake data
-    with open("config/fake_data_categories.json", "r") as file:
+    with open(os.path.join(config_directory, "fake_data_categories.json"),
+              "r") as file:
         data_cat = json.load(file)
 
     # Assign data categories to fields in dataframe
     for column in student_columns:
         if column in data_cat["student_data_fields"].keys():
-            student_df[column] = np.random.choice(
+            student_df[column] = np_rng.choice(
                 data_cat["student_data_fields"][column],
-                size=args.number_of_students
+                size=number_of_students
             )
 
     for column in ward_columns:
         if column in data_cat["ward_data_fields"].keys():
-            ward_df[column] = np.random.choice(
-                data_cat["ward_data_fields"][column], size=args.number_of_wards
+            ward_df[column] = np_rng.choice(
+                data_cat["ward_data_fields"][column], size=number_of_wards
             )
 
     cohort_cols = ['university', 'qualification', 'course_start']
@@ -110,47 +130,78 @@ class FakeData():
     placement_df[cohort_cols] = student_courses
     for column in placement_columns:
         if column in data_cat["placement_data_fields"].keys():
-            placement_df[column] = np.random.choice(
+            placement_df[column] = np_rng.choice(
                 data_cat["placement_data_fields"][column],
                 size=len(student_courses))
 
     # Remaining fields to fill in so they are not null
     # fields requiring int:
-    student_df["student_id"] = [random.randint(10000, 99999)
-                                for i in range(args.number_of_students)]
+    student_df["student_id"] = [py_rng.randint(10000, 99999)
+                                for i in range(number_of_students)]
     student_df["Forename"] = ["Forename " + str(i)
-                              for i in range(args.number_of_students)]
+                              for i in range(number_of_students)]
     student_df["Surname"] = ["Surname " + str(i)
-                             for i in range(args.number_of_students)]
-    student_df["is_driver"] = random.choices([True, False], weights=[0.2, 0.8],
-                                             k=args.number_of_students)
-    student_df["prev_placements"] = [[] for i in range(args.number_of_students)]
+                             for i in range(number_of_students)]
+    student_df["is_driver"] = py_rng.choices([True, False], weights=[0.2, 0.8],
+                                             k=number_of_students)
+    student_df["prev_placements"] = [[] for i in range(number_of_students)]
 
     ward_df["ward_name"] = ["Ward" + str(i)
-                            for i in range(args.number_of_wards)]
+                            for i in range(number_of_wards)]
     ward_df["capacity_num"] = ward_df["p1_cap"] = ward_df["p2_cap"] = ward_df[
-        "p3_cap"] = ward_df["nurse_associate_cap"] = np.random.randint(2, 30,
-                                                     size=(args.number_of_wards))
-    ward_df["need_to_drive"] = random.choices(
+        "p3_cap"] = ward_df["nurse_associate_cap"] = np_rng.randint(2, 30,
+                                                     size=(number_of_wards))
+    ward_df["need_to_drive"] = py_rng.choices(
                                [True, False], weights=[0.05, 0.95],
-                               k=args.number_of_wards)
-    ward_df["DYAD"] = random.choices([True, False], weights=[0.07, 0.93],
-                                     k=args.number_of_wards)
+                               k=number_of_wards)
+    ward_df["DYAD"] = py_rng.choices([True, False], weights=[0.07, 0.93],
+                                     k=number_of_wards)
 
-    placement_df["placement_len_weeks"] = np.random.randint(1, 5,
+    placement_df["placement_len_weeks"] = np_rng.randint(1, 5,
                                                     size=len(student_courses))
+    return student_df, ward_df, placement_df
+
+
+# Write dataframe to excel
+def fake_data_excel_file(student_df: pd.DataFrame,
+                         ward_df: pd.DataFrame,
+                         placement_df: pd.DataFrame) -> bytes:
+    """
+    Function to write the fake data tabs to an excel file
+
+    :param student_df: dataframe of the students tab
+    :param ward_df: dataframe of the wards tab
+    :param placement_df: dataframe of the placements tab
+    :returns: contents of the .xlsx file
+    """
+    output = io.BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    student_df.to_excel(writer, sheet_name="students", index=False)
+    ward_df.to_excel(writer, sheet_name="wards", index=False)
+    placement_df.to_excel(writer, sheet_name="placements", index=False)
+    writer.close()
+    processed_data = output.getvalue()
+    return processed_data
 
-    # Write dataframe to excel
-    def fake_data_excel_file(student_df, ward_df, placement_df):
-        output = io.BytesIO()
-        writer = pd.ExcelWriter(output, engine='xlsxwriter')
-        student_df.to_excel(writer, sheet_name="students", index=False)
-        ward_df.to_excel(writer, sheet_name="wards", index=False)
-        placement_df.to_excel(writer, sheet_name="placements", index=False)
-        writer.close()
-        processed_data = output.getvalue()
-        return processed_data
-
-    fake_data_file = fake_data_excel_file(student_df, ward_df, placement_df)
-    fake_data_download_link = Schedule.create_download_link(fake_data_file,
-                                                            "Fake Data.xlsx")
+
+class FakeData():
+    """
+    An input file of fake data, as the bytes of an excel file
+
+    :param number_of_students: integer number of students records to generate
+    :param number_of_wards: integer number of wards to generate
+    :param seed: integer seed so the result is reproducible, different each
+    time if not given
+    """
+    def __init__(self, number_of_students: int = 20, number_of_wards: int = 5,
+                 seed: int = None):
+        self.fake_data_file = fake_data_excel_file(
+            *generate_fake_data(number_of_students, number_of_wards, seed))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    fake_data = FakeData(args.number_of_students, args.number_of_wards,
+                         args.seed)
+    with open(f"{args.filename}.xlsx", "wb") as file:
+        file.write(fake_data.fake_data_file)
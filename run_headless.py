@@ -0,0 +1,182 @@
+"""
+This file runs the placement optimisation from the command line, without the
+user interface (Streamlit is not imported). It reads an input workbook, runs
+the genetic algorithm the requested number of times and writes each schedule
+and the schedule comparison file to an output directory.
+Instructions on how to run this file can be found in the README.md
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+import pandas as pd
+from src.data_load import DataLoader
+from src.ProblemIndex import ProblemIndex
+from src.Params import Params
+from src.ScheduleExecutor import ScheduleExecutor
+from src.RunExecutor import RunExecutor, comparison_table
+from src.WarmStart import WarmStart
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Function to read the arguments from the command line
+
+    :param argv: list of command line arguments, read from sys.argv if not given
+    :returns: namespace of the arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""Run the placement optimisation without the user
+        interface and write the schedules to an output directory."""
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        type=str,
+        required=True,
+        help="[str] The .xlsx input file, with students, wards and placements "
+        "tabs.",
+    )
+    parser.add_argument(
+        "--params",
+        "-p",
+        type=str,
+        default="config/params.yml",
+        help="[str] The parameters file. Default is config/params.yml.",
+    )
+    parser.add_argument(
+        "--seed",
+        "-s",
+        type=int,
+        default=None,
+        help="[int] If specified will ensure result is reproducible. Default "
+        "is set to None so will generate a different result each time.",
+    )
+    parser.add_argument(
+        "--runs",
+        "-r",
+        type=int,
+        default=1,
+        help="[int] Number of schedules to produce (one per run of the "
+        "algorithm). Default is 1.",
+    )
+    parser.add_argument(
+        "--output_dir",
+        "-o",
+        type=str,
+        default="results",
+        help="[str] Directory the schedules and comparison file are written "
+        "to. Default is results.",
+    )
+    parser.add_argument(
+        "--population",
+        type=int,
+        default=None,
+        help="[int] Number of schedules in the population of each run. "
+        "Default is numberOfChromosomes in the parameters file.",
+    )
+    parser.add_argument(
+        "--start_date",
+        type=str,
+        default=None,
+        help="[str] Only schedule placements starting on or after this date "
+        "(YYYY-MM-DD). Default is to include all placements.",
+    )
+    parser.add_argument(
+        "--end_date",
+        type=str,
+        default=None,
+        help="[str] Only schedule placements starting before this date "
+        "(YYYY-MM-DD). Default is to include all placements.",
+    )
+    parser.add_argument(
+        "--warm_start",
+        type=str,
+        default=None,
+        help="[str] A previous schedule output workbook (.xlsx) or schedule "
+        "CSV to start each run from, e.g. last week's published schedule. "
+        "Default is to start from random schedules.",
+    )
+    parser.add_argument(
+        "--lock_before",
+        type=str,
+        default=None,
+        help="[str] Keep the ward from the warm start schedule for every "
+        "placement starting before this date (YYYY-MM-DD). Default is to only "
+        "keep those marked in its locked column.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> bool:
+    """
+    Function to run Nursing Placement Optimisation tool end-to-end from the command line
+
+    :param argv: list of command line arguments, read from sys.argv if not given
+    :returns: bool of whether any viable schedules were produced, with the schedules and comparison file
+    written to the output directory
+    """
+    args = parse_args(argv)
+    params = Params.load(args.params)
+    pop_size = args.population or params.ui_params.numberOfChromosomes
+
+    dataload = DataLoader()
+    dataload.readData(args.input)
+    #Filter placements to between start and end dates, as in the user interface
+    if args.start_date is not None:
+        dataload.student_placements = dataload.student_placements.loc[
+            dataload.student_placements.placement_start_date_raw
+            >= pd.to_datetime(args.start_date)]
+    if args.end_date is not None:
+        dataload.student_placements = dataload.student_placements.loc[
+            dataload.student_placements.placement_start_date_raw
+            < pd.to_datetime(args.end_date)]
+
+    num_weeks = dataload.schedule_weeks()
+    slots, wards, placements = dataload.preprocData(num_weeks)
+    index = ProblemIndex(slots, wards, placements, num_weeks)
+    warm_start = None
+    if args.warm_start is not None:
+        warm_start = WarmStart.from_file(args.warm_start, placements, wards)
+        if args.lock_before is not None:
+            warm_start.lock_before(placements, args.lock_before)
+        print(f"Starting from {args.warm_start}: {warm_start.summary()}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summaries = []
+    with ScheduleExecutor(slots, wards, placements, num_weeks, index, params,
+                          params.genetic_algorithm_params.workers) as executor, \
+         RunExecutor(slots, wards, placements, num_weeks, index, params,
+                     params.ui_params.run_workers, executor, warm_start) as runs:
+        for event, details in runs.run(args.runs, pop_size, args.seed):
+            if event == "progress":
+                continue
+            #Write the run's schedule as soon as it finishes
+            for report, file_name in details["files"]:
+                #The schedule CSV goes with the workbook rather than into the repo's results folder
+                report.csv_directory = args.output_dir
+                with open(os.path.join(args.output_dir, file_name), "wb") as f:
+                    f.write(report.content)
+            summaries.append(details)
+            print(f"Schedule {details['run_no'] + 1} of {args.runs}: "
+                  f"{details['file_name']} (fitness {details['fitness']:.4f}, "
+                  f"{details['iteration']} iterations, seed {details['seed']}, "
+                  f"{details['fitness_cache']['hit_rate']:.0%} of scores "
+                  "found in the fitness cache)")
+            local_search = details["local_search"]
+            if local_search is not None and local_search["moves"]:
+                print(f"  Local search ({local_search['method']}) scored {local_search['moves']} moves in "
+                      f"{local_search['seconds']:.1f}s, fitness {local_search['start_fitness']:.4f} to "
+                      f"{local_search['fitness']:.4f}")
+
+    now = datetime.now().strftime("%d-%m-%Y %H-%M")
+    compare_path = os.path.join(args.output_dir, f"{now} schedule comparison.csv")
+    comparison = comparison_table(summaries)
+    comparison.to_csv(compare_path, index=False)
+    print(f"Schedule comparison written to {compare_path}")
+    return bool((comparison["Viable schedule?"] == "True").any())
+
+
+if __name__ == "__main__":
+    #Exit with 1 if no viable schedule was produced, so scripts can check the result
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,121 @@
+import hashlib
+import sys
+from collections import OrderedDict
+import numpy as np
+
+
+class FitnessCache:
+    """
+    The FitnessCache remembers the scores of genomes that have already been scored, so a schedule produced again by
+    mutation or recombination (common once the population has converged) is not scored a second time. Genomes are
+    keyed by a hash of their bytes. When the memory used by the stored scores would go over the budget, the least
+    recently used are removed first. Scores are copied when they are stored and when they are looked up, so schedules
+    never share (or change) the stored dictionaries.
+
+    :param budget_mb: memory budget in megabytes for the stored scores, 0 turns the cache off
+    """
+
+    def __init__(self, budget_mb: float):
+        self.budget_bytes = int(budget_mb * 2**20)
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(genome: np.ndarray) -> bytes:
+        """
+        Function to calculate the key of a genome
+
+        :param genome: integer array of the ward id assigned to each placement
+        :returns: bytes of a hash of the genome
+        """
+        return hashlib.blake2b(np.ascontiguousarray(genome).tobytes(), digest_size=16).digest()
+
+    @staticmethod
+    def entry_size(key: bytes, result: dict) -> int:
+        """
+        Function to estimate the memory used by a stored score
+
+        :param key: bytes key of the genome
+        :param result: dictionary of scores produced by FitnessEvaluator
+        :returns: integer number of bytes
+        """
+        size = sys.getsizeof(key) + sys.getsizeof(result)
+        for value in result.values():
+            size += sys.getsizeof(value)
+            if isinstance(value, dict):
+                size += sum(sys.getsizeof(item) for item in value.values())
+        return size
+
+    @staticmethod
+    def copy_result(result: dict) -> dict:
+        """
+        Function to copy a score, including the dictionaries within it (e.g. schedule_eval_scores)
+
+        :param result: dictionary of scores produced by FitnessEvaluator
+        :returns: dictionary of scores sharing no dictionaries with result
+        """
+        return {name: dict(value) if isinstance(value, dict) else value for name, value in result.items()}
+
+    def get(self, key: bytes) -> dict:
+        """
+        Function to look up the scores of a genome
+
+        :param key: bytes key of the genome
+        :returns: copy of the dictionary of scores produced by FitnessEvaluator, or None if the genome has not been
+        stored
+        """
+        if self.budget_bytes <= 0:
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return self.copy_result(entry[0])
+
+    def put(self, key: bytes, result: dict):
+        """
+        Function to store the scores of a genome, removing the least recently used scores if over budget
+
+        :param key: bytes key of the genome
+        :param result: dictionary of scores produced by FitnessEvaluator
+        :returns: no explicit return but updates entries class object
+        """
+        if self.budget_bytes <= 0 or key in self.entries:
+            return
+        size = self.entry_size(key, result)
+        self.entries[key] = (self.copy_result(result), size)
+        self.used_bytes += size
+        while self.used_bytes > self.budget_bytes and self.entries:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.used_bytes -= evicted_size
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Proportion of look ups that found a stored score
+
+        :returns: float between 0 and 1 (0 if there have been no look ups)
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """
+        Function to summarise how the cache has been used
+
+        :returns: dictionary of hits, misses, hit rate, evictions, number of entries and memory used in megabytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "used_mb": self.used_bytes / 2**20,
+        }
@@ -0,0 +1,460 @@
+import re
+import numpy as np
+from src.ProblemIndex import ProblemIndex
+from src.Params import ScheduleParams
+from src.FitnessCache import FitnessCache
+
+
+class FitnessEvaluator:
+    """
+    The FitnessEvaluator scores schedules from integer arrays of the placements and wards they contain, using
+    NumPy reductions rather than looping over each confirmed placement. It produces the same fitness, viability,
+    non-viable reason and evaluation scores as scoring each placement in turn, and can score a whole population of
+    schedules in one call.
+
+    Everything that does not change between schedules (capacities, covid compatibility, cleaned ward histories and
+    department words) is read from the ProblemIndex for the run. Scores of genomes already seen are kept in a
+    FitnessCache, bounded by fitness_cache_mb in config/params.yml.
+
+    :param index: the ProblemIndex built from the run's wards and placements
+    :param schedule_params: ScheduleParams for scoring schedules
+    """
+
+    # Maximum number of placements scored together, to bound the memory used by a population
+    max_batch_placements = 2**20
+
+    speciality_checks = {
+        "medical": ["Medical", "Medicine"],
+        "surgical": ["Surgical", "Surgery"],
+        "community": ["Community"],
+        "critical_care": ["Critical", "Emergency"],
+    }
+
+    def __init__(self, index: ProblemIndex, schedule_params: ScheduleParams):
+        self.index = index
+
+        self.within_capacity_scoring_factor = schedule_params.within_capacity_scoring_factor
+        self.double_booked_scoring_factor = schedule_params.double_booked_scoring_factor
+        self.uniq_departments_scoring_factor = schedule_params.uniq_departments_scoring_factor
+        self.uniq_wards_scoring_factor = schedule_params.uniq_wards_scoring_factor
+        self.all_placements_assigned_scoring_factor = schedule_params.all_placements_assigned_scoring_factor
+        self.capacity_utilisation_scoring_factor = schedule_params.capacity_utilisation_scoring_factor
+        self.cache = FitnessCache(schedule_params.fitness_cache_mb)
+
+        # Speciality goals which are turned on, with the department words that satisfy them
+        self.speciality_goals = []
+        for speciality, check_words in self.speciality_checks.items():
+            if getattr(schedule_params, f"{speciality}_placement_check"):
+                check_words_regex = re.compile("|".join(check_words), re.IGNORECASE)
+                matching_tokens = np.array(
+                    [bool(check_words_regex.search(word)) for word in index.dep_words], dtype=bool
+                )
+                self.speciality_goals.append(
+                    (matching_tokens, getattr(schedule_params, f"{speciality}_placement_scoring_factor"))
+                )
+
+    def evaluate(self, placement_indices: np.ndarray, ward_indices: np.ndarray) -> dict:
+        """
+        Function to score a single schedule
+
+        :param placement_indices: array of the position of each confirmed placement within placements
+        :param ward_indices: array of the ward id each confirmed placement is assigned to
+        :returns: dictionary of fitness, viable, non_viable_reason and schedule_eval_scores for the schedule
+        """
+        return self.evaluate_population([placement_indices], [ward_indices])[0]
+
+    def evaluate_population(self, placement_indices: list, ward_indices: list) -> list:
+        """
+        Function to score a population of schedules, splitting it into batches to bound memory use
+
+        :param placement_indices: list with an array of placement positions for each schedule
+        :param ward_indices: list with an array of assigned ward ids for each schedule
+        :returns: list of result dictionaries, one for each schedule
+        """
+        results = []
+        batch_start = 0
+        batch_placements = 0
+        for i, schedule_placements in enumerate(placement_indices):
+            if batch_placements and (
+                batch_placements + len(schedule_placements) > self.max_batch_placements
+            ):
+                results += self.evaluate_batch(
+                    placement_indices[batch_start:i], ward_indices[batch_start:i]
+                )
+                batch_start = i
+                batch_placements = 0
+            batch_placements += len(schedule_placements)
+        results += self.evaluate_batch(
+            placement_indices[batch_start:], ward_indices[batch_start:]
+        )
+        return results
+
+    def evaluate_batch(self, placement_indices: list, ward_indices: list) -> list:
+        """
+        Function to score a batch of schedules together. Each confirmed placement across the batch is one
+        element of flat arrays, and all counting is done with sorting and bincount by schedule.
+
+        :param placement_indices: list with an array of placement positions for each schedule
+        :param ward_indices: list with an array of assigned ward ids for each schedule
+        :returns: list of result dictionaries, one for each schedule
+        """
+        num_schedules = len(placement_indices)
+        if num_schedules == 0:
+            return []
+        sizes = np.array([len(x) for x in placement_indices], dtype=np.int64)
+        schedule = np.repeat(np.arange(num_schedules), sizes)
+        position = np.arange(len(schedule)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        plac = np.concatenate([np.asarray(x, dtype=np.int64) for x in placement_indices])
+        ward = np.concatenate([np.asarray(x, dtype=np.int64) for x in ward_indices])
+
+        return self.build_results(
+            num_schedules,
+            sizes,
+            schedule,
+            position,
+            ward,
+            self.placement_checks(schedule, plac, ward),
+            self.all_assigned(schedule, plac, sizes, num_schedules),
+            self.student_variety(schedule, plac, ward),
+        )
+
+    def placement_checks(self, schedule: np.ndarray, plac: np.ndarray, ward: np.ndarray) -> dict:
+        """
+        Function to check each confirmed placement against ward capacity, covid status and double booking
+
+        :param schedule: array of the schedule each confirmed placement belongs to
+        :param plac: array of placement positions
+        :param ward: array of assigned ward ids
+        :returns: dictionary of arrays with the students on the ward in the placement's first week (overall and
+        of the same year-part), and booleans for within capacity, covid incompatible and double booked
+        """
+        index = self.index
+        # Count students on each ward-week (overall and by year-part) across every week of each placement
+        durations = index.placement_durations[plac]
+        covered = np.repeat(np.arange(len(plac)), durations)
+        covered_weeks = index.placement_weeks[plac][covered] + (
+            np.arange(len(covered)) - np.repeat(np.cumsum(durations) - durations, durations)
+        )
+        # Weeks after the end of the schedule are not counted, as in Occupancy, so that a placement running past
+        # the end does not spill into the next ward's weeks. A placement starting after the end has a count of 0
+        in_schedule = covered_weeks < index.num_weeks
+        covered, covered_weeks = covered[in_schedule], covered_weeks[in_schedule]
+        start_weeks = index.placement_weeks[plac]
+        covered_cells = (schedule[covered] * index.num_wards + ward[covered]) * index.num_weeks + covered_weeks
+        start_cells = np.where(
+            start_weeks < index.num_weeks, (schedule * index.num_wards + ward) * index.num_weeks + start_weeks, -1
+        )
+        ward_count = self.lookup_counts(covered_cells, start_cells)
+        year_count = self.lookup_counts(
+            covered_cells * index.num_parts + index.placement_parts[plac][covered],
+            np.where(start_cells >= 0, start_cells * index.num_parts + index.placement_parts[plac], -1),
+        )
+        return {
+            "ward_count": ward_count,
+            "year_count": year_count,
+            "within_capacity": self.within_capacity(plac, ward, ward_count, year_count),
+            "covid_incompatible": index.placement_covid_low[plac] & index.ward_covid_high[ward],
+            "double_booked": self.find_double_booked(schedule, plac, ward),
+        }
+
+    def within_capacity(
+        self, plac: np.ndarray, ward: np.ndarray, ward_count: np.ndarray, year_count: np.ndarray
+    ) -> np.ndarray:
+        """
+        Function to check if wards have exceeded capacity of assigned placements
+
+        :param plac: array of placement positions
+        :param ward: array of assigned ward ids
+        :param ward_count: array of students on the ward in each placement's first week
+        :param year_count: array of students of the same year-part on the ward in each placement's first week
+        :returns: boolean array which is True where both overall and year-specific capacity are respected
+        """
+        return (ward_count <= self.index.ward_capacities[ward]) & (
+            year_count <= self.index.ward_year_caps[ward, self.index.placement_parts[plac]]
+        )
+
+    def all_assigned(
+        self, schedule: np.ndarray, plac: np.ndarray, sizes: np.ndarray, num_schedules: int
+    ) -> np.ndarray:
+        """
+        Function to check, for each schedule, whether every placement appears exactly once
+
+        :param schedule: array of the schedule each confirmed placement belongs to
+        :param plac: array of placement positions
+        :param sizes: array of the number of confirmed placements in each schedule
+        :param num_schedules: integer number of schedules in the batch
+        :returns: boolean array which is True for schedules with all placements assigned
+        """
+        assigned = np.unique(schedule * self.index.num_placements + plac)
+        return (
+            np.bincount(assigned // self.index.num_placements, minlength=num_schedules)
+            == self.index.num_placements
+        ) & (sizes == self.index.num_placements)
+
+    def build_results(
+        self,
+        num_schedules: int,
+        sizes: np.ndarray,
+        schedule: np.ndarray,
+        position: np.ndarray,
+        ward: np.ndarray,
+        checks: dict,
+        all_assigned: np.ndarray,
+        students: dict,
+    ) -> list:
+        """
+        Function to combine the checks on each confirmed placement and student into the scores for each schedule
+
+        :param num_schedules: integer number of schedules in the batch
+        :param sizes: array of the number of confirmed placements in each schedule
+        :param schedule: array of the schedule each confirmed placement belongs to
+        :param position: array of each confirmed placement's position within its schedule
+        :param ward: array of assigned ward ids
+        :param checks: dictionary of placement checks, as produced by placement_checks
+        :param all_assigned: boolean array which is True for schedules with all placements assigned
+        :param students: dictionary of student variety, as produced by student_variety
+        :returns: list of result dictionaries, one for each schedule
+        """
+        within_capacity = checks["within_capacity"]
+        covid_incompatible = checks["covid_incompatible"]
+        double_booked = checks["double_booked"]
+        capacity = self.index.ward_capacities[ward]
+        utilisation = np.divide(
+            checks["ward_count"], capacity, out=np.zeros(len(ward)), where=capacity != 0
+        )
+
+        component = np.where(
+            double_booked,
+            0,
+            np.where(within_capacity & ~covid_incompatible, self.within_capacity_scoring_factor, 0)
+            + self.double_booked_scoring_factor,
+        )
+        schedule_scores = np.bincount(schedule, weights=component, minlength=num_schedules)
+        cap_exceeded_score = self.within_capacity_scoring_factor * self.count_since_last_breach(
+            schedule, position, within_capacity, num_schedules
+        )
+        double_booked_score = self.double_booked_scoring_factor * self.count_since_last_breach(
+            schedule, position, ~double_booked, num_schedules
+        )
+
+        # The reason recorded is from the last placement breaching a constraint
+        reason_code = np.where(
+            double_booked, 3, np.where(covid_incompatible, 2, np.where(~within_capacity, 1, 0))
+        )
+        last_breach = np.full(num_schedules, -1, dtype=np.int64)
+        breached = np.flatnonzero(reason_code)
+        np.maximum.at(last_breach, schedule[breached], breached)
+
+        # Maximise variety of wards and specialities for each student
+        student_schedule = students["schedule"]
+        num_students = np.bincount(student_schedule, minlength=num_schedules)
+        student_counts = np.maximum(num_students, 1)
+        mean_uniq_wards = (
+            np.bincount(
+                student_schedule,
+                weights=students["uniq_wards"] / students["wards_per_student"],
+                minlength=num_schedules,
+            )
+            / student_counts
+        )
+        mean_uniq_deps = (
+            np.bincount(
+                student_schedule,
+                weights=students["uniq_deps"] / students["deps_per_student"],
+                minlength=num_schedules,
+            )
+            / student_counts
+        )
+        speciality_scores = np.zeros(num_schedules)
+        for (_, check_score), matched in zip(self.speciality_goals, students["speciality_matched"]):
+            speciality_scores += check_score * np.bincount(
+                student_schedule[matched], minlength=num_schedules
+            )
+
+        placement_counts = np.maximum(sizes, 1)
+        mean_ward_util = np.bincount(schedule, weights=utilisation, minlength=num_schedules) / placement_counts
+
+        schedule_scores = schedule_scores + self.uniq_wards_scoring_factor * mean_uniq_wards
+        schedule_scores = schedule_scores + self.uniq_departments_scoring_factor * mean_uniq_deps
+        schedule_scores = schedule_scores + speciality_scores
+        schedule_scores = schedule_scores + np.where(
+            all_assigned, self.all_placements_assigned_scoring_factor, 0
+        )
+        schedule_scores = schedule_scores + mean_ward_util * self.capacity_utilisation_scoring_factor
+
+        max_score = (
+            sizes
+            * (
+                self.within_capacity_scoring_factor
+                + self.double_booked_scoring_factor
+                + self.all_placements_assigned_scoring_factor
+            )
+            + self.uniq_departments_scoring_factor
+            + self.uniq_wards_scoring_factor
+            + self.capacity_utilisation_scoring_factor
+            + num_students * sum(factor for _, factor in self.speciality_goals)
+        )
+
+        reasons = [None, "Cap Exceeded", "Covid status not compatible", "Double booked"]
+        results = []
+        for i in range(num_schedules):
+            if not all_assigned[i]:
+                non_viable_reason = "Placement not allocated"
+            elif last_breach[i] >= 0:
+                non_viable_reason = reasons[reason_code[last_breach[i]]]
+            else:
+                non_viable_reason = None
+            results.append(
+                {
+                    "fitness": float(schedule_scores[i]) / max_score[i] if sizes[i] else 0,
+                    "viable": non_viable_reason is None,
+                    "non_viable_reason": non_viable_reason,
+                    "schedule_scores": float(schedule_scores[i]),
+                    "schedule_eval_scores": {
+                        "cap_exceeded_score": cap_exceeded_score[i].item(),
+                        "double_booked_score": double_booked_score[i].item(),
+                        "mean_ward_util": float(mean_ward_util[i]),
+                        "mean_uniq_wards": float(mean_uniq_wards[i]),
+                        "mean_uniq_deps": float(mean_uniq_deps[i]),
+                    },
+                }
+            )
+        return results
+
+    @staticmethod
+    def lookup_counts(keys: np.ndarray, lookup_keys: np.ndarray) -> np.ndarray:
+        """
+        Function to count how often each of lookup_keys appears in keys
+
+        :param keys: array of keys to be counted
+        :param lookup_keys: array of keys to return counts for
+        :returns: array of counts for each of lookup_keys, 0 for keys which do not appear in keys
+        """
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        if len(unique_keys) == 0:
+            return np.zeros(len(lookup_keys), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(unique_keys, lookup_keys), len(unique_keys) - 1)
+        return np.where(unique_keys[positions] == lookup_keys, counts[positions], 0)
+
+    def find_double_booked(self, schedule: np.ndarray, plac: np.ndarray, ward: np.ndarray) -> np.ndarray:
+        """
+        Function to find confirmed placements where the student is also on a different ward in any week of the
+        placement. Each placement is expanded to the weeks it covers, so a student's wards in each week can be
+        looked up directly.
+
+        :param schedule: array of the schedule each confirmed placement belongs to
+        :param plac: array of placement positions
+        :param ward: array of assigned ward ids
+        :returns: boolean array which is True where the placement is double booked
+        """
+        index = self.index
+        durations = index.placement_durations[plac]
+        entry = np.repeat(np.arange(len(plac)), durations)
+        if len(entry) == 0:
+            return np.zeros(len(plac), dtype=bool)
+        week = index.placement_weeks[plac][entry] + (
+            np.arange(len(entry)) - np.repeat(np.cumsum(durations) - durations, durations)
+        )
+        student_weeks = (
+            schedule[entry] * index.num_students + index.placement_students[plac][entry]
+        ) * (int(week.max()) + 1) + week
+        # Number of different wards each student is on in each week
+        booked = np.unique(student_weeks * index.num_wards + ward[entry])
+        booked_weeks, wards_booked = np.unique(booked // index.num_wards, return_counts=True)
+        clash = wards_booked[np.searchsorted(booked_weeks, student_weeks)] > 1
+        return np.bincount(entry[clash], minlength=len(plac)) > 0
+
+    @staticmethod
+    def count_since_last_breach(
+        schedule: np.ndarray, position: np.ndarray, passed: np.ndarray, num_schedules: int
+    ) -> np.ndarray:
+        """
+        Function to count, for each schedule, the placements passing a check after the last one that failed it.
+        This matches a running score which is reset to zero whenever a placement fails.
+
+        :param schedule: array of the schedule each confirmed placement belongs to
+        :param position: array of each confirmed placement's position within its schedule
+        :param passed: boolean array which is True where the placement passed the check
+        :param num_schedules: integer number of schedules in the batch
+        :returns: array of counts for each schedule
+        """
+        last_failed = np.full(num_schedules, -1, dtype=np.int64)
+        np.maximum.at(last_failed, schedule[~passed], position[~passed])
+        counted = passed & (position > last_failed[schedule])
+        return np.bincount(schedule[counted], minlength=num_schedules)
+
+    def student_variety(self, schedule: np.ndarray, plac: np.ndarray, ward: np.ndarray) -> dict:
+        """
+        Function to count, for each student in each schedule, the unique wards and unique department words
+        across their previous and assigned placements, and whether they meet each speciality goal
+
+        :param schedule: array of the schedule each confirmed placement belongs to
+        :param plac: array of placement positions
+        :param ward: array of assigned ward ids
+        :returns: dictionary of arrays with one entry per student in each schedule, in the order they first
+        appear, along with the position of each confirmed placement's student
+        """
+        index = self.index
+        schedule_students = schedule * index.num_students + index.placement_students[plac]
+        # Students are kept in the order they first appear in each schedule
+        students, first_seen, student_of = np.unique(
+            schedule_students, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_seen, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        students = students[order]
+        student_of = rank[student_of.ravel()]
+        student_index = students % index.num_students
+        placements_per_student = np.bincount(student_of, minlength=len(students))
+
+        history_of, history_tokens = index.expand(
+            index.history_ward_ptr, index.history_ward_tokens, student_index
+        )
+        uniq_wards = self.count_unique(
+            np.concatenate([history_of, student_of]),
+            np.concatenate([history_tokens, index.ward_name_tokens[ward]]),
+            index.ward_vocab_size,
+            len(students),
+        )
+        wards_per_student = (
+            index.history_ward_ptr[student_index + 1] - index.history_ward_ptr[student_index]
+        ) + placements_per_student
+
+        history_of, history_tokens = index.expand(
+            index.history_dep_ptr, index.history_dep_tokens, student_index
+        )
+        ward_dep_of, ward_dep_tokens = index.expand(index.ward_dep_ptr, index.ward_dep_tokens, ward)
+        dep_owner = np.concatenate([history_of, student_of[ward_dep_of]])
+        dep_tokens = np.concatenate([history_tokens, ward_dep_tokens])
+
+        speciality_matched = []
+        for matching_tokens, _ in self.speciality_goals:
+            matched = np.zeros(len(students), dtype=bool)
+            matched[dep_owner[matching_tokens[dep_tokens]]] = True
+            speciality_matched.append(matched)
+
+        return {
+            "schedule": students // index.num_students,
+            "student_index": student_index,
+            "student_of": student_of,
+            "uniq_wards": uniq_wards,
+            "wards_per_student": wards_per_student,
+            "uniq_deps": self.count_unique(dep_owner, dep_tokens, index.dep_vocab_size, len(students)),
+            "deps_per_student": np.bincount(dep_owner, minlength=len(students)),
+            "speciality_matched": speciality_matched,
+        }
+
+    @staticmethod
+    def count_unique(owners: np.ndarray, tokens: np.ndarray, vocab_size: int, num_owners: int) -> np.ndarray:
+        """
+        Function to count the number of unique tokens belonging to each owner
+
+        :param owners: array of the owner of each token
+        :param tokens: array of tokens
+        :param vocab_size: integer number of distinct tokens
+        :param num_owners: integer number of owners
+        :returns: array of unique token counts for each owner
+        """
+        unique_keys = np.unique(owners * vocab_size + tokens)
+        return np.bincount(unique_keys // vocab_size, minlength=num_owners)
@@ -0,0 +1,232 @@
+import numpy as np
+from src.Occupancy import Occupancy
+
+
+class FitnessState:
+    """
+    A FitnessState keeps the checks on each confirmed placement and the variety of each student for a single
+    schedule, so that when a placement is moved to another ward only the placements and student affected by the
+    move are rechecked rather than scoring the whole schedule again. The result is the same as scoring the
+    schedule with FitnessEvaluator.evaluate.
+
+    Only move is proportional to the size of the change: it rechecks the placements starting in the weeks the
+    moved placement covers on its old and new ward, and the student's own placements. copy copies the occupancy
+    counts and the per-placement checks, and result adds up the checks of every placement and student, so both
+    take time linear in the size of the schedule. They avoid the sorting and string handling of a full evaluation,
+    which makes scoring a mutation several times faster, but not independent of the number of placements.
+
+    :param evaluator: the FitnessEvaluator holding the information which does not change between schedules
+    :param placement_indices: array of the position of each confirmed placement within placements
+    :param ward_indices: array of the ward id each confirmed placement is assigned to
+    """
+
+    def __init__(self, evaluator: "FitnessEvaluator", placement_indices: np.ndarray, ward_indices: np.ndarray):
+        self.evaluator = evaluator
+        self.index = evaluator.index
+        self.plac = np.asarray(placement_indices, dtype=np.int64)
+        self.ward = np.array(ward_indices, dtype=np.int64)
+
+        num = len(self.plac)
+        schedule = np.zeros(num, dtype=np.int64)
+        self.occupancy = Occupancy(self.index.num_wards, self.index.num_weeks, self.index.num_parts)
+        self.occupancy.add_placements(
+            self.ward,
+            self.index.placement_weeks[self.plac],
+            self.index.placement_durations[self.plac],
+            self.index.placement_parts[self.plac],
+        )
+        self.checks = evaluator.placement_checks(schedule, self.plac, self.ward)
+        self.students = evaluator.student_variety(schedule, self.plac, self.ward)
+        # Moving placements between wards never changes which placements are assigned
+        self.all_assigned = evaluator.all_assigned(schedule, self.plac, np.array([num]), 1)
+        self.layout = self.build_layout(schedule)
+
+    def build_layout(self, schedule: np.ndarray) -> dict:
+        """
+        Function to group the confirmed placements by start week and student. These groups do
+        not change when placements move ward, so are shared between copies of the state.
+
+        :param schedule: array of zeros, one for each confirmed placement
+        :returns: dictionary of groupings of the confirmed placements
+        """
+        start_weeks = self.index.placement_weeks[self.plac]
+        by_week = {
+            int(week): np.flatnonzero(start_weeks == week) for week in np.unique(start_weeks)
+        }
+
+        student_of = self.students["student_of"]
+        by_student = np.split(
+            np.argsort(student_of, kind="stable"),
+            np.cumsum(np.bincount(student_of, minlength=len(self.students["schedule"])))[:-1],
+        )
+        return {
+            "schedule": schedule,
+            "position": np.arange(len(schedule)),
+            "sizes": np.array([len(schedule)]),
+            "by_week": by_week,
+            "by_student": by_student,
+        }
+
+    def matches(self, placement_indices: np.ndarray, ward_indices: np.ndarray) -> bool:
+        """
+        Function to check whether the state was built from (or has been moved to) the given placements and wards
+
+        :param placement_indices: array of the position of each confirmed placement within placements
+        :param ward_indices: array of the ward id each confirmed placement is assigned to
+        :returns: True if the state describes the same confirmed placements
+        """
+        return np.array_equal(self.plac, placement_indices) and np.array_equal(self.ward, ward_indices)
+
+    def copy(self) -> "FitnessState":
+        """
+        Function to produce a copy of the state which can be changed without affecting the original
+
+        :returns: FitnessState object
+        """
+        state = FitnessState.__new__(FitnessState)
+        state.evaluator = self.evaluator
+        state.index = self.index
+        state.plac = self.plac
+        state.ward = self.ward.copy()
+        state.occupancy = self.occupancy.copy()
+        state.checks = {key: value.copy() for key, value in self.checks.items()}
+        state.students = {
+            key: [matched.copy() for matched in value] if isinstance(value, list) else value
+            for key, value in self.students.items()
+        }
+        for key in ["uniq_wards", "uniq_deps", "deps_per_student"]:
+            state.students[key] = self.students[key].copy()
+        state.all_assigned = self.all_assigned
+        state.layout = self.layout
+        return state
+
+    def move(self, entry: int, ward_id: int):
+        """
+        Function to move a confirmed placement to a different ward, rechecking only the placements and student
+        affected by the move
+
+        :param entry: position of the placement within the schedule's confirmed placements
+        :param ward_id: id of the ward the placement is moved to
+        :returns: no explicit return but updates the state
+        """
+        old_ward_id = int(self.ward[entry])
+        if old_ward_id == ward_id:
+            return
+        index = self.index
+        placement_index = self.plac[entry]
+        week_index = int(index.placement_weeks[placement_index])
+        duration = int(index.placement_durations[placement_index])
+        part_index = index.placement_parts[placement_index]
+
+        self.occupancy.add(old_ward_id, week_index, duration, part_index, count=-1)
+        self.occupancy.add(ward_id, week_index, duration, part_index)
+        self.ward[entry] = ward_id
+
+        # Capacity is checked in a placement's first week, so recheck placements on either ward starting in
+        # any week whose counts changed
+        affected = [np.array([entry])]
+        for week in range(week_index, week_index + duration):
+            starting = self.layout["by_week"].get(week)
+            if starting is not None:
+                starting_wards = self.ward[starting]
+                affected.append(starting[(starting_wards == old_ward_id) | (starting_wards == ward_id)])
+        self.update_capacity(np.unique(np.concatenate(affected)))
+
+        self.checks["covid_incompatible"][entry] = (
+            index.placement_covid_low[placement_index] and index.ward_covid_high[ward_id]
+        )
+        # Only the student's own placements can be double booked with each other
+        student = self.students["student_of"][entry]
+        self.update_double_booked(self.layout["by_student"][student])
+        self.update_student(student)
+
+    def update_capacity(self, entries: np.ndarray):
+        """
+        Function to recheck ward capacity for some of the confirmed placements
+
+        :param entries: array of positions of the placements within the schedule's confirmed placements
+        :returns: no explicit return but updates the capacity checks
+        """
+        plac = self.plac[entries]
+        ward = self.ward[entries]
+        weeks = self.index.placement_weeks[plac]
+        # As in FitnessEvaluator.placement_checks, a placement starting after the end of the schedule has a
+        # count of 0
+        in_schedule = weeks < self.occupancy.totals.shape[1]
+        ward_count = np.zeros(len(entries), dtype=np.int64)
+        year_count = np.zeros(len(entries), dtype=np.int64)
+        ward_count[in_schedule] = self.occupancy.totals[ward[in_schedule], weeks[in_schedule]]
+        year_count[in_schedule] = self.occupancy.counts[
+            ward[in_schedule], weeks[in_schedule], self.index.placement_parts[plac][in_schedule]
+        ]
+        self.checks["ward_count"][entries] = ward_count
+        self.checks["year_count"][entries] = year_count
+        self.checks["within_capacity"][entries] = self.evaluator.within_capacity(
+            plac, ward, ward_count, year_count
+        )
+
+    def update_double_booked(self, group: np.ndarray):
+        """
+        Function to recheck double booking for the confirmed placements of one student
+
+        :param group: array of positions of the student's placements within the schedule's confirmed placements
+        :returns: no explicit return but updates the double booked checks
+        """
+        if len(group) > 1:
+            self.checks["double_booked"][group] = self.evaluator.find_double_booked(
+                np.zeros(len(group), dtype=np.int64), self.plac[group], self.ward[group]
+            )
+
+    def update_student(self, student: int):
+        """
+        Function to recount the unique wards and department words for a student, and whether they meet each
+        speciality goal
+
+        :param student: position of the student within the schedule's students
+        :returns: no explicit return but updates the student variety
+        """
+        index = self.index
+        student_index = self.students["student_index"][student]
+        wards = self.ward[self.layout["by_student"][student]]
+
+        history_wards = index.history_ward_tokens[
+            index.history_ward_ptr[student_index]:index.history_ward_ptr[student_index + 1]
+        ]
+        self.students["uniq_wards"][student] = len(
+            set(history_wards.tolist()) | set(index.ward_name_tokens[wards].tolist())
+        )
+
+        dep_tokens = np.concatenate(
+            [
+                index.history_dep_tokens[
+                    index.history_dep_ptr[student_index]:index.history_dep_ptr[student_index + 1]
+                ]
+            ]
+            + [
+                index.ward_dep_tokens[index.ward_dep_ptr[ward_id]:index.ward_dep_ptr[ward_id + 1]]
+                for ward_id in wards
+            ]
+        )
+        self.students["uniq_deps"][student] = len(set(dep_tokens.tolist()))
+        self.students["deps_per_student"][student] = len(dep_tokens)
+        for (matching_tokens, _), matched in zip(
+            self.evaluator.speciality_goals, self.students["speciality_matched"]
+        ):
+            matched[student] = matching_tokens[dep_tokens].any()
+
+    def result(self) -> dict:
+        """
+        Function to score the schedule from the current state
+
+        :returns: dictionary of fitness, viable, non_viable_reason and schedule_eval_scores for the schedule
+        """
+        return self.evaluator.build_results(
+            1,
+            self.layout["sizes"],
+            self.layout["schedule"],
+            self.layout["position"],
+            self.ward,
+            self.checks,
+            self.all_assigned,
+            self.students,
+        )[0]
@@ -1,12 +1,12 @@
-from xmlrpc.client import Boolean
 from src.Schedule import Schedule
-from operator import itemgetter
-from datetime import datetime
+from src.ProblemIndex import ProblemIndex
+from src.Params import Params
+from src.ScheduleExecutor import ScheduleExecutor
+from src.Selection import Selection
+from src.LocalSearch import LocalSearch
+from src.FitnessEvaluator import FitnessEvaluator
 import numpy as np
 import random
-import streamlit as st
-import yaml
-from random import randrange
 from typing import Tuple
 
 class GeneticAlgorithm:
@@ -22,6 +22,14 @@ class GeneticAlgorithm:
     :param placements: A list of all placements to be allocated
     :param number_of_schedules: Integer number of schedules to be produced (dictates the population size)
     :param num_weeks: Integer number of weeks that placements will take place over
+    :param schedule_no: Integer number of this run of the genetic algorithm
+    :param index: ProblemIndex of ward and placement information, built from the other inputs if not given
+    :param params: Params for the run, read from config/params.yml if not given
+    :param executor: ScheduleExecutor used to generate new schedules, created from params if not given
+    :param seed: Integer seed for all of the random numbers used by the run, drawn from the random module if not
+    given. It is kept as the seed attribute so the run can be repeated
+    :param warm_start: WarmStart of a previous schedule to seed the population from, with any locked placements kept
+    in every schedule. The population is generated at random if not given
     """
 
     def __init__(
@@ -31,7 +39,12 @@ class GeneticAlgorithm:
         placements: list,
         number_of_schedules: int,
         num_weeks: int,
-        schedule_no: int
+        schedule_no: int,
+        index: ProblemIndex = None,
+        params: Params = None,
+        executor: ScheduleExecutor = None,
+        seed: int = None,
+        warm_start: "WarmStart" = None,
     ):
         self.slots = slots
         self.wards = wards
@@ -40,57 +53,191 @@ class GeneticAlgorithm:
         self.num_weeks = num_weeks
         self.schedule_no = schedule_no
 
+        # Every random choice in the run comes from this generator
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        if index is None:
+            index = ProblemIndex(slots, wards, placements, num_weeks)
+        self.index = index
+
         self.schedules = []
         self.new_schedules = []
+        # Reports saved by this run, as (ScheduleReport, file name)
+        self.files = []
 
         self.iteration_count = 0
 
-        with open("config/params.yml") as f:
-            params = yaml.load(f, Loader=yaml.FullLoader)
+        if params is None:
+            params = Params.load()
+        self.params = params
+        ga_params = params.genetic_algorithm_params
 
         self.new_schedule_count = int(
-            self.number_of_schedules
-            * params["genetic_algorithm_params"]["new_schedule_prop"]
+            self.number_of_schedules * ga_params.new_schedule_prop
         )
 
-        self.mutation_probability = params["genetic_algorithm_params"][
-            "mutationProbability"
-        ]
-        self.recombination_probability = params["genetic_algorithm_params"][
-            "recombinationProbability"
-        ]
-        self.num_mutations = params["genetic_algorithm_params"][
-            "num_mutations"
-        ]  # Note that this is number of mutations per schedule
-        self.recomb_points = params["genetic_algorithm_params"]["recomb_points"]
-        self.max_no_change_iterations = params["genetic_algorithm_params"][
-            "max_no_change_iterations"
-        ]
-        self.fitness_threshold = params["genetic_algorithm_params"]["fitness_threshold"]
-        self.changed_protected_proportion = params["genetic_algorithm_params"][
-            "changed_protected_proportion"
-        ]
+        self.mutation_probability = ga_params.mutationProbability
+        self.recombination_probability = ga_params.recombinationProbability
+        self.num_mutations = ga_params.num_mutations  # Note that this is number of mutations per schedule
+        self.recomb_points = ga_params.recomb_points
+        self.max_no_change_iterations = ga_params.max_no_change_iterations
+        self.fitness_threshold = ga_params.fitness_threshold
+        self.changed_protected_proportion = ga_params.changed_protected_proportion
+        self.selection = Selection(ga_params.selection_method, ga_params.tournament_size)
+        self.warm_start = warm_start
+        self.warm_start_moves = ga_params.warm_start_moves
+        self.local_search = LocalSearch(
+            ga_params.local_search, ga_params.local_search_seconds, ga_params.local_search_moves
+        )
+
+        # Scoring data is shared between every schedule in the run
+        self.evaluator = FitnessEvaluator(self.index, params.schedule_params)
+        if executor is None:
+            executor = ScheduleExecutor(
+                self.slots,
+                self.wards,
+                self.placements,
+                self.num_weeks,
+                self.index,
+                self.params,
+                ga_params.workers,
+            )
+        self.executor = executor
 
         self.last_fitness = 0
         self.no_change_count = 0
+        # Position in schedules of the fittest schedule so far, which is never replaced
+        self.best_index = None
 
     def seed_schedules(self):
         """
         Function to initialise the first generation of schedules
         """
-        for i in range(0, self.number_of_schedules):
+        if self.warm_start is None:
+            self.schedules += self.generate_schedules(self.number_of_schedules)
+        else:
+            self.schedules += self.warm_start_schedules(self.number_of_schedules)
+        self.update_best(range(len(self.schedules)))
+
+    def warm_start_schedules(self, num_schedules: int) -> list:
+        """
+        Function to generate schedules from the warm start and score them together. Each keeps the previous ward of
+        every placement, with wards chosen at random for the placements which do not have one. All but the first
+        then have warm_start_moves placements moved by mutation, so the population is spread around the previous
+        schedule. Locked placements are never moved
+
+        :param num_schedules: the integer number of new schedules to be generated
+        :returns: list of dictionaries of new schedules and their fitness
+        """
+        new_schedules = []
+        for i in range(num_schedules):
             schedule_obj = Schedule(
-                self.slots, self.wards, self.placements, self.num_weeks
+                self.slots,
+                self.wards,
+                self.placements,
+                self.num_weeks,
+                self.index,
+                self.evaluator,
+                self.params,
             )
-            schedule_obj.schedule_generation()
-            schedule_obj.get_fitness()
-            self.schedules.append(
-                {
-                    "schedule": schedule_obj,
-                    "fitness": schedule_obj.fitness,
-                    "sched_id": randrange(9999)
-                }
+            schedule_obj.assign_wards(self.warm_start.genome)
+            schedule_obj.apply_locks(self.warm_start)
+            schedule_obj.schedule_generation(self.rng, np.flatnonzero(schedule_obj.genome < 0))
+            if i > 0 and self.warm_start_moves > 0:
+                schedule_obj = schedule_obj.mutation(self.warm_start_moves, self.rng)
+            new_schedules.append(schedule_obj)
+        self.score_schedules(new_schedules)
+        return [
+            {
+                "schedule": schedule_obj,
+                "fitness": schedule_obj.fitness,
+                "sched_id": self.rng.randrange(9999)
+            }
+            for schedule_obj in new_schedules
+        ]
+
+    def update_best(self, positions):
+        """
+        Function to check whether any of the given schedules is fitter than the best schedule so far
+
+        :param positions: iterable of the positions in schedules of new schedules
+        :returns: no explicit return but updates best_index class object
+        """
+        for position in positions:
+            if (
+                self.best_index is None
+                or self.schedules[position]["fitness"] > self.schedules[self.best_index]["fitness"]
+            ):
+                self.best_index = int(position)
+
+    @property
+    def best_schedule(self) -> dict:
+        """
+        The fittest schedule so far, with its fitness
+
+        :returns: dictionary of the schedule and its fitness
+        """
+        return self.schedules[self.best_index]
+
+    def generate_schedules(self, num_schedules: int) -> list:
+        """
+        Function to randomly generate new schedules and score them together
+
+        :param num_schedules: the integer number of new schedules to be generated
+        :returns: list of dictionaries of new schedules and their fitness
+        """
+        # Each schedule has its own seed so the schedules do not depend on how
+        # generation is split between processes
+        seeds = [self.rng.getrandbits(32) for i in range(0, num_schedules)]
+        new_schedules = []
+        for genome in self.executor.generate(seeds):
+            schedule_obj = Schedule(
+                self.slots,
+                self.wards,
+                self.placements,
+                self.num_weeks,
+                self.index,
+                self.evaluator,
+                self.params,
             )
+            schedule_obj.assign_wards(genome)
+            if self.warm_start is not None:
+                schedule_obj.apply_locks(self.warm_start)
+            new_schedules.append(schedule_obj)
+        self.score_schedules(new_schedules)
+        return [
+            {
+                "schedule": schedule_obj,
+                "fitness": schedule_obj.fitness,
+                "sched_id": self.rng.randrange(9999)
+            }
+            for schedule_obj in new_schedules
+        ]
+
+    def score_schedules(self, schedules: list):
+        """
+        Function to score a list of schedules in a single batch, looking up any which have been scored before
+
+        :param schedules: list of Schedule objects to be scored
+        :returns: no explicit return but updates the fitness of each schedule
+        """
+        cache = self.evaluator.cache
+        keys = [cache.key(schedule_obj.genome) for schedule_obj in schedules]
+        results = [cache.get(key) for key in keys]
+        unscored = [i for i, result in enumerate(results) if result is None]
+        placement_indices, ward_indices = [], []
+        for i in unscored:
+            schedule_placements, schedule_wards = schedules[i].fitness_inputs()
+            placement_indices.append(schedule_placements)
+            ward_indices.append(schedule_wards)
+        for i, result in zip(unscored, self.evaluator.evaluate_population(placement_indices, ward_indices)):
+            cache.put(keys[i], result)
+            results[i] = result
+        for schedule_obj, result in zip(schedules, results):
+            schedule_obj.set_fitness(result)
 
     def viable_schedule_check(self) -> Tuple[bool, object, list]:
         """
@@ -101,12 +248,15 @@ class GeneticAlgorithm:
         continue_eval = True
         schedule_fitnesses = []
         for schedule in self.schedules:
-            schedule["schedule"].populate_schedule()
+            #Only schedules changed since they were last scored need to be rebuilt, those carried
+            #over from the previous generation keep their fitness
+            if schedule["schedule"].dirty:
+                schedule["schedule"].populate_schedule()
             schedule_fitnesses.append(schedule["schedule"].fitness)
             if (schedule["schedule"].fitness > self.fitness_threshold) and (
                 schedule["schedule"].viable
             ):
-                schedule["schedule"].save_report(self.schedule_no)
+                self.save_report(schedule["schedule"])
                 continue_eval = False
                 return continue_eval, schedule["schedule"], schedule_fitnesses
         if continue_eval:
@@ -118,10 +268,8 @@ class GeneticAlgorithm:
 
         :returns: current count of iterations
         """
-        total_schedules = len(self.schedules)
-        if self.last_fitness < self.schedules[total_schedules - 1]["fitness"]:
-            now = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            self.last_fitness = self.schedules[total_schedules - 1]["fitness"]
+        if self.last_fitness < self.best_schedule["fitness"]:
+            self.last_fitness = self.best_schedule["fitness"]
             self.no_change_count = 0
         self.iteration_count += 1
         return self.iteration_count
@@ -132,21 +280,46 @@ class GeneticAlgorithm:
 
         :returns: bool to determine whether evaluation should continue and a schedule
         """
-        total_schedules = len(self.schedules)
+        best_schedule = self.best_schedule["schedule"]
         continue_eval = True
-        if self.last_fitness == self.schedules[total_schedules - 1]["fitness"]:
+        if self.last_fitness == self.best_schedule["fitness"]:
             self.no_change_count += 1
             if self.no_change_count >= self.max_no_change_iterations:
-                self.schedules[total_schedules - 1]["schedule"].populate_schedule()
-                self.schedules[total_schedules - 1]["schedule"].save_report(self.schedule_no)
-                self.schedules[total_schedules - 1]["schedule"].get_fitness()
+                if best_schedule.dirty:
+                    best_schedule.populate_schedule()
+                best_schedule = self.polish()
+                self.save_report(best_schedule)
                 continue_eval = False
-                return continue_eval, self.schedules[total_schedules - 1]["schedule"]
+                return continue_eval, best_schedule
 
         if continue_eval:
-            self.last_fitness = self.schedules[total_schedules - 1]["fitness"]
+            self.last_fitness = self.best_schedule["fitness"]
             return continue_eval, None
 
+    def polish(self) -> Schedule:
+        """
+        Function to improve the best schedule with local search once the population has stopped improving (see
+        LocalSearch and local_search in config/params.yml)
+
+        :returns: the best schedule, replaced in schedules by the polished schedule if it is fitter
+        """
+        best = self.best_schedule
+        polished = self.local_search.polish(best["schedule"], self.rng)
+        if polished is not best["schedule"]:
+            self.schedules[self.best_index] = {**best, "schedule": polished, "fitness": polished.fitness}
+            self.last_fitness = polished.fitness
+        return polished
+
+    def save_report(self, schedule_obj: Schedule):
+        """
+        Function to save down the report of a chosen schedule for this run
+
+        :param schedule_obj: the chosen Schedule object
+        :returns: no explicit return but adds the report and its file name to the files class object
+        """
+        schedule_obj.save_report(self.schedule_no)
+        self.files.append((schedule_obj.report, schedule_obj.file_name))
+
     def evaluate(self) -> Tuple[bool, object, float, int, list]:
         """
         Function to evaluate the fitness of the existing cohort of schedules
@@ -158,7 +331,7 @@ class GeneticAlgorithm:
             chosen_schedule,
             schedule_fitnesses,
         ) = self.viable_schedule_check()
-        download_files = Schedule.files
+        download_files = self.files
         iter_count = self.status_update()
         if continue_eval:
             continue_eval, chosen_schedule = self.no_change_check()
@@ -172,52 +345,37 @@ class GeneticAlgorithm:
         """
         Function to randomly determine which schedules should be mutated
 
-        :returns: no explicit return but populates new_schedules class object
+        :returns: no explicit return but adds the mutated schedules to new_schedules class object, after those
+        added by culling
         """
-        self.new_schedules = []
         # Mutate a proportion of the schedules
         for mutation_index in range(0, len(self.schedules) - 1):
-            if random.uniform(0, 1) <= self.mutation_probability:
+            if self.rng.uniform(0, 1) <= self.mutation_probability:
                 mutuated_schedule = self.schedules[mutation_index]["schedule"].mutation(
-                    self.num_mutations
+                    self.num_mutations, self.rng
                 )
                 self.new_schedules.append(
                     {
                         "schedule": mutuated_schedule,
                         "fitness": mutuated_schedule.fitness,
-                        "sched_id": randrange(9999),
+                        "sched_id": self.rng.randrange(9999),
                     }
                 )
 
-    def select_parents(self) -> int:
+    def select_parents(self) -> list:
         """
-        Function to use a roulette wheel approach (i.e. probability of selection is
-        proportional to fitness of schedule) to select parents for recombination
+        Function to select a partner for each schedule for recombination, using the selection method set in
+        config/params.yml (fitter schedules are more likely to be chosen, see Selection)
 
-        :returns: a list of schedules to be used as parents for recombination
+        :returns: a list of pairs of positions of schedules to be used as parents for recombination
         """
-        total_fitness = 0
-        population_size = len(self.schedules)
-        for schedule in self.schedules:
-            total_fitness += schedule["fitness"]
-
-        prob_selection = [i / total_fitness for i in range(population_size)]
-        cum_prob = np.cumsum(prob_selection)
-        select_indices = [random.random() for i in range(population_size)]
-        selected_parents = []
-
-        for parent_one_index in range(population_size):
-            for parent_two_index in range(population_size):
-                if (
-                    cum_prob[parent_two_index] < (select_indices[parent_one_index])
-                    and cum_prob[parent_two_index + 1]
-                    >= select_indices[parent_one_index]
-                ):
-                    pair = (parent_one_index, parent_two_index)
-                    if parent_one_index != parent_two_index:
-                        selected_parents.append(pair)
-
-        return selected_parents
+        fitnesses = np.array([schedule["fitness"] for schedule in self.schedules])
+        partners = self.selection.select(fitnesses, len(self.schedules), self.rng)
+        return [
+            (parent_one_index, int(parent_two_index))
+            for parent_one_index, parent_two_index in enumerate(partners)
+            if parent_one_index != parent_two_index
+        ]
 
     def generate_offspring(self, selected_parents: list):
         """
@@ -227,19 +385,20 @@ class GeneticAlgorithm:
         :returns: no explicit return but populates new_schedules class object with recombined schedules
         """
         for pair in selected_parents:
-            if random.uniform(0, 1) <= self.recombination_probability:
+            if self.rng.uniform(0, 1) <= self.recombination_probability:
                 offspring_schedules = self.schedules[pair[0]]["schedule"].recombination(
                     self.schedules[pair[1]]["schedule"],
                     int(np.round(self.num_weeks / self.recomb_points, 0)),
                     1,
+                    self.rng,
                 )
+                # Offspring are scored when they are populated in recombination
                 for schedule in offspring_schedules:
-                    schedule.get_fitness()
                     self.new_schedules.append(
                         {
                             "schedule": schedule,
                             "fitness": schedule.fitness,
-                            "sched_id": randrange(9999),
+                            "sched_id": self.rng.randrange(9999),
                         }
                     )
 
@@ -250,36 +409,32 @@ class GeneticAlgorithm:
         :param num_new_schedules: the integer number of new schedules to be generated/to be replaced in existing population
         :returns: no explicit return but populates new_schedules class object with newly generated schedules
         """
-        for i in range(0, num_new_schedules):
-            schedule_obj = Schedule(
-                self.slots, self.wards, self.placements, self.num_weeks
-            )
-            schedule_obj.schedule_generation()
-            schedule_obj.get_fitness()
-            self.new_schedules.append(
-                {
-                    "schedule": schedule_obj,
-                    "fitness": schedule_obj.fitness,
-                    "sched_id": randrange(9999)
-                }
-            )
+        self.new_schedules += self.generate_schedules(num_new_schedules)
 
     def update_population(self):
         """
-        Function to using mutated schedules and offspring, replace the least fit schedules
+        Function to replace the least fit schedules with the fittest of the mutated schedules, offspring and new
+        schedules. The top changed_protected_proportion of schedules, and always the best schedule so far, are kept.
+        The schedules to be replaced and their replacements are found with a partial sort (argpartition) rather
+        than sorting the whole population
 
         :returns: no explicit return but replaces lowest scoring schedules in schedules class object with newly generated ones
         """
-        self.schedules = sorted(self.schedules, key=itemgetter("fitness"))
-        # Update schedules of all but the top X %
-        for i in range(
-            0,
-            min(
-                len(self.new_schedules),
-                int(len(self.schedules) * (1 - self.changed_protected_proportion)),
-            ),
-        ):
-            self.schedules[i] = self.new_schedules[i]
+        num_replaced = min(
+            len(self.new_schedules),
+            int(len(self.schedules) * (1 - self.changed_protected_proportion)),
+            len(self.schedules) - 1,
+        )
+        if num_replaced <= 0:
+            return
+        fitnesses = np.array([schedule["fitness"] for schedule in self.schedules], dtype=np.float64)
+        fitnesses[self.best_index] = np.inf
+        replaced = np.argpartition(fitnesses, num_replaced - 1)[:num_replaced]
+        new_fitnesses = np.array([schedule["fitness"] for schedule in self.new_schedules], dtype=np.float64)
+        replacements = np.argpartition(-new_fitnesses, num_replaced - 1)[:num_replaced]
+        for position, replacement in zip(replaced, replacements):
+            self.schedules[position] = self.new_schedules[replacement]
+        self.update_best(replaced)
 
     def evolve(self) -> Tuple[bool, object, float, int, list]:
         """
@@ -287,6 +442,7 @@ class GeneticAlgorithm:
 
         :returns: bool to determine if evaluation should continue as well as details on best performing schedule
         """
+        # Culled, mutated and recombined schedules are all collected before any replace the population
         self.new_schedules = []
         self.culling(self.new_schedule_count)
         self.execute_mutation()
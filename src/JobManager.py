@@ -0,0 +1,73 @@
+import threading
+import time
+
+
+class JobManager:
+    """
+    The JobManager keeps the RunJob of each user session, so a page can find the job it started after it has been
+    rerun or refreshed. It is shared by every session of the app. Each session has at most one job, and starting a
+    new one replaces it. Jobs which stopped more than expiry_hours ago are removed, along with their output files.
+
+    :param expiry_hours: number of hours the results of a stopped job are kept for
+    """
+
+    def __init__(self, expiry_hours: float):
+        self.expiry_seconds = expiry_hours * 3600
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.jobs
+
+    def submit(self, key: str, job: "RunJob") -> "RunJob":
+        """
+        Function to start a job for a session, stopping and replacing any job it already has
+
+        :param key: string key of the session
+        :param job: RunJob which has not been started
+        :returns: the RunJob, started
+        """
+        self.remove(key)
+        with self.lock:
+            self.jobs[key] = job
+        self.prune()
+        return job.start()
+
+    def get(self, key: str) -> "RunJob":
+        """
+        Function to find the job of a session
+
+        :param key: string key of the session
+        :returns: RunJob, or None if the session has no job
+        """
+        self.prune()
+        with self.lock:
+            return self.jobs.get(key)
+
+    def remove(self, key: str):
+        """
+        Function to stop the job of a session and remove its output files
+
+        :param key: string key of the session
+        :returns: no explicit return but updates jobs class object
+        """
+        with self.lock:
+            job = self.jobs.pop(key, None)
+        if job is not None:
+            job.close()
+
+    def prune(self):
+        """
+        Function to remove the jobs which stopped more than expiry_hours ago
+
+        :returns: no explicit return but updates jobs class object
+        """
+        cutoff = time.time() - self.expiry_seconds
+        with self.lock:
+            expired = [
+                self.jobs.pop(key)
+                for key, job in list(self.jobs.items())
+                if job.finished is not None and job.finished < cutoff
+            ]
+        for job in expired:
+            job.close()
@@ -0,0 +1,212 @@
+import math
+import random
+import time
+import numpy as np
+from src.FitnessState import FitnessState
+
+
+class LocalSearch:
+    """
+    LocalSearch polishes the schedule chosen by a run of the genetic algorithm by trying single placement moves to
+    other wards the placement is eligible for. Each move is scored with a FitnessState, so only the placements and
+    student affected by the move are rechecked. The method is set by local_search in config/params.yml:
+    - hill_climbing: the placements are taken in a random order, and each is moved to whichever of its eligible
+      wards gives the highest fitness, if this is higher than its current ward. Passes are repeated until a whole
+      pass over every movable placement makes no improvement
+    - simulated_annealing: a placement and one of its eligible wards are picked at random, and the move is kept if
+      it raises the fitness, or with a probability which falls as the search goes on if it lowers it. The fittest
+      schedule found is kept
+    - none: the schedule is not changed
+
+    Only placements eligible for at least two wards can be moved, so there is always another ward to try. Placements
+    with no eligible ward, or only one, are left where they are (see Schedule.repair for moving ineligible
+    placements).
+
+    The search stops after max_moves moves have been scored or seconds seconds have passed, whichever is first. Only
+    the move budget is repeatable, so a search which runs out of time may give a different schedule each time.
+
+    :param method: string name of the local search method
+    :param seconds: float time budget in seconds
+    :param max_moves: integer number of moves which can be scored
+    :param start_temperature: float temperature of simulated annealing at the start of the search, as a change in
+    fitness
+    :param end_temperature: float temperature of simulated annealing at the end of the search
+    :raises ValueError: if the method is not recognised
+    """
+
+    methods = ("none", "hill_climbing", "simulated_annealing")
+
+    def __init__(
+        self,
+        method: str = "none",
+        seconds: float = 10,
+        max_moves: int = 5000,
+        start_temperature: float = 0.001,
+        end_temperature: float = 0.00001,
+    ):
+        if method not in self.methods:
+            raise ValueError(
+                f"Unknown local search method {method}, expected one of {', '.join(self.methods)}"
+            )
+        self.method = method
+        self.seconds = seconds
+        self.max_moves = max_moves
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.stats = None
+
+    def polish(self, schedule: "Schedule", rng: random.Random = random) -> "Schedule":
+        """
+        Function to improve a schedule with the local search method
+
+        :param schedule: scored Schedule object to start from, which is not changed
+        :param rng: random number generator used to choose the moves (the random module if not given)
+        :returns: new scored Schedule object if a fitter schedule was found, otherwise the schedule given. Details
+        of the search are kept in the stats class object
+        """
+        self.stats = {"method": self.method, "moves": 0, "improved_moves": 0, "seconds": 0.0,
+                      "start_fitness": float(schedule.fitness), "fitness": float(schedule.fitness)}
+        if self.method == "none" or self.max_moves <= 0:
+            return schedule
+        start = time.perf_counter()
+        placement_indices, ward_indices = schedule.fitness_inputs()
+        state = FitnessState(schedule.evaluator, placement_indices, ward_indices)
+        eligible_ward_ids = schedule.index.eligible_ward_ids
+        movable = np.array([len(eligible_ward_ids[placement_index]) >= 2 for placement_index in placement_indices],
+                           dtype=bool)
+        if schedule.locked is not None:
+            movable &= ~schedule.locked[placement_indices]
+        entries = np.flatnonzero(movable)
+        if len(entries) == 0:
+            return schedule
+        deadline = start + self.seconds
+        best_ward = getattr(self, self.method)(state, entries, eligible_ward_ids, schedule.fitness, deadline, rng)
+        self.stats["seconds"] = time.perf_counter() - start
+        if best_ward is None:
+            return schedule
+
+        genome = schedule.genome.copy()
+        genome[placement_indices] = best_ward
+        polished = schedule.child(genome)
+        result = state.result() if np.array_equal(state.ward, best_ward) else schedule.evaluator.evaluate(
+            placement_indices, best_ward
+        )
+        schedule.evaluator.cache.put(schedule.evaluator.cache.key(genome), result)
+        polished.set_fitness(result)
+        self.stats["fitness"] = float(polished.fitness)
+        return polished
+
+    def within_budget(self, deadline: float) -> bool:
+        """
+        Function to check whether the search can score another move
+
+        :param deadline: time.perf_counter time the search must finish by
+        :returns: bool, False once max_moves moves have been scored or the deadline has passed
+        """
+        return self.stats["moves"] < self.max_moves and time.perf_counter() < deadline
+
+    def try_move(self, state: FitnessState, entry: int, ward_id: int) -> float:
+        """
+        Function to move a placement in the fitness state and score the result
+
+        :param state: FitnessState of the schedule being searched
+        :param entry: position of the placement within the schedule's confirmed placements
+        :param ward_id: id of the ward the placement is moved to
+        :returns: float fitness of the schedule after the move
+        """
+        state.move(entry, ward_id)
+        self.stats["moves"] += 1
+        return state.result()["fitness"]
+
+    def hill_climbing(
+        self,
+        state: FitnessState,
+        entries: np.ndarray,
+        eligible_ward_ids: list,
+        fitness: float,
+        deadline: float,
+        rng: random.Random,
+    ) -> np.ndarray:
+        """
+        Function to search by moving each placement in turn, in a random order, to its best eligible ward, until
+        a whole pass makes no improvement
+
+        :param state: FitnessState of the schedule, moved to the fittest schedule found
+        :param entries: array of the positions of the placements which can be moved
+        :param eligible_ward_ids: list of arrays of the wards each placement is eligible for
+        :param fitness: float fitness of the schedule
+        :param deadline: time.perf_counter time the search must finish by
+        :param rng: random number generator used to choose the order of the placements
+        :returns: array of the ward of each confirmed placement in the fittest schedule found, None if no fitter
+        schedule was found
+        """
+        improved = False
+        pass_improved = True
+        while pass_improved and self.within_budget(deadline):
+            pass_improved = False
+            order = [int(entry) for entry in entries]
+            rng.shuffle(order)
+            for entry in order:
+                if not self.within_budget(deadline):
+                    break
+                current_ward = int(state.ward[entry])
+                best_fitness, best_ward = fitness, current_ward
+                for ward_id in eligible_ward_ids[state.plac[entry]]:
+                    if not self.within_budget(deadline):
+                        break
+                    if ward_id == current_ward:
+                        continue
+                    move_fitness = self.try_move(state, entry, int(ward_id))
+                    if move_fitness > best_fitness:
+                        best_fitness, best_ward = move_fitness, int(ward_id)
+                state.move(entry, best_ward)
+                if best_ward != current_ward:
+                    fitness = best_fitness
+                    improved = pass_improved = True
+                    self.stats["improved_moves"] += 1
+        return state.ward.copy() if improved else None
+
+    def simulated_annealing(
+        self,
+        state: FitnessState,
+        entries: np.ndarray,
+        eligible_ward_ids: list,
+        fitness: float,
+        deadline: float,
+        rng: random.Random,
+    ) -> np.ndarray:
+        """
+        Function to search by moving randomly chosen placements to randomly chosen eligible wards, keeping moves
+        which lower the fitness with a probability that falls as the temperature is lowered
+
+        :param state: FitnessState of the schedule, left at the last schedule accepted
+        :param entries: array of the positions of the placements which can be moved
+        :param eligible_ward_ids: list of arrays of the wards each placement is eligible for
+        :param fitness: float fitness of the schedule
+        :param deadline: time.perf_counter time the search must finish by
+        :param rng: random number generator used to choose the moves and whether to keep them
+        :returns: array of the ward of each confirmed placement in the fittest schedule found, None if no fitter
+        schedule was found
+        """
+        best_fitness, best_ward = fitness, None
+        # The temperature falls geometrically with the number of moves, so the search is repeatable for a seed
+        cooling = (self.end_temperature / self.start_temperature) ** (1 / self.max_moves)
+        temperature = self.start_temperature
+        while self.within_budget(deadline):
+            entry = int(entries[rng.randrange(len(entries))])
+            current_ward = int(state.ward[entry])
+            # Every movable placement has at least one eligible ward other than its current one
+            wards = eligible_ward_ids[state.plac[entry]]
+            wards = wards[wards != current_ward]
+            ward_id = int(wards[rng.randrange(len(wards))])
+            temperature *= cooling
+            move_fitness = self.try_move(state, entry, ward_id)
+            change = move_fitness - fitness
+            if change >= 0 or rng.random() < math.exp(change / temperature):
+                fitness = move_fitness
+                if fitness > best_fitness:
+                    best_fitness, best_ward = fitness, state.ward.copy()
+                    self.stats["improved_moves"] += 1
+            else:
+                state.move(entry, current_ward)
+        return best_ward
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class Occupancy:
+    """
+    Occupancy holds a count of the students placed on each ward in each week of the schedule, split by the
+    year-part of their placement. It replaces scanning lists of placements for each slot, so that overall and
+    year-specific capacity checks become array lookups.
+
+    :param num_wards: integer number of wards that placements can be assigned to
+    :param num_weeks: integer number of weeks covered by the schedule
+    :param num_parts: integer number of distinct placement parts (e.g. "Year 1") being allocated
+    """
+
+    def __init__(self, num_wards: int, num_weeks: int, num_parts: int):
+        self.counts = np.zeros((num_wards, num_weeks, num_parts), dtype=np.int32)
+        self.totals = np.zeros((num_wards, num_weeks), dtype=np.int32)
+
+    def add(self, ward_id: int, week_index: int, duration: int, part_index: int, count: int = 1):
+        """
+        Function to record a placement on a ward for each week of its duration
+
+        :param ward_id: id of the ward as per original data
+        :param week_index: position of the first week of the placement within the ward's weeks
+        :param duration: integer number of weeks the placement lasts
+        :param part_index: index of the placement's year-part
+        :param count: number of students to add (negative to remove)
+        :returns: no explicit return but updates counts and totals class objects
+        """
+        self.counts[ward_id, week_index:week_index + duration, part_index] += count
+        self.totals[ward_id, week_index:week_index + duration] += count
+
+    def add_placements(
+        self,
+        ward_ids: np.ndarray,
+        week_indices: np.ndarray,
+        durations: np.ndarray,
+        part_indices: np.ndarray,
+    ):
+        """
+        Function to record many placements at once, for each week of their duration
+
+        :param ward_ids: array of ward ids as per original data
+        :param week_indices: array of the positions of the first week of each placement within the ward's weeks
+        :param durations: array of the integer number of weeks each placement lasts
+        :param part_indices: array of the index of each placement's year-part
+        :returns: no explicit return but updates counts and totals class objects
+        """
+        covered = np.repeat(np.arange(len(ward_ids)), durations)
+        weeks = week_indices[covered] + (
+            np.arange(len(covered)) - np.repeat(np.cumsum(durations) - durations, durations)
+        )
+        in_schedule = weeks < self.totals.shape[1]
+        covered = covered[in_schedule]
+        weeks = weeks[in_schedule]
+        np.add.at(self.counts, (ward_ids[covered], weeks, part_indices[covered]), 1)
+        np.add.at(self.totals, (ward_ids[covered], weeks), 1)
+
+    def wards_with_capacity(
+        self,
+        week_index: int,
+        duration: int,
+        part_index: int,
+        capacities: np.ndarray,
+        year_caps: np.ndarray,
+        ward_ids: np.ndarray = None,
+    ) -> np.ndarray:
+        """
+        Function to check wards at once for whether they can take one more student of the given year-part
+        in every week of a placement
+
+        :param week_index: position of the first week of the placement within the ward's weeks
+        :param duration: integer number of weeks the placement lasts
+        :param part_index: index of the placement's year-part
+        :param capacities: array of the overall capacity of each ward checked
+        :param year_caps: array of each checked ward's capacity for the placement's year-part
+        :param ward_ids: optional array of the ids of the wards to check, otherwise every ward is checked
+        :returns: boolean array which is True for wards where neither capacity would be breached
+        """
+        if duration <= 0:
+            return np.ones(len(capacities), dtype=bool)
+        weeks = slice(week_index, week_index + duration)
+        if ward_ids is None:
+            ward_ids = slice(None)
+        return (self.totals[ward_ids, weeks].max(axis=1) < capacities) & (
+            self.counts[ward_ids, weeks, part_index].max(axis=1) < year_caps
+        )
+
+    def copy(self) -> "Occupancy":
+        """
+        Function to produce an independent copy of the occupancy
+
+        :returns: Occupancy object with copied counts
+        """
+        occupancy = Occupancy.__new__(Occupancy)
+        occupancy.counts = self.counts.copy()
+        occupancy.totals = self.totals.copy()
+        return occupancy
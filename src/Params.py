@@ -0,0 +1,162 @@
+from dataclasses import dataclass, fields, replace
+import yaml
+
+
+@dataclass(frozen=True)
+class UIParams:
+    """ Parameters for the user interface, see ui_params in config/params.yml """
+
+    numberOfChromosomes: int
+    run_workers: int
+    report_store_mb: float
+    progress_interval: float
+    job_expiry_hours: float
+
+
+@dataclass(frozen=True)
+class ScheduleParams:
+    """ Parameters related to scoring of schedules, see schedule_params in config/params.yml """
+
+    within_capacity_scoring_factor: float
+    double_booked_scoring_factor: float
+    correct_num_wards_scoring_factor: float
+    uniq_departments_scoring_factor: float
+    uniq_wards_scoring_factor: float
+    all_placements_assigned_scoring_factor: float
+    capacity_utilisation_scoring_factor: float
+    delta_fitness: bool
+    fitness_cache_mb: float
+    medical_placement_check: bool
+    medical_placement_scoring_factor: float
+    surgical_placement_check: bool
+    surgical_placement_scoring_factor: float
+    community_placement_check: bool
+    community_placement_scoring_factor: float
+    critical_care_placement_check: bool
+    critical_care_placement_scoring_factor: float
+
+
+@dataclass(frozen=True)
+class GeneticAlgorithmParams:
+    """ Parameters relating to the genetic algorithm, see genetic_algorithm_params in config/params.yml """
+
+    mutationProbability: float
+    recombinationProbability: float
+    num_mutations: int
+    recomb_points: int
+    max_no_change_iterations: int
+    fitness_threshold: float
+    changed_protected_proportion: float
+    new_schedule_prop: float
+    workers: int
+    selection_method: str
+    tournament_size: int
+    warm_start_moves: int
+    repair_offspring: bool
+    local_search: str
+    local_search_seconds: float
+    local_search_moves: int
+
+
+@dataclass(frozen=True)
+class Params:
+    """
+    Params holds every setting from config/params.yml. It is loaded once for a run and passed to the objects that
+    need it, rather than each one reading the file. It cannot be changed once created, but override produces a
+    copy with some values replaced, so runs can be configured without editing the file.
+
+    :param ui_params: UIParams for the user interface
+    :param schedule_params: ScheduleParams for scoring schedules
+    :param genetic_algorithm_params: GeneticAlgorithmParams for the genetic algorithm
+    """
+
+    ui_params: UIParams
+    schedule_params: ScheduleParams
+    genetic_algorithm_params: GeneticAlgorithmParams
+
+    @classmethod
+    def load(cls, filename: str = "config/params.yml", overrides: dict = None) -> "Params":
+        """
+        Function to read the parameters from a yaml file
+
+        :param filename: path of the yaml file to be read
+        :param overrides: optional dictionary of sections, each a dictionary of values to replace those in the
+        file, e.g. {"genetic_algorithm_params": {"mutationProbability": 0.2}}
+        :returns: Params object
+        """
+        with open(filename) as f:
+            params = yaml.load(f, Loader=yaml.FullLoader)
+        return cls.from_dict(params).override(overrides or {})
+
+    @classmethod
+    def from_dict(cls, params: dict) -> "Params":
+        """
+        Function to create the parameters from a dictionary laid out as in config/params.yml
+
+        :param params: dictionary of sections, each a dictionary of parameter values
+        :returns: Params object
+        """
+        sections = {}
+        for section in fields(cls):
+            values = params[section.name]
+            sections[section.name] = section.type(
+                **{
+                    value.name: cls.convert(section.name, value, values[value.name])
+                    for value in fields(section.type)
+                }
+            )
+        return cls(**sections)
+
+    def override(self, overrides: dict) -> "Params":
+        """
+        Function to produce a copy of the parameters with some values replaced
+
+        :param overrides: dictionary of sections, each a dictionary of values to be replaced,
+        e.g. {"schedule_params": {"delta_fitness": False}}
+        :returns: new Params object
+        :raises KeyError: if a section or parameter name is not recognised
+        """
+        sections = {}
+        for section_name, values in overrides.items():
+            if section_name not in {section.name for section in fields(self)}:
+                raise KeyError(f"Unknown parameter section {section_name}")
+            section = getattr(self, section_name)
+            section_fields = {value.name: value for value in fields(section)}
+            for name in values:
+                if name not in section_fields:
+                    raise KeyError(f"Unknown parameter {section_name}.{name}")
+            sections[section_name] = replace(
+                section,
+                **{
+                    name: self.convert(section_name, section_fields[name], value)
+                    for name, value in values.items()
+                },
+            )
+        return replace(self, **sections)
+
+    @staticmethod
+    def convert(section_name: str, field: "Field", value):
+        """
+        Function to check a parameter value has the type expected
+
+        :param section_name: name of the section the parameter belongs to
+        :param field: dataclass field describing the parameter
+        :param value: value to be checked
+        :returns: value as the expected type
+        :raises TypeError: if the value is not of the expected type
+        """
+        if field.type is bool:
+            if not isinstance(value, bool):
+                raise TypeError(f"{section_name}.{field.name} must be True or False, not {value!r}")
+            return value
+        if field.type is str:
+            if not isinstance(value, str):
+                raise TypeError(f"{section_name}.{field.name} must be text, not {value!r}")
+            return value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"{section_name}.{field.name} must be a number, not {value!r}")
+        if field.type is int:
+            if value != int(value):
+                raise TypeError(f"{section_name}.{field.name} must be a whole number, not {value!r}")
+            return int(value)
+        return value
@@ -0,0 +1,182 @@
+import numpy as np
+
+
+class ProblemIndex:
+    """
+    The ProblemIndex holds everything about the wards and placements which does not change during a run, as
+    integer and boolean arrays. It is built once from the output of DataLoader.preprocData and shared by every
+    Schedule, the GeneticAlgorithm and the fitness scoring, so the string handling of ward and department
+    histories, year-specific capacities and eligibility rules is only done once. The arrays are read-only.
+
+    :param slots: A list of Slot objects for placements on wards to be assigned into
+    :param wards: A list of Ward objects where placements can take place
+    :param placements: A list of Placement objects to be assigned
+    :param num_weeks: An integer number of the length of time that placements need to be allocated for
+    """
+
+    def __init__(self, slots: list, wards: list, placements: list, num_weeks: int):
+        self.num_slots = len(slots)
+        self.num_wards = len(wards)
+        self.num_placements = len(placements)
+        self.num_weeks = num_weeks
+
+        # Ward information
+        self.parts = sorted({p.part for p in placements})
+        self.num_parts = len(self.parts)
+        self.part_indices = {part: i for i, part in enumerate(self.parts)}
+        self.ward_capacities = np.array([ward.capacity for ward in wards], dtype=float)
+        self.ward_covid_high = np.array(
+            [ward.covid_status == "Medium/High" for ward in wards], dtype=bool
+        )
+        self.ward_year_caps = np.array(
+            [[self.id_year_capacity(ward, part) for part in self.parts] for ward in wards],
+            dtype=float,
+        ).reshape(self.num_wards, self.num_parts)
+
+        # Placement information
+        self.placement_parts = np.array(
+            [self.part_indices[p.part] for p in placements], dtype=np.int64
+        )
+        self.placement_weeks = np.array([int(p.start + 1) for p in placements], dtype=np.int64)
+        self.placement_durations = np.array([int(p.duration) for p in placements], dtype=np.int64)
+        self.placement_covid_low = np.array(
+            [p.covid_status == "Low/Medium" for p in placements], dtype=bool
+        )
+
+        # Wards each placement could be assigned to, before considering occupancy
+        placement_nurse_assoc = np.array([bool(p.nurse_assoc) for p in placements], dtype=bool)
+        placement_driver = np.array([bool(p.is_driver) for p in placements], dtype=bool)
+        ward_nurse_assoc_capacity = np.array(
+            [ward.nurse_assoc_capacity for ward in wards], dtype=float
+        )
+        ward_need_to_drive = np.array([bool(ward.need_to_drive) for ward in wards], dtype=bool)
+        self.eligible = (
+            (self.ward_year_caps[:, self.placement_parts].T != 0)
+            & ~(placement_nurse_assoc[:, None] & (ward_nurse_assoc_capacity == 0)[None, :])
+            & ~(~placement_driver[:, None] & ward_need_to_drive[None, :])
+            & ~(self.placement_covid_low[:, None] & self.ward_covid_high[None, :])
+        ).reshape(self.num_placements, self.num_wards)
+        self.eligible_ward_ids = [np.flatnonzero(row) for row in self.eligible]
+
+        # Students are identified by the start of the placement name, with ward and department
+        # history taken from their first placement
+        student_indices = {}
+        first_placements = []
+        self.placement_students = np.zeros(len(placements), dtype=np.int64)
+        for i, p in enumerate(placements):
+            nurse_name = p.name.split("_", maxsplit=1)[0]
+            if nurse_name not in student_indices:
+                student_indices[nurse_name] = len(student_indices)
+                first_placements.append(p)
+            self.placement_students[i] = student_indices[nurse_name]
+        self.num_students = len(student_indices)
+
+        # Ward names and department words are converted to integer tokens
+        ward_vocab = {}
+        self.ward_name_tokens = np.array(
+            [self.token(ward_vocab, ward.ward) for ward in wards], dtype=np.int64
+        )
+        self.history_ward_ptr, self.history_ward_tokens = self.token_lists(
+            ward_vocab, [p.wardhistory.split(", ") for p in first_placements]
+        )
+        self.ward_vocab_size = len(ward_vocab)
+
+        dep_vocab = {}
+        self.ward_dep_ptr, self.ward_dep_tokens = self.token_lists(
+            dep_vocab, [self.clean_departments(ward.department) for ward in wards]
+        )
+        self.history_dep_ptr, self.history_dep_tokens = self.token_lists(
+            dep_vocab, [self.clean_departments(p.dephistory) for p in first_placements]
+        )
+        self.dep_words = list(dep_vocab)
+        self.dep_vocab_size = len(dep_vocab)
+
+        for value in vars(self).values():
+            for array in value if isinstance(value, list) else [value]:
+                if isinstance(array, np.ndarray):
+                    array.setflags(write=False)
+
+    @staticmethod
+    def id_year_capacity(ward: "ward", part: str) -> int:
+        """
+        Function to identify the year-specific capacity of a ward for a placement part
+
+        :param ward: the ward object
+        :param part: the placement part (e.g. "Year 1")
+        :returns: capacity for the specific type of placement and ward
+        """
+        if part == "Year 1":
+            return ward.p1_capacity
+        elif part == "Year 2":
+            return ward.p2_capacity
+        elif part == "Year 3":
+            return ward.p3_capacity
+        return ward.capacity
+
+    @staticmethod
+    def clean_departments(output_string: str) -> list:
+        """
+        Function to clean up a list of department names for analysis. Removes some non-required words.
+
+        :params output_string: the string to be cleaned, containing multiple department names
+        :returns: a clean list of individual words seen in original string
+        """
+        replace_dict = {
+            ",": "",
+            "and": "",
+            "the": "",
+            "of": "",
+            "eneral": "general",
+            "None": "",
+            "-": "",
+            "\xa0": " ",
+            "  ": " ",
+        }
+        for word, replacement in replace_dict.items():
+            output_string = output_string.replace(word, replacement)
+        output_string = output_string.lower()
+        output_list = output_string.split(" ")
+        return output_list
+
+    @staticmethod
+    def token(vocab: dict, word: str) -> int:
+        """
+        Function to look up the integer token for a word, adding it to the vocabulary if it is new
+
+        :param vocab: dictionary of words to tokens
+        :param word: the word to be converted
+        :returns: integer token for the word
+        """
+        return vocab.setdefault(word, len(vocab))
+
+    @classmethod
+    def token_lists(cls, vocab: dict, word_lists: list) -> tuple:
+        """
+        Function to convert lists of words into a flat array of tokens, with pointers to where each list starts
+
+        :param vocab: dictionary of words to tokens
+        :param word_lists: list of lists of words
+        :returns: array of start positions (with a final end position) and the flat array of tokens
+        """
+        lengths = [len(words) for words in word_lists]
+        ptr = np.zeros(len(word_lists) + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum(lengths)
+        tokens = np.array(
+            [cls.token(vocab, word) for words in word_lists for word in words], dtype=np.int64
+        )
+        return ptr, tokens
+
+    @staticmethod
+    def expand(ptr: np.ndarray, tokens: np.ndarray, owners: np.ndarray) -> tuple:
+        """
+        Function to gather the token lists belonging to a set of owners (e.g. wards or students)
+
+        :param ptr: array of start positions of each owner's tokens
+        :param tokens: flat array of tokens
+        :param owners: array of owner indices to gather the tokens of
+        :returns: array of the position in owners that each gathered token came from, and the gathered tokens
+        """
+        lengths = ptr[owners + 1] - ptr[owners]
+        source = np.repeat(np.arange(len(owners)), lengths)
+        offsets = np.arange(len(source)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return source, tokens[ptr[owners][source] + offsets]
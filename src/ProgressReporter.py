@@ -0,0 +1,63 @@
+import time
+import pandas as pd
+
+
+class ProgressReporter:
+    """
+    The ProgressReporter receives the progress updates from the runs of the genetic algorithm, each with a summary
+    of the fitness of the population, and keeps the history of each run. So that showing progress does not slow the
+    runs down, the display is only redrawn when at least interval seconds have passed since it was last redrawn.
+
+    :param redraw: function called with the ProgressReporter when the display should be redrawn, not needed if the
+    display reads the history itself (e.g. when the runs are in the background)
+    :param interval: minimum number of seconds between redraws
+    """
+
+    def __init__(self, redraw=None, interval: float = 1.0):
+        self.redraw = redraw
+        self.interval = interval
+        self.last_redraw = None
+        # Run number: details of the latest progress update, for runs which have not finished
+        self.latest = {}
+        # Run number: list of the fitness summary at each iteration
+        self.history = {}
+        self.latest_run = None
+
+    def __call__(self, details: dict):
+        """
+        Function to record a progress update, redrawing the display if it is due
+
+        :param details: dictionary of the run number, iteration, highest fitness and fitness_summary
+        :returns: no explicit return but updates latest and history class objects
+        """
+        run_no = details["run_no"]
+        self.latest[run_no] = details
+        self.latest_run = run_no
+        self.history.setdefault(run_no, []).append({"iteration": details["iteration"], **details["fitness_summary"]})
+        if self.redraw is None:
+            return
+        now = time.monotonic()
+        if self.last_redraw is None or now - self.last_redraw >= self.interval:
+            self.last_redraw = now
+            self.redraw(self)
+
+    def finish(self, run_no: int):
+        """
+        Function to stop showing a run as in progress, once it has finished
+
+        :param run_no: integer number of the run
+        :returns: no explicit return but updates latest class object
+        """
+        self.latest.pop(run_no, None)
+
+    def history_frame(self, run_no: int) -> pd.DataFrame:
+        """
+        Function to produce a table of the fitness summary at each iteration of a run, for charting
+
+        :param run_no: integer number of the run
+        :returns: dataframe indexed by iteration with a column for each part of the fitness summary
+        """
+        history = self.history.get(run_no)
+        if not history:
+            return pd.DataFrame()
+        return pd.DataFrame(history).set_index("iteration")
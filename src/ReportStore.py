@@ -0,0 +1,198 @@
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+import zipfile
+from collections import OrderedDict
+
+
+class ReportStore:
+    """
+    The ReportStore keeps the files produced for one user session (the schedule reports of each run and the
+    schedule comparison) in a temporary directory rather than in memory, so they can be downloaded by reading them
+    back from disk. Schedule reports are written to disk as soon as they are added, as pickled ScheduleReport
+    objects, and their workbook is only built when they are first read, when it replaces the pickled report. When
+    the files kept go over the size budget (measured by their size on disk), the oldest are removed first. The
+    directory is removed when the store is closed or no longer used.
+
+    :param max_mb: size budget in megabytes for the files kept
+    :param directory: directory the temporary directory is created in, the system default if not given
+    """
+
+    def __init__(self, max_mb: float, directory: str = None):
+        self.max_bytes = int(max_mb * 2**20)
+        self.directory = tempfile.mkdtemp(prefix="placement_reports_", dir=directory)
+        self._remove_directory = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        # File name: (path on disk, whether it holds a pickled report whose workbook is not built yet, size in bytes)
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.evicted = []
+        self.lock = threading.RLock()
+        self.count = 0
+
+    def __contains__(self, file_name: str) -> bool:
+        return file_name in self.entries
+
+    def __enter__(self) -> "ReportStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def names(self) -> list:
+        """
+        Function to list the files kept, oldest first
+
+        :returns: list of file names
+        """
+        with self.lock:
+            return list(self.entries)
+
+    def add(self, file_name: str, report):
+        """
+        Function to keep a file, replacing any kept with the same name
+
+        :param file_name: name of the file as downloaded
+        :param report: bytes of the file, or a ScheduleReport whose workbook is built when the file is first read
+        :returns: no explicit return but updates entries class object, removing the oldest files if over budget
+        """
+        with self.lock:
+            self.remove(file_name)
+            if isinstance(report, bytes):
+                path = self.write(report)
+                self.entries[file_name] = (path, False, len(report))
+            else:
+                path = self.write(pickle.dumps(report, protocol=pickle.HIGHEST_PROTOCOL))
+                self.entries[file_name] = (path, True, os.path.getsize(path))
+            self.used_bytes += self.entries[file_name][2]
+            self.evict(keep=file_name)
+
+    def write(self, content: bytes) -> str:
+        """
+        Function to write a file's contents into the store's directory
+
+        :param content: bytes of the file
+        :returns: path of the file written
+        """
+        self.count += 1
+        path = os.path.join(self.directory, f"{self.count}.bin")
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def path(self, file_name: str) -> str:
+        """
+        Function to find a file on disk, building and writing a report's workbook if this has not been done yet
+
+        :param file_name: name of the file
+        :returns: path of the file
+        :raises KeyError: if the file is not kept, e.g. it has been removed to stay within the size budget
+        """
+        with self.lock:
+            if file_name not in self.entries:
+                raise KeyError(f"{file_name} is no longer available")
+            path, pending, size = self.entries[file_name]
+            if pending:
+                with open(path, "rb") as file:
+                    report = pickle.load(file)
+                os.remove(path)
+                content = report.content
+                path = self.write(content)
+                self.entries[file_name] = (path, False, len(content))
+                self.used_bytes += len(content) - size
+                self.evict(keep=file_name)
+            return path
+
+    def open(self, file_name: str):
+        """
+        Function to open a file for reading, so it can be streamed from disk
+
+        :param file_name: name of the file
+        :returns: binary file object, to be closed by the caller
+        """
+        return open(self.path(file_name), "rb")
+
+    def read(self, file_name: str) -> bytes:
+        """
+        Function to read the contents of a file
+
+        :param file_name: name of the file
+        :returns: bytes of the file
+        """
+        with self.open(file_name) as file:
+            return file.read()
+
+    def bundle(self, file_names: list = None):
+        """
+        Function to produce a zip file of several files, each read from disk as it is added. The zip is written to
+        a temporary file in the store's directory rather than built in memory, and the file is deleted once closed
+
+        :param file_names: list of names of the files to include, every file kept if not given. Files which are no
+        longer kept are left out
+        :returns: binary file object of the zip file, positioned at its start, to be closed by the caller
+        """
+        with self.lock:
+            if file_names is None:
+                file_names = self.names()
+            # Unbuffered, so it can be read by anything which accepts raw binary files (e.g. st.download_button)
+            bundle_file = tempfile.TemporaryFile(dir=self.directory, buffering=0)
+            with zipfile.ZipFile(bundle_file, "w", zipfile.ZIP_DEFLATED) as bundle:
+                for file_name in file_names:
+                    if file_name in self.entries:
+                        bundle.write(self.path(file_name), arcname=file_name)
+            bundle_file.seek(0)
+            return bundle_file
+
+    def remove(self, file_name: str):
+        """
+        Function to stop keeping a file, deleting it from disk
+
+        :param file_name: name of the file
+        :returns: no explicit return but updates entries class object
+        """
+        with self.lock:
+            if file_name not in self.entries:
+                return
+            path, _, size = self.entries.pop(file_name)
+            self.used_bytes -= size
+            if os.path.exists(path):
+                os.remove(path)
+
+    def evict(self, keep: str = None):
+        """
+        Function to remove the oldest files until the files kept are within the size budget
+
+        :param keep: name of a file which is not to be removed, even if it is over the budget on its own
+        :returns: no explicit return but updates entries and evicted class objects
+        """
+        with self.lock:
+            for file_name in list(self.entries):
+                if self.used_bytes <= self.max_bytes:
+                    break
+                if file_name == keep:
+                    continue
+                self.remove(file_name)
+                self.evicted.append(file_name)
+
+    def clear(self):
+        """
+        Function to remove every file kept
+
+        :returns: no explicit return but empties entries class object
+        """
+        with self.lock:
+            for file_name in list(self.entries):
+                self.remove(file_name)
+
+    def close(self):
+        """
+        Function to remove every file kept and the store's directory
+
+        :returns: no explicit return
+        """
+        with self.lock:
+            self.entries.clear()
+            self.used_bytes = 0
+            self._remove_directory()
@@ -0,0 +1,354 @@
+import multiprocessing
+import queue
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+from src.GeneticAlgorithm import GeneticAlgorithm
+from src.Schedule import Schedule
+
+# Information shared by every run, set once in each worker process
+_shared = {}
+
+
+def _init_shared(
+    slots: list,
+    wards: list,
+    placements: list,
+    num_weeks: int,
+    index: "ProblemIndex",
+    params: "Params",
+    progress: "multiprocessing.Queue" = None,
+    executor: "ScheduleExecutor" = None,
+    warm_start: "WarmStart" = None,
+    cancel: "multiprocessing.Event" = None,
+):
+    """
+    Function to store the information needed to run the genetic algorithm, so it is only sent to each worker once
+
+    :param slots: A list of all potential placement week positions
+    :param wards: A list of all potential wards that placements can be taken on
+    :param placements: A list of all placements to be allocated
+    :param num_weeks: Integer number of weeks that placements will take place over
+    :param index: ProblemIndex of ward and placement information
+    :param params: Params for the run
+    :param progress: queue for sending progress updates back to the main process
+    :param executor: ScheduleExecutor used by every run to generate new schedules (one is created for each run
+    if not given)
+    :param warm_start: WarmStart of a previous schedule to seed every run from
+    :param cancel: event set by the main process to stop the runs in worker processes
+    :returns: no explicit return but sets the module's shared information
+    """
+    _shared.update(
+        slots=slots,
+        wards=wards,
+        placements=placements,
+        num_weeks=num_weeks,
+        index=index,
+        params=params,
+        progress=progress,
+        executor=executor,
+        warm_start=warm_start,
+        cancel=cancel,
+    )
+
+
+def run_summary(
+    run_no: int,
+    seed: int,
+    chosen_schedule: Schedule,
+    iteration: int,
+    files: list,
+    cache_stats: dict = None,
+    local_search_stats: dict = None,
+) -> dict:
+    """
+    Function to summarise the schedule chosen by a run of the genetic algorithm
+
+    :param run_no: integer number of the run
+    :param seed: integer seed the run was carried out with
+    :param chosen_schedule: the schedule chosen by the run
+    :param iteration: integer number of iterations the run took
+    :param files: list of (ScheduleReport, file name) for the reports saved by the run
+    :param cache_stats: dictionary of how the run used its fitness cache, from FitnessCache.stats
+    :param local_search_stats: dictionary of how local search polished the chosen schedule, from LocalSearch.stats
+    :returns: dictionary of details of the chosen schedule
+    """
+    return {
+        "run_no": run_no,
+        "seed": seed,
+        "file_name": chosen_schedule.file_name,
+        "viable": chosen_schedule.file_name.split("-", maxsplit=10)[-1].replace(".xlsx", ""),
+        "non_viable_reason": chosen_schedule.non_viable_reason,
+        "iteration": iteration,
+        "fitness": chosen_schedule.fitness,
+        "schedule_eval_scores": chosen_schedule.schedule_eval_scores,
+        "quality_metrics": chosen_schedule.quality_metrics,
+        "files": files,
+        "fitness_cache": cache_stats,
+        "local_search": local_search_stats,
+    }
+
+
+def fitness_summary(fitnesses: list, quantiles: tuple = (0.1, 0.25, 0.5, 0.75, 0.9)) -> dict:
+    """
+    Function to summarise the fitness of a population, so progress can be reported without sending every fitness
+
+    :param fitnesses: list of the fitness of each schedule in the population
+    :param quantiles: tuple of the quantiles to include, each between 0 and 1
+    :returns: dictionary of the minimum, mean and maximum fitness, and each quantile keyed as q followed by its
+    percentage (e.g. q50 for the median)
+    """
+    fitnesses = np.asarray(fitnesses, dtype=np.float64)
+    summary = {"min": float(fitnesses.min()), "mean": float(fitnesses.mean()), "max": float(fitnesses.max())}
+    for quantile, value in zip(quantiles, np.quantile(fitnesses, quantiles)):
+        summary[f"q{round(quantile * 100)}"] = float(value)
+    return summary
+
+
+def comparison_table(summaries: list) -> pd.DataFrame:
+    """
+    Function to produce the table comparing the schedules chosen by each run
+
+    :param summaries: list of dictionaries summarising each run, from run_summary
+    :returns: dataframe with one row per schedule
+    """
+    rows = []
+    for summary in summaries:
+        schedule_scores = summary["schedule_eval_scores"]
+        quality_scores = summary["quality_metrics"]
+        rows.append([summary["file_name"],
+                     summary["viable"],
+                     summary["non_viable_reason"],
+                     summary["iteration"],
+                     np.round(summary["fitness"], 4),
+                     np.round(schedule_scores["mean_ward_util"], 2),
+                     np.round(schedule_scores["mean_uniq_deps"], 2),
+                     np.round(schedule_scores["mean_uniq_wards"], 2),
+                     np.round(quality_scores["num_incorr_num_plac"], 2),
+                     np.round(quality_scores["num_incorrect_length"], 2),
+                     np.round(quality_scores["num_capacity_exceeded"], 2),
+                     np.round(quality_scores["num_double_booked"], 2),
+                     summary["seed"]])
+    table = pd.DataFrame(rows,
+                         columns=["Schedule file name",
+                                  "Viable schedule?",
+                                  "Non-viable reason",
+                                  "Number of iterations to generate",
+                                  "Schedule Fitness Score",
+                                  "Placement Utilisation score ",
+                                  "Unique Specialities Score",
+                                  "Unique Wards Score",
+                                  "No. students with incorrect no. of placements",
+                                  "No. of placements with the incorrect length",
+                                  "No. of ward-weeks where capacity is exceeded",
+                                  "No. of placements where student is double-booked",
+                                  "Seed"])
+    table["Non-viable reason"] = table["Non-viable reason"].fillna("")
+    return table
+
+
+def _run_events(run_no: int, seed: int, pop_size: int, shared: dict = None):
+    """
+    Function to run the genetic algorithm once, from seeding to convergence
+
+    :param run_no: integer number of the run
+    :param seed: integer seed for the random numbers used by the run
+    :param pop_size: integer number of schedules in the population
+    :param shared: dictionary of the information set by _init_shared, the worker process's own if not given
+    :returns: generator of ("progress", details) after each iteration, then ("finished", summary)
+    """
+    if shared is None:
+        shared = _shared
+    ga = GeneticAlgorithm(
+        shared["slots"],
+        shared["wards"],
+        shared["placements"],
+        pop_size,
+        shared["num_weeks"],
+        run_no,
+        shared["index"],
+        shared["params"],
+        shared["executor"],
+        seed,
+        shared["warm_start"],
+    )
+    ga.seed_schedules()
+    (continue_eval, chosen_schedule, fitness, iteration,
+     schedule_fitnesses, download_files) = ga.evaluate()
+    while continue_eval:
+        yield "progress", {
+            "run_no": run_no,
+            "iteration": iteration,
+            "fitness": fitness,
+            "fitness_summary": fitness_summary(schedule_fitnesses),
+        }
+        (continue_eval, chosen_schedule, fitness, iteration,
+         schedule_fitnesses) = ga.evolve()
+    if shared["executor"] is None:
+        ga.executor.close()
+    yield "finished", run_summary(
+        run_no, seed, chosen_schedule, iteration, ga.files, ga.evaluator.cache.stats(), ga.local_search.stats
+    )
+
+
+def _run(run_no: int, seed: int, pop_size: int) -> dict:
+    """
+    Function to run the genetic algorithm once in a worker process, sending progress to the main process
+
+    :param run_no: integer number of the run
+    :param seed: integer seed for the random numbers used by the run
+    :param pop_size: integer number of schedules in the population
+    :returns: dictionary summarising the run, or None if the runs were cancelled before it finished
+    """
+    for event, details in _run_events(run_no, seed, pop_size):
+        if event == "progress":
+            _shared["progress"].put(details)
+            #Stop between iterations rather than finishing a run nobody is waiting for
+            if _shared["cancel"] is not None and _shared["cancel"].is_set():
+                return None
+    return details
+
+
+class RunExecutor:
+    """
+    The RunExecutor carries out the separate runs of the genetic algorithm which each produce one schedule.
+    With more than one worker, the runs happen at the same time in a pool of processes, and progress from each
+    run is passed back as it happens. Each run has its own seed, so its schedule does not depend on the number of
+    workers or the order that runs finish in.
+
+    If workers is 1 or less, or the pool cannot be used, the runs happen one after another in the main process.
+
+    :param slots: A list of all potential placement week positions
+    :param wards: A list of all potential wards that placements can be taken on
+    :param placements: A list of all placements to be allocated
+    :param num_weeks: Integer number of weeks that placements will take place over
+    :param index: ProblemIndex of ward and placement information
+    :param params: Params for the runs
+    :param workers: Integer number of worker processes to use
+    :param executor: ScheduleExecutor used to generate new schedules when the runs happen in the main process
+    :param warm_start: WarmStart of a previous schedule to seed every run from, the runs start from random
+    schedules if not given
+    """
+
+    # Seconds to wait for a run to finish before passing on progress
+    poll_interval = 0.5
+
+    def __init__(
+        self,
+        slots: list,
+        wards: list,
+        placements: list,
+        num_weeks: int,
+        index: "ProblemIndex",
+        params: "Params",
+        workers: int = 1,
+        executor: "ScheduleExecutor" = None,
+        warm_start: "WarmStart" = None,
+    ):
+        self.workers = workers
+        self.pool = None
+        self.progress = None
+        self.cancelled = None
+        if workers > 1:
+            # Each run already has its own process, so new schedules are generated within it
+            params = params.override({"genetic_algorithm_params": {"workers": 1}})
+            try:
+                self.progress = multiprocessing.Queue()
+                self.cancelled = multiprocessing.Event()
+                self.pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_shared,
+                    initargs=(slots, wards, placements, num_weeks, index, params, self.progress, None, warm_start,
+                              self.cancelled),
+                )
+            except (OSError, NotImplementedError) as e:
+                print(f"WARNING: Unable to start worker processes, running serially ({e})")
+        # The information used by runs in this process, kept by the executor so that executors for different
+        # problems (e.g. the runs of different users of the app) do not share it
+        self.local = dict(
+            slots=slots, wards=wards, placements=placements, num_weeks=num_weeks, index=index, params=params,
+            executor=executor, warm_start=warm_start,
+        )
+
+    def __enter__(self) -> "RunExecutor":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Function to shut down the worker processes, if there are any. Runs which have not started are cancelled and
+        those in progress stop at their next iteration, without waiting for them
+
+        :returns: no explicit return
+        """
+        if self.pool is not None:
+            self.cancelled.set()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def run(self, num_runs: int, pop_size: int, seed: int = None, progress_callback=None):
+        """
+        Function to carry out the runs of the genetic algorithm
+
+        :param num_runs: integer number of runs, each producing one schedule
+        :param pop_size: integer number of schedules in the population of each run
+        :param seed: integer seed used to draw the seed of each run, so the whole set of runs can be repeated
+        (drawn from the random module if not given)
+        :param progress_callback: function called with the details of each progress update (run number, iteration,
+        highest fitness and fitness_summary of the population) instead of them being returned
+        :returns: generator of ("progress", details) as runs progress (unless progress_callback is given) and
+        ("finished", summary) as each finishes
+        """
+        rng = random.Random(random.getrandbits(32) if seed is None else seed)
+        seeds = [rng.getrandbits(32) for run_no in range(num_runs)]
+        remaining = list(range(num_runs))
+        if self.pool is not None:
+            try:
+                futures = [self.pool.submit(_run, run_no, seeds[run_no], pop_size) for run_no in remaining]
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    yield from self.pass_on(self.drain_progress(), progress_callback)
+                    for future in done:
+                        summary = future.result()
+                        if summary is None:
+                            continue
+                        remaining.remove(summary["run_no"])
+                        yield "finished", summary
+                return
+            except (OSError, BrokenProcessPool) as e:
+                print(f"WARNING: Worker processes stopped, running remaining runs serially ({e})")
+                self.pool = None
+        for run_no in remaining:
+            yield from self.pass_on(_run_events(run_no, seeds[run_no], pop_size, self.local), progress_callback)
+
+    @staticmethod
+    def pass_on(events, progress_callback=None):
+        """
+        Function to pass on events from the runs, sending progress updates to the callback if there is one
+
+        :param events: generator of (event, details)
+        :param progress_callback: function called with the details of each progress update
+        :returns: generator of the events not sent to the callback
+        """
+        for event, details in events:
+            if event == "progress" and progress_callback is not None:
+                progress_callback(details)
+            else:
+                yield event, details
+
+    def drain_progress(self):
+        """
+        Function to pass on the progress updates received from worker processes
+
+        :returns: generator of ("progress", details)
+        """
+        while True:
+            try:
+                yield "progress", self.progress.get_nowait()
+            except queue.Empty:
+                return
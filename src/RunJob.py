@@ -0,0 +1,175 @@
+import threading
+import time
+from datetime import datetime
+from src.ProgressReporter import ProgressReporter
+from src.ReportStore import ReportStore
+from src.RunExecutor import RunExecutor, comparison_table
+from src.ScheduleExecutor import ScheduleExecutor
+
+
+class RunJob:
+    """
+    A RunJob carries out a set of runs of the genetic algorithm in a background thread, so they continue while the
+    page which started them is rerun or refreshed. Progress, the summary of each finished run and the output files
+    are kept on the job, so the page can show them whenever it is drawn. The output files are kept in the job's own
+    ReportStore.
+
+    :param slots: A list of all potential placement week positions
+    :param wards: A list of all potential wards that placements can be taken on
+    :param placements: A list of all placements to be allocated
+    :param num_weeks: Integer number of weeks that placements will take place over
+    :param index: ProblemIndex of ward and placement information
+    :param params: Params for the runs
+    :param num_runs: integer number of runs, each producing one schedule
+    :param pop_size: integer number of schedules in the population of each run
+    :param seed: integer seed for the random numbers used by the runs, chosen at random if not given
+    :param warm_start: WarmStart of a previous schedule to seed every run from
+    """
+
+    def __init__(
+        self,
+        slots: list,
+        wards: list,
+        placements: list,
+        num_weeks: int,
+        index: "ProblemIndex",
+        params: "Params",
+        num_runs: int,
+        pop_size: int,
+        seed: int = None,
+        warm_start: "WarmStart" = None,
+    ):
+        self.problem = (slots, wards, placements, num_weeks, index, params)
+        self.params = params
+        self.num_runs = num_runs
+        self.pop_size = pop_size
+        self.seed = seed
+        self.warm_start = warm_start
+        self.status = "waiting"
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.progress = ProgressReporter()
+        self.summaries = []
+        self.file_names = []
+        self.store = ReportStore(params.ui_params.report_store_mb)
+        self.lock = threading.RLock()
+        self.cancel_requested = threading.Event()
+        # Set when the job is closed while its thread is running, so the thread removes the store once it stops
+        self.closing = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the job has been started and has not yet stopped
+
+        :returns: bool
+        """
+        return self.status in ("waiting", "running")
+
+    @property
+    def viable(self) -> bool:
+        """
+        Whether any of the finished runs chose a viable schedule
+
+        :returns: bool
+        """
+        with self.lock:
+            return any(summary["viable"] == "True" for summary in self.summaries)
+
+    def start(self) -> "RunJob":
+        """
+        Function to start the runs in the background
+
+        :returns: the RunJob
+        """
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """
+        Function to ask the job to stop, which it does at its next progress update. Runs which have finished are kept
+
+        :returns: no explicit return
+        """
+        self.cancel_requested.set()
+
+    def run(self):
+        """
+        Function to carry out the runs, called in the background thread
+
+        :returns: no explicit return but updates status, progress, summaries and file_names class objects, and adds
+        the output files to the store
+        """
+        slots, wards, placements, num_weeks, index, params = self.problem
+        with self.lock:
+            self.status = "running"
+            self.started = time.time()
+        try:
+            with ScheduleExecutor(slots, wards, placements, num_weeks, index, params,
+                                  params.genetic_algorithm_params.workers) as executor, \
+                 RunExecutor(slots, wards, placements, num_weeks, index, params,
+                             params.ui_params.run_workers, executor, self.warm_start) as runs:
+                for event, details in runs.run(self.num_runs, self.pop_size, self.seed):
+                    with self.lock:
+                        if event == "progress":
+                            self.progress(details)
+                        else:
+                            self.progress.finish(details["run_no"])
+                            self.summaries.append(details)
+                            for report, file_name in details["files"]:
+                                self.store.add(file_name, report)
+                                self.file_names.append(file_name)
+                    if self.cancel_requested.is_set():
+                        break
+            status = "cancelled" if self.cancel_requested.is_set() else "finished"
+        except Exception as e:
+            print(f"ERROR: Schedule production failed ({e!r})")
+            self.error = str(e)
+            status = "failed"
+        with self.lock:
+            if self.summaries and not self.closing:
+                try:
+                    self.save_comparison()
+                except Exception as e:
+                    print(f"ERROR: Unable to save the schedule comparison ({e!r})")
+            self.status = status
+            self.finished = time.time()
+            if self.closing:
+                self.store.close()
+
+    def save_comparison(self):
+        """
+        Function to add the table comparing the schedules chosen by each finished run to the output files, as the
+        first file
+
+        :returns: no explicit return but updates file_names class object and adds the file to the store
+        """
+        now = datetime.now().strftime("%d-%m-%Y %H-%M")
+        file_name = f"{now} schedule comparison.csv"
+        self.store.add(file_name, self.comparison().to_csv(index=False).encode("utf-8"))
+        self.file_names.insert(0, file_name)
+
+    def comparison(self):
+        """
+        Function to produce the table comparing the schedules chosen by each finished run
+
+        :returns: dataframe with one row per schedule, in the order the runs finished
+        """
+        with self.lock:
+            return comparison_table(list(self.summaries))
+
+    def close(self):
+        """
+        Function to stop the job and remove its output files. If the runs are still going, the files are removed by
+        the background thread once it has stopped, so it never writes to a store which has been removed
+
+        :returns: no explicit return
+        """
+        with self.lock:
+            running = self.thread.is_alive() and self.finished is None
+            self.closing = running
+        self.cancel()
+        if not running:
+            self.store.close()
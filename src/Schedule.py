@@ -1,19 +1,15 @@
-from random import randint, shuffle, randrange
-import copy
 import math
-import collections
-from xmlrpc.client import Boolean
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import re
 from typing import Tuple
-import yaml
-import os
 import random
-import streamlit as st
-import io
-import base64
+from src.Occupancy import Occupancy
+from src.Params import Params
+from src.ProblemIndex import ProblemIndex
+from src.FitnessEvaluator import FitnessEvaluator
+from src.FitnessState import FitnessState
+from src.ScheduleReport import ScheduleReport
 
 
 class Schedule:
@@ -21,9 +17,13 @@ class Schedule:
     A Schedule object contains a complete set of student placements across all wards. When the genetic algorithm is run there are many 
     Schedule objects which are manipulated and scored to try and reach the best possible solution.
 
-    param: conf_placements: An empty list for confirmed placements to be stored in
-    param total_slots: An integer number of empty lists to be inserted into slots
-    param: slots: An empty list of lists for slots to be created in
+    The placements are stored as a genome: an integer array with the id of the ward each placement is assigned to
+    (-1 where unassigned). Mutation and recombination produce new schedules with their own copy of the genome, so
+    parent schedules are never changed.
+
+    param: genome: An integer array of the ward id assigned to each placement (-1 where unassigned)
+    param: occupancy: An Occupancy object counting students on each ward, week and placement part (built from the
+    genome when first needed)
     param: wards: A list of Ward objects where placements can take place
     param: placements: A list of Placement objects to be assigned
     param: placement_slots: A list of Slot objects for placements on wards to be assigned into
@@ -32,14 +32,32 @@ class Schedule:
     param: fitness: A float initialising the fitness score for this schedule
     param: viable: A Boolean initialising the viability of this schedule
     param: non_viable_reason: A None string initialising the explanation for why the schedule is not viable
+    param: index: A ProblemIndex of ward and placement information shared between schedules (created if not given)
+    param: evaluator: A FitnessEvaluator shared between schedules to score them (created if not given)
+    param: params: Params for the run (read from config/params.yml if not given)
+    param: fitness_state: A FitnessState used to rescore the schedule after mutations (None until needed)
+    param: dirty: A Boolean of whether the genome has changed since the schedule was last scored
+    param: report: A ScheduleReport of the schedule, set by save_report (None until then)
+    param: locked: A boolean array of the placements whose ward is locked by a WarmStart and is not changed by
+    mutation (None if no placements are locked)
     """
-    files = []
 
-    def __init__(self, slots: list, wards: list, placements: list, num_weeks: int):
-        self.conf_placements = []
-        self.slots = []
-        total_slots = len(slots) * len(wards)
-        self.slots = [[] for _ in range(0, total_slots)]
+    def __init__(
+        self,
+        slots: list,
+        wards: list,
+        placements: list,
+        num_weeks: int,
+        index: ProblemIndex = None,
+        evaluator: FitnessEvaluator = None,
+        params: Params = None,
+    ):
+        if index is None:
+            index = ProblemIndex(slots, wards, placements, num_weeks)
+        self.index = index
+
+        self.genome = np.full(len(placements), -1, dtype=np.int32)
+        self._occupancy = None
 
         self.wards = wards
         self.placements = placements
@@ -50,76 +68,65 @@ class Schedule:
         self.fitness = 0.0
         self.viable = False
         self.non_viable_reason = None
+        self.fitness_state = None
+        self.dirty = True
+        self.report = None
+        self.locked = None
+
+        if params is None:
+            params = Params.load()
+        self.params = params
+        self.delta_fitness = params.schedule_params.delta_fitness
+        self.repair_offspring = params.genetic_algorithm_params.repair_offspring
+
+        #Created when first needed if not given, so schedules which are only generated never build one
+        self._evaluator = evaluator
+
+    @property
+    def evaluator(self) -> FitnessEvaluator:
+        """
+        The FitnessEvaluator used to score the schedule, shared with the schedules created from it
 
-        with open("config/params.yml") as f:
-            params = yaml.load(f, Loader=yaml.FullLoader)
-
-        self.medical_placement_check = params["schedule_params"][
-            "medical_placement_check"
-        ]
-        self.surgical_placement_check = params["schedule_params"][
-            "surgical_placement_check"
-        ]
-        self.community_placement_check = params["schedule_params"][
-            "community_placement_check"
-        ]
-        self.critical_care_placement_check = params["schedule_params"][
-            "critical_care_placement_check"
-        ]
-
-        self.within_capacity_scoring_factor = params["schedule_params"][
-            "within_capacity_scoring_factor"
-        ]
-        self.double_booked_scoring_factor = params["schedule_params"][
-            "double_booked_scoring_factor"
-        ]
-        self.correct_num_wards_scoring_factor = params["schedule_params"][
-            "correct_num_wards_scoring_factor"
-        ]
-        self.uniq_departments_scoring_factor = params["schedule_params"][
-            "uniq_departments_scoring_factor"
-        ]
-        self.uniq_wards_scoring_factor = params["schedule_params"][
-            "uniq_wards_scoring_factor"
-        ]
-        self.all_placements_assigned_scoring_factor = params["schedule_params"][
-            "all_placements_assigned_scoring_factor"
-        ]
-        self.capacity_utilisation_scoring_factor = params["schedule_params"][
-            "capacity_utilisation_scoring_factor"
-        ]
-
-        self.medical_placement_scoring_factor = params["schedule_params"][
-            "medical_placement_scoring_factor"
-        ]
-        self.surgical_placement_scoring_factor = params["schedule_params"][
-            "surgical_placement_scoring_factor"
-        ]
-        self.community_placement_scoring_factor = params["schedule_params"][
-            "community_placement_scoring_factor"
-        ]
-        self.critical_care_placement_scoring_factor = params["schedule_params"][
-            "critical_care_placement_scoring_factor"
-        ]
+        :returns: FitnessEvaluator
+        """
+        if self._evaluator is None:
+            self._evaluator = FitnessEvaluator(self.index, self.params.schedule_params)
+        return self._evaluator
 
-    def id_year_capacity(self, placement: "placement", ward_id: int) -> int:
+    def child(self, genome: np.ndarray) -> "Schedule":
         """
-        Function to identify the year-specific capacity relevant for a given placement
+        Function to create a new schedule with the given genome, sharing everything which does not change between
+        schedules with this one
 
-        :param placement: the placement object
-        :param ward_id: id of the ward as per original data
-        :returns: capacity for the specific type of placement and ward
+        :param genome: integer array of the ward id assigned to each placement, owned by the new schedule
+        :returns: Schedule object, not yet scored
         """
-        if placement.part == "Year 1":
-            year_cap = self.wards[ward_id].p1_capacity
-        elif placement.part == "Year 2":
-            year_cap = self.wards[ward_id].p2_capacity
-        elif placement.part == "Year 3":
-            year_cap = self.wards[ward_id].p3_capacity
-        else:
-            year_cap = self.wards[ward_id].capacity
+        schedule = Schedule.__new__(Schedule)
+        schedule.__dict__.update(self.__dict__)
+        schedule.genome = genome
+        schedule._occupancy = None
+        schedule.fitness_state = None
+        schedule.dirty = True
+        schedule.report = None
+        return schedule
+
+    @property
+    def occupancy(self) -> Occupancy:
+        """
+        Occupancy of each ward, week and placement part, built from the genome when first needed
 
-        return year_cap
+        :returns: Occupancy object
+        """
+        if self._occupancy is None:
+            placement_indices, ward_indices = self.fitness_inputs()
+            self._occupancy = Occupancy(len(self.wards), len(self.placement_slots), self.index.num_parts)
+            self._occupancy.add_placements(
+                ward_indices,
+                self.index.placement_weeks[placement_indices],
+                self.index.placement_durations[placement_indices],
+                self.index.placement_parts[placement_indices],
+            )
+        return self._occupancy
 
     def calc_slot_index(self, ward_id: int, num_weeks: int, start_week: int) -> int:
         """
@@ -130,477 +137,386 @@ class Schedule:
         :param ward_id: id of the ward as per original data
         :param num_weeks: total integer number of weeks the entire schedule covers
         :param start_week: week number that the placement starts in
-        :returns: the id within the slots class object that the placement starts on
+        :returns: the index of the ward and week slot that the placement starts on
         """
 
         return int((ward_id * num_weeks) + start_week + 1)
 
-    def schedule_generation(self):
+    def calc_week_index(self, start_week: int) -> int:
+        """
+        Function to calculate the position of a placement's start week within
+        a ward's weeks, consistent with calc_slot_index
+
+        :param start_week: week number that the placement starts in
+        :returns: the week index within the occupancy class object that the placement starts on
+        """
+
+        return int(start_week + 1)
+
+    def assign_placement(self, placement_index: int, ward_id: int):
+        """
+        Function to record a placement against a ward in occupancy and the genome
+
+        :param placement_index: position of the placement within the placements class object
+        :param ward_id: id of the ward as per original data
+        :returns: no explicit return but updates occupancy and genome class objects
+        """
+        self.occupancy.add(
+            ward_id,
+            self.index.placement_weeks[placement_index],
+            self.index.placement_durations[placement_index],
+            self.index.placement_parts[placement_index],
+        )
+        self.genome[placement_index] = ward_id
+        self.dirty = True
+
+    def schedule_generation(self, rng: random.Random = random, placement_indices: list = None):
         """
         Function to initialise a schedule which is generated by randomly choosing a
         ward for the placement to occur on
 
-        :returns: no explicit return but populates conf_placements class object
+        :param rng: random number generator used to choose wards (the random module if not given)
+        :param placement_indices: positions of the placements to choose wards for, in order, all placements if not
+        given. Wards already assigned to other placements count towards capacity
+        :returns: no explicit return but populates the genome class object
         """
-        for p in self.placements:
-            placement_duration = int(p.duration)
-            #invalid_ward = True
-            #list of valid wards
-            valid_ward_ids = []
-            for ward_id in range(0, len(self.wards) - 1):
-                #Get info about that ward and it's current bookings.
-                slot_index_increment = self.calc_slot_index(
-                    ward_id, self.num_weeks, p.start)
-                year_cap = self.id_year_capacity(p, ward_id)
-                self.ward = self.wards[ward_id]
-                valid_ward = True
-                #If no capacity for students in that year, then ward is invalid
-                if year_cap == 0:
-                    valid_ward = False
-                #If course is Nursing Associate, ensure no placements are assigned
-                #to a ward that cannot accomodate this
-                elif (p.nurse_assoc
-                      and self.ward.nurse_assoc_capacity == 0):
-                    valid_ward = False
-                #If student is not a driver, ensure no placements are assigned
-                #to a ward that would require driving.
-                elif ((not p.is_driver) and (self.ward.need_to_drive)):
-                    valid_ward = False
-                #Check occupancy for placement duration
-                for i in range(0, placement_duration):
-                    # Check if overall capacity breached or ward has expired education audit
-                    if (len(self.slots[slot_index_increment])
-                        >= self.ward.capacity
-                        ) or ((p.covid_status == "Low/Medium")
-                              and (self.ward.covid_status == "Medium/High")):
-                            valid_ward = False
-                    else:
-                        # If overall cap and education audit are fine, check whether year-specific capacity satisfied
-                        same_year_count = 0
-                        for plac in self.slots[slot_index_increment]:
-                            if plac.part == p.part:
-                                same_year_count += 1
-                        if same_year_count >= year_cap:
-                            valid_ward = False
-                    slot_index_increment += 1
-                if valid_ward:
-                    valid_ward_ids.append(ward_id)
+        if placement_indices is None:
+            placement_indices = range(len(self.placements))
+        for placement_index in placement_indices:
+            p = self.placements[placement_index]
+            valid_ward_ids = self.valid_ward_ids(placement_index)
             if len(valid_ward_ids) == 0:
                 print(f'ERROR: No Valid Wards remaining for {p.student_name}')
                 break
             #Randomly pick a valid ward.
-            ward_id = random.choice(valid_ward_ids)
+            ward_id = int(rng.choice(valid_ward_ids))
        
             # Now that a ward has been identified, populate schedule
-            overall_slot_index = self.calc_slot_index(ward_id, self.num_weeks, p.start)
-            slot_index_increment = overall_slot_index
-            for i in range(0, placement_duration):
-                self.slots[slot_index_increment].append(p)
-                slot_index_increment += 1
-
-            self.conf_placements.append(
-                {
-                    "placement": p,
-                    "slotIndex": overall_slot_index,
-                    "startweek": p.start,
-                    "length": placement_duration,
-                }
-            )
+            self.assign_placement(placement_index, ward_id)
 
-    def clean_departments(self, output_string: str) -> list:
+    def valid_ward_ids(self, placement_index: int) -> np.ndarray:
         """
-        Function to clean up a list of department names for analysis. Removes some non-required words.
+        Function to find the wards a placement could be assigned to, given the placements already on each ward
 
-        :params output_string: the string to be cleaned, containing multiple department names
-        :returns: a clean list of individual words seen in original string
+        :param placement_index: position of the placement within the placements class object
+        :returns: array of the ids of wards the placement is eligible for with capacity for it in every week
         """
-        replace_dict = {
-            ",": "",
-            "and": "",
-            "the": "",
-            "of": "",
-            "eneral": "general",
-            "None": "",
-            "-": "",
-            "\xa0": " ",
-            "  ": " ",
-        }
-        for word, replacement in replace_dict.items():
-            output_string = output_string.replace(word, replacement)
-        output_string = output_string.lower()
-        output_list = output_string.split(" ")
-        return output_list
-
-    def get_fitness(self):
+        p = self.placements[placement_index]
+        placement_duration = int(p.duration)
+        week_index = self.calc_week_index(p.start)
+        part_index = self.index.placement_parts[placement_index]
+        #Wards the placement is eligible for (year capacity, nursing
+        #associate, driving and covid status, see ProblemIndex)
+        eligible_ward_ids = self.index.eligible_ward_ids[placement_index]
+        #Keep those with overall and year-specific capacity for the
+        #placement duration
+        return eligible_ward_ids[self.occupancy.wards_with_capacity(
+            week_index, placement_duration, part_index,
+            self.index.ward_capacities[eligible_ward_ids],
+            self.index.ward_year_caps[eligible_ward_ids, part_index],
+            eligible_ward_ids)]
+
+    def move_placement(self, placement_index: int, ward_id: int):
         """
-        Function to assess the fitness of each schedule according to a range of metrics
+        Function to move an assigned placement to another ward, keeping occupancy (and the fitness state, if the
+        schedule has one) up to date
 
-        :returns: no explicit return but updates various class object parameters
+        :param placement_index: position of the placement within the placements class object
+        :param ward_id: id of the ward the placement is moved to
+        :returns: no explicit return but updates genome, occupancy and fitness_state class objects
         """
-        self.schedule_scores = 0
-        self.placement_wards = collections.defaultdict(list)
-        self.placement_deps = collections.defaultdict(list)
-        self.viable = None  # Viable variable indicates whether a schedule
-        # could be used i.e. no hard constraints
-        # are breached
-
-        self.schedule_eval_scores = {}
-        self.schedule_eval_scores["cap_exceeded_score"] = 0
-        self.schedule_eval_scores["double_booked_score"] = 0
-        ward_utilisation = []
-        unallocatedPlacements = []
-
-        # Create a list of placements to be allocated, so we can check
-        # later whether all placements allocated in a schedule
-        placementsToAllocate = [p.id for p in self.placements]
-        for confirmed_placement in self.conf_placements:
-            schedule_score_component = 0
-
-            if confirmed_placement["placement"].id in placementsToAllocate:
-                placementsToAllocate.remove(confirmed_placement["placement"].id)
-            else:
-                unallocatedPlacements.append(confirmed_placement["placement"].id)
-
-            placement_index = int(confirmed_placement["slotIndex"])
-            ward_index = int(math.floor(placement_index / len(self.placement_slots)))
-
-            ward = self.wards[ward_index]
-
-            # Add Ward and Speciality to each nurse's individual list
-            nurse_name = confirmed_placement["placement"].name.split("_", maxsplit=1)[0]
-
-            # Maximise variety of wards
-            if not self.placement_wards[nurse_name]:
-                previous_wards = confirmed_placement["placement"].wardhistory.split(
-                    ", "
-                )
-                for old_ward in previous_wards:
-                    self.placement_wards[nurse_name].append(old_ward)
-
-            self.placement_wards[nurse_name].append(ward.ward)
-            # Maximise variety of specialities
-            if not self.placement_deps[nurse_name]:
-                previous_departments = self.clean_departments(
-                    confirmed_placement["placement"].dephistory
-                )
-                self.placement_deps[nurse_name] = previous_departments
-
-            dep_clean = self.clean_departments(ward.department)
-            for dep_word in dep_clean:
-                self.placement_deps[nurse_name].append(dep_word)
-
-            # Check if wards have exceeded capacity of assigned placements #
-            year_cap = self.id_year_capacity(
-                confirmed_placement["placement"], ward_index
-            )
-
-            year_count = 0
-            for oth_placement in self.slots[placement_index]:
-                if oth_placement.part == confirmed_placement["placement"].part:
-                    year_count += 1
-
-            if (
-                len(self.slots[placement_index]) <= self.wards[ward_index].capacity
-            ) and (year_count <= year_cap):
-                schedule_score_component += self.within_capacity_scoring_factor
-                self.schedule_eval_scores[
-                    "cap_exceeded_score"
-                ] += self.within_capacity_scoring_factor
-            else:
-                schedule_score_component = 0
-                self.schedule_eval_scores["cap_exceeded_score"] = 0
-                self.viable = False
-                self.non_viable_reason = "Cap Exceeded"
-
-            if self.wards[ward_index].capacity != 0:
-                ward_utilisation.append(
-                    len(self.slots[placement_index]) / self.wards[ward_index].capacity
-                )
-            else:
-                ward_utilisation.append(0)
-
-            # Check if student's covid status can accommodate selected ward
-            if (confirmed_placement["placement"].covid_status == "Low/Medium") and (
-                self.wards[ward_index].covid_status == "Medium/High"
-            ):
-                schedule_score_component = 0
-                self.viable = False
-                self.non_viable_reason = "Covid status not compatible"
-
-            # Check if student has another placement arranged for a different
-            # ward at the same time ##
-            double_booked = False
-            for id in range(1, len(self.wards)):
-                if id != ward_index:
-                    indexForChecking = self.calc_slot_index(
-                        id, len(self.placement_slots), confirmed_placement["startweek"]
-                    )
-                    if indexForChecking == placement_index:
-                        continue
-
-                    if len(self.slots[indexForChecking]):
-                        for potential_match in self.slots[indexForChecking]:
-                            if (
-                                potential_match.name
-                                == confirmed_placement["placement"].name
-                            ):
-                                double_booked = True
-                                break
-                    else:
-                        continue
-            if not double_booked:
-                schedule_score_component += self.double_booked_scoring_factor
-                self.schedule_eval_scores[
-                    "double_booked_score"
-                ] += self.double_booked_scoring_factor
-            else:
-                self.viable = False
-                self.non_viable_reason = "Double booked"
-                schedule_score_component = 0
-                self.schedule_eval_scores["double_booked_score"] = 0
-            self.schedule_scores += schedule_score_component
-
-        self.schedule_eval_scores["mean_ward_util"] = sum(ward_utilisation) / len(
-            ward_utilisation
-        )
+        old_ward_id = int(self.genome[placement_index])
+        if self.fitness_state is not None:
+            #Moving the placement in the fitness state also updates its occupancy
+            entry = int(np.searchsorted(self.fitness_state.plac, placement_index))
+            self.fitness_state.move(entry, ward_id)
+        if self._occupancy is not None and (
+            self.fitness_state is None or self._occupancy is not self.fitness_state.occupancy
+        ):
+            week_index = self.index.placement_weeks[placement_index]
+            duration = self.index.placement_durations[placement_index]
+            part_index = self.index.placement_parts[placement_index]
+            self._occupancy.add(old_ward_id, week_index, duration, part_index, count=-1)
+            self._occupancy.add(ward_id, week_index, duration, part_index)
+        self.genome[placement_index] = ward_id
+        self.dirty = True
+
+    def violations(self, placement_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Function to find the assigned placements which are on a ward they are not eligible for (see ProblemIndex),
+        or on a ward which is over its overall or year-specific capacity in any week of the placement
 
-        mean_uniq_wards_list = []
-        for assigned_wards in self.placement_wards.values():
-            mean_uniq_wards_list.append(len(set(assigned_wards)) / len(assigned_wards))
-        prop_uniq_wards = sum(mean_uniq_wards_list) / len(mean_uniq_wards_list)
-        self.add_score(self.uniq_wards_scoring_factor * prop_uniq_wards)
-        self.schedule_eval_scores["mean_uniq_wards"] = prop_uniq_wards
-
-        ## Reward schedules which have a unique set of departments ##
-        mean_uniq_deps_list = []
-        for assigned_departments in self.placement_deps.values():
-            mean_uniq_deps_list.append(
-                len(set(assigned_departments)) / len(assigned_departments)
-            )
+        :param placement_indices: positions of the placements to check, all assigned placements if not given
+        :returns: array of the positions of the placements breaking a constraint
+        """
+        if placement_indices is None:
+            placement_indices = np.flatnonzero(self.genome >= 0)
+        placement_indices = np.asarray(placement_indices, dtype=np.int64)
+        placement_indices = placement_indices[self.genome[placement_indices] >= 0]
+        ward_ids = self.genome[placement_indices].astype(np.int64)
+        ineligible = ~self.index.eligible[placement_indices, ward_ids]
+
+        #Wards, weeks and placement parts which are over either capacity, counted cumulatively over the weeks so
+        #the weeks of each placement can be checked at once
+        occupancy = self.occupancy
+        over = (occupancy.totals > self.index.ward_capacities[:, None])[:, :, None] | (
+            occupancy.counts > self.index.ward_year_caps[:, None, :]
+        )
+        over_count = np.concatenate(
+            [np.zeros((over.shape[0], 1, over.shape[2]), dtype=np.int64), np.cumsum(over, axis=1)], axis=1
+        )
+        num_weeks = over.shape[1]
+        start_weeks = np.minimum(self.index.placement_weeks[placement_indices], num_weeks)
+        end_weeks = np.minimum(start_weeks + self.index.placement_durations[placement_indices], num_weeks)
+        parts = self.index.placement_parts[placement_indices]
+        over_capacity = over_count[ward_ids, end_weeks, parts] > over_count[ward_ids, start_weeks, parts]
+        return placement_indices[ineligible | over_capacity]
+
+    def repair(self, rng: random.Random = random, placement_indices: np.ndarray = None) -> int:
+        """
+        Function to move placements which break a constraint (see violations) to a ward they are eligible for with
+        capacity for them, chosen at random. Placements are repaired in a random order, and each is checked again
+        before it is moved, as moving an earlier placement may have brought a ward back within capacity. Locked
+        placements, and those with no valid ward, are left where they are
+
+        :param rng: random number generator used to choose the order and the new wards (the random module if not
+        given)
+        :param placement_indices: positions of the placements to check, all assigned placements if not given
+        :returns: integer number of placements moved
+        """
+        candidates = [int(placement_index) for placement_index in self.violations(placement_indices)]
+        rng.shuffle(candidates)
+        moved = 0
+        for placement_index in candidates:
+            if self.locked is not None and self.locked[placement_index]:
+                continue
+            if not len(self.violations([placement_index])):
+                continue
+            #Find the valid wards with the placement taken off its current ward
+            ward_id = int(self.genome[placement_index])
+            week_index = self.index.placement_weeks[placement_index]
+            duration = self.index.placement_durations[placement_index]
+            part_index = self.index.placement_parts[placement_index]
+            self.occupancy.add(ward_id, week_index, duration, part_index, count=-1)
+            valid_ward_ids = self.valid_ward_ids(placement_index)
+            self.occupancy.add(ward_id, week_index, duration, part_index)
+            if len(valid_ward_ids) == 0:
+                continue
+            self.move_placement(placement_index, int(rng.choice(valid_ward_ids)))
+            moved += 1
+        return moved
 
-        mean_uniq_deps = sum(mean_uniq_deps_list) / len(mean_uniq_deps_list)
-        self.add_score(self.uniq_departments_scoring_factor * mean_uniq_deps)
+    def assign_wards(self, genome: np.ndarray):
+        """
+        Function to fill an empty schedule from the ward assigned to each placement,
+        as produced by schedule_generation
 
-        self.schedule_eval_scores["mean_uniq_deps"] = mean_uniq_deps
+        :param genome: array of the ward id assigned to each placement (-1 where unassigned)
+        :returns: no explicit return but sets the genome class object
+        """
+        self.genome = np.array(genome, dtype=np.int32)
+        self._occupancy = None
 
-        ####################################################################################
-        ## NOTE THAT THE BELOW IS CURRENT TURNED OFF USING BOOLEANS SET AT START OF CLASS ##
-        ####################################################################################
+    def apply_locks(self, warm_start: "WarmStart"):
+        """
+        Function to give each placement locked by a warm start its locked ward, and stop mutation moving it
 
-        ## Enforce at least one Medical placement
-        ## Increase score if assigned to a Medical ward ##
-        self.check_specific_speciality(
-            self.medical_placement_check,
-            ["Medical", "Medicine"],
-            self.medical_placement_scoring_factor,
-        )
+        :param warm_start: WarmStart with the locked placements
+        :returns: no explicit return but updates the genome and locked class objects
+        """
+        if not warm_start.locked.any():
+            return
+        self.locked = warm_start.locked
+        self.genome[self.locked] = warm_start.genome[self.locked]
+        self._occupancy = None
+        self.fitness_state = None
+        self.dirty = True
 
-        ## Increase score if assigned to a Surgical ward ##
-        self.check_specific_speciality(
-            self.surgical_placement_check,
-            ["Surgical", "Surgery"],
-            self.surgical_placement_scoring_factor,
-        )
+    def clean_departments(self, output_string: str) -> list:
+        """
+        Function to clean up a list of department names for analysis. Removes some non-required words.
 
-        ## Increase score if assigned to a Community ward ##
-        self.check_specific_speciality(
-            self.community_placement_check,
-            ["Community"],
-            self.community_placement_scoring_factor,
-        )
+        :params output_string: the string to be cleaned, containing multiple department names
+        :returns: a clean list of individual words seen in original string
+        """
+        return ProblemIndex.clean_departments(output_string)
 
-        ## Increase score if assigned to a Critical Care ward ##
-        self.check_specific_speciality(
-            self.critical_care_placement_check,
-            ["Critical", "Emergency"],
-            self.critical_care_placement_scoring_factor,
-        )
+    def fitness_inputs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Function to convert the genome into the arrays used to score the schedule
 
-        ## Increase fitness if all placements assigned ##
-        if len(placementsToAllocate) == 0 and len(unallocatedPlacements) == 0:
-            self.add_score(self.all_placements_assigned_scoring_factor)
-        else:
-            self.viable = False
-            self.non_viable_reason = "Placement not allocated"
-
-        ## Increase fitness based on placement capacity utilisation #
-        avg_utilisation = sum(ward_utilisation) / len(ward_utilisation)
-        self.add_score(avg_utilisation * self.capacity_utilisation_scoring_factor)
-
-        # Calculate maximum score
-        max_score = (  # Must have scoring components
-            (len(self.conf_placements) * self.within_capacity_scoring_factor)
-            + (  # Exceeded capacity component
-                len(self.conf_placements) * self.double_booked_scoring_factor
-            )
-            + (  # Double booked component
-                len(self.conf_placements) * self.all_placements_assigned_scoring_factor
-            )
-            +  # All placements allocated component
-            # Nice to have scoring components
-            (self.uniq_departments_scoring_factor)
-            + (self.uniq_wards_scoring_factor)  # Unique departments component
-            + (self.capacity_utilisation_scoring_factor)  # Unique wards component
-            +  # Average utilisation component
-            # Speciality specific scoring components
-            (
-                self.medical_placement_check
-                * len(self.placement_wards.values())
-                * self.medical_placement_scoring_factor
-            )
-            + (  # Medical ward component
-                self.surgical_placement_check
-                * len(self.placement_wards.values())
-                * self.surgical_placement_scoring_factor
-            )
-            + (  # Surgical ward component
-                self.community_placement_check
-                * len(self.placement_wards.values())
-                * self.community_placement_scoring_factor
-            )
-            + (  # Community ward component
-                self.critical_care_placement_check
-                * len(self.placement_wards.values())
-                * self.critical_care_placement_scoring_factor
-            )  # High Dependency ward component
-        )
-        if len(self.conf_placements):
-            self.fitness = float(self.schedule_scores) / max_score
-        else:
-            self.fitness = 0
+        :returns: arrays of the position of each assigned placement within placements and the ward id it is assigned to
+        """
+        placement_indices = np.flatnonzero(self.genome >= 0)
+        ward_indices = self.genome[placement_indices].astype(np.int64)
+        return placement_indices, ward_indices
 
-        if self.viable is None:
-            self.viable = True
+    def get_fitness(self):
+        """
+        Function to assess the fitness of each schedule according to a range of metrics. For details of the
+        metrics see FitnessEvaluator.
 
-    def check_specific_speciality(
-        self, check_boolean: Boolean, check_words: list, check_score: int
-    ):
+        :returns: no explicit return but updates various class object parameters
         """
-        Function to check presence of specific words in specialities list for a student
+        #Genomes which have been scored before are looked up rather than scored again
+        key = self.evaluator.cache.key(self.genome)
+        result = self.evaluator.cache.get(key)
+        if result is None:
+            result = self.evaluator.evaluate(*self.fitness_inputs())
+            self.evaluator.cache.put(key, result)
+        self.set_fitness(result)
+
+    def score_fitness_state(self):
         """
-        if check_boolean:
-            check_words_regex = re.compile("|".join(check_words))
-            for assigned_departments in self.placement_deps.values():
-                if check_words_regex.search(assigned_departments):
-                    self.add_score(check_score)
+        Function to score the schedule from its fitness state, looking the genome up in the fitness cache first so
+        a schedule which has been scored before is not scored again
 
-    def add_score(self, score: float):
+        :returns: no explicit return but updates various class object parameters
         """
-        Function to add score value to all schedule entries
+        key = self.evaluator.cache.key(self.genome)
+        result = self.evaluator.cache.get(key)
+        if result is None:
+            result = self.fitness_state.result()
+            self.evaluator.cache.put(key, result)
+        self.set_fitness(result)
+
+    def set_fitness(self, result: dict):
+        """
+        Function to store the result of scoring the schedule
 
-        :param score: score to be added to overall total
-        :returns: no explicit return but updates schedule_scores object
+        :param result: dictionary of scores produced by FitnessEvaluator
+        :returns: no explicit return but updates various class object parameters
         """
-        self.schedule_scores += score
+        self.schedule_scores = result["schedule_scores"]
+        self.schedule_eval_scores = result["schedule_eval_scores"]
+        self.fitness = result["fitness"]
+        self.viable = result["viable"]
+        self.dirty = False
+        # The reason from the last time a constraint was breached is kept
+        if result["non_viable_reason"] is not None:
+            self.non_viable_reason = result["non_viable_reason"]
 
     def populate_schedule(self):
         """
-        Function to reconstruct schedules after mutations and recombination to make sure
-        that placements are still structured correctly (prevents
-        mutation/recombination from putting lots of incorrectly located
-        placements in the schedule)
+        Function to rebuild the schedule's occupancy from its genome and score it again
 
-        :returns: no explicit return but updates slots class object
+        :returns: no explicit return but updates occupancy and fitness class objects
         """
-        self.slots = [[] for _ in range(len(self.slots))]
-        for confirmed_placement in self.conf_placements:
-            slotIndex = int(confirmed_placement["slotIndex"])
-            for i in range(0, confirmed_placement["length"]):
-                self.slots[slotIndex].append(confirmed_placement["placement"])
-                slotIndex += 1
-        self.get_fitness()
+        if self.delta_fitness:
+            #The fitness state keeps its own occupancy, which is updated as the schedule is mutated. It is
+            #only rebuilt if it no longer matches the genome
+            placement_indices, ward_indices = self.fitness_inputs()
+            if self.fitness_state is None or not self.fitness_state.matches(
+                placement_indices, ward_indices
+            ):
+                self.fitness_state = FitnessState(self.evaluator, placement_indices, ward_indices)
+            self._occupancy = self.fitness_state.occupancy
+            self.score_fitness_state()
+        else:
+            self.fitness_state = None
+            self._occupancy = None
+            self.get_fitness()
 
     def recombination(
-        self, otherparent: object, num_recomb_points: int, num_offspring: int
+        self,
+        otherparent: object,
+        num_recomb_points: int,
+        num_offspring: int,
+        rng: random.Random = random,
     ) -> list:
         """
-        Function to produce offspring by combining two parent schedules,
-        with 2 crossing points. This will yield:
+        Function to produce offspring by combining the genomes of two parent schedules
+        at crossing points. With 2 crossing points this will yield:
         p1 = [0 0 0 1 1 0 0 1 0 1]
         p2 = [1 0 1 0 0 0 1 0 0 0]
         p1 [combined with] p2 = [0 0|1 0 0 0 1|1 0 1]
         which corresponds to [p1 | p2 | p1] being combined after
-        the 3rd and 7th indices
+        the 3rd and 7th indices. Each further offspring starts from the other parent.
+        Neither parent is changed.
 
         :param otherparent: other schedule for recombination to be carried out with
         :param num_recomb_points: integer number of crossing over points to be used
         :param num_offspring: integer number of offspring to produce
+        :param rng: random number generator used to choose the crossing points (the random module if not given)
         :returns: list of recombined schedule objects
         """
-        pop_size = len(self.conf_placements)
+        pop_size = len(self.genome)
         rcp = []
-        for i in range(num_recomb_points, 0, -1):
+        for i in range(min(num_recomb_points, pop_size), 0, -1):
             check_point = False
             while not check_point:
-                p = randrange(pop_size)
+                p = rng.randrange(pop_size)
                 if p not in rcp:
                     rcp.append(p)
                     check_point = True
         rcp = sorted(rcp)
 
+        #Number of crossing points before each placement, which alternates
+        #the parent it is taken from
+        from_first_parent = np.searchsorted(rcp, np.arange(pop_size), side="right") % 2 == 0
         offspring_list = []
-        prev_index = 0
-
-        shuffle(self.conf_placements)
-        shuffle(otherparent.conf_placements)
-
-        parents = [self.conf_placements, otherparent.conf_placements]
-        first_parent = True
         for i in range(num_offspring):
-            offspring = Schedule(
-                self.placement_slots, self.wards, self.placements, self.num_weeks
-            )
-            for index in rcp:
-                list_index = rcp.index(index)
-                if first_parent:
-                    parent_index = 0
-                    other_index = 1
-                else:
-                    parent_index = 1
-                    other_index = 0
-                if list_index == 0:
-                    offspring.conf_placements += parents[parent_index][0:index]
-                elif index == rcp[-1]:
-                    prev_index = rcp[list_index - 1]
-                    offspring.conf_placements += parents[other_index][prev_index:index]
-                    offspring.conf_placements += parents[parent_index][index:]
-                else:
-                    prev_index = rcp[list_index - 1]
-                    offspring.conf_placements += parents[parent_index][prev_index:index]
-                first_parent = not first_parent
+            offspring = self.child(np.where(
+                from_first_parent == (i % 2 == 0), self.genome, otherparent.genome
+            ).astype(np.int32))
             offspring.generation = max(self.generation, otherparent.generation) + 1
-            offspring.populate_schedule()
+            offspring.non_viable_reason = None
+            if self.repair_offspring:
+                #Splicing the parents can take wards over capacity
+                offspring.repair(rng)
+            offspring.get_fitness()
             offspring_list.append(offspring)
 
         return offspring_list
 
-    def mutation(self, num_mutations: int) -> object:
+    def mutation(self, num_mutations: int, rng: random.Random = random) -> object:
         """
         Function to mutate the location of one of the placements within a schedule
 
         :param num_mutations: integer number of mutations to introduce to mutated schedule
+        :param rng: random number generator used to choose the mutations (the random module if not given)
         :returns: mutated schedule object
         """
-        mutation_schedule = copy.copy(self)
+        placement_indices, ward_indices = self.fitness_inputs()
+        mutation_schedule = self.child(self.genome.copy())
+        if self.delta_fitness:
+            #Only the moved placements are rescored, starting from a copy of this schedule's fitness state
+            if self.fitness_state is None or not self.fitness_state.matches(
+                placement_indices, ward_indices
+            ):
+                self.fitness_state = FitnessState(self.evaluator, placement_indices, ward_indices)
+            mutation_schedule.fitness_state = self.fitness_state.copy()
+            mutation_schedule._occupancy = mutation_schedule.fitness_state.occupancy
 
+        #Locked placements are never moved
+        movable = None if self.locked is None else np.flatnonzero(~self.locked[placement_indices])
+        moved = []
         for i in range(0, num_mutations):
-            placement_index = randint(0, len(mutation_schedule.conf_placements) - 1)
-            ward_index = randint(0, len(self.wards) - 1)
-            mutation_schedule.conf_placements[placement_index][
-                "slotIndex"
-            ] = self.calc_slot_index(
-                ward_index,
-                self.num_weeks,
-                mutation_schedule.conf_placements[placement_index]["startweek"],
-            )
+            if movable is None:
+                entry = rng.randint(0, len(placement_indices) - 1)
+            elif len(movable):
+                entry = int(movable[rng.randint(0, len(movable) - 1)])
+            else:
+                break
+            ward_index = rng.randint(0, len(self.wards) - 1)
+            mutation_schedule.genome[placement_indices[entry]] = ward_index
+            moved.append(placement_indices[entry])
+            if self.delta_fitness:
+                mutation_schedule.fitness_state.move(entry, ward_index)
+        if self.repair_offspring and moved:
+            #Only the moved placements can have been put on a ward which is ineligible or over capacity
+            mutation_schedule.repair(rng, np.unique(moved))
 
         mutation_schedule.generation = self.generation + 1
-        mutation_schedule.populate_schedule()
+        if self.delta_fitness:
+            mutation_schedule.score_fitness_state()
+        else:
+            mutation_schedule.get_fitness()
         return mutation_schedule
 
     def produce_dataframe(self) -> pd.DataFrame:
         """
-        Function to save results out to a CSV
+        Function to expand the schedule into a dataframe with a row for each week of each placement
 
         :returns: a pandas dataframe summarising the schedule generated
         """
@@ -621,39 +537,37 @@ class Schedule:
         placement_week = []
         is_driver = []
         ward_history = []
-        for i in range(0, len(self.slots)):
+
+        # Expand each placement into the slots it occupies, in slot order
+        placement_weeks = []
+        for placement_index in np.flatnonzero(self.genome >= 0):
+            placement = self.placements[placement_index]
+            slotIndex = self.calc_slot_index(int(self.genome[placement_index]), self.num_weeks, placement.start)
+            for i in range(0, int(placement.duration)):
+                placement_weeks.append((slotIndex + i, placement))
+        placement_weeks.sort(key=lambda placement_week: placement_week[0])
+
+        for i, schedule_placement in placement_weeks:
             ward_index = int(math.floor(i / len(self.placement_slots)))
             week_index = i - (ward_index * self.num_weeks)
-            if i % len(self.placement_slots) == 0:
-                ward_name = self.wards[ward_index].ward
-                ward_dep = self.wards[ward_index].department
-                ward_cap = self.wards[ward_index].capacity
-                p1_ward_cap = self.wards[ward_index].p1_capacity
-                p2_ward_cap = self.wards[ward_index].p2_capacity
-                p3_ward_cap = self.wards[ward_index].p3_capacity
-                ward_ed_audit = self.wards[ward_index].ed_audit_expiry_week
-
-            scheduled_placements = self.slots[i]
-
-            for schedule_placement in scheduled_placements:
-                if schedule_placement is not None:
-                    ward_names.append(ward_name)
-                    ward_deps.append(ward_dep)
-                    ward_caps.append(ward_cap)
-                    ward_p1_caps.append(p1_ward_cap)
-                    ward_p2_caps.append(p2_ward_cap)
-                    ward_p3_caps.append(p3_ward_cap)
-                    ward_ed_audits.append(ward_ed_audit)
-                    student_names.append(schedule_placement.student_name)
-                    placement_names.append(schedule_placement.name)
-                    placement_cohorts.append(schedule_placement.cohort)
-                    placement_parts.append(schedule_placement.part)
-                    placement_start.append(schedule_placement.start)
-                    placement_start_dates.append(schedule_placement.start_date)
-                    placement_week.append(week_index)
-                    placement_durations.append(schedule_placement.duration)
-                    is_driver.append(schedule_placement.is_driver)
-                    ward_history.append(schedule_placement.wardhistory)
+            ward = self.wards[ward_index]
+            ward_names.append(ward.ward)
+            ward_deps.append(ward.department)
+            ward_caps.append(ward.capacity)
+            ward_p1_caps.append(ward.p1_capacity)
+            ward_p2_caps.append(ward.p2_capacity)
+            ward_p3_caps.append(ward.p3_capacity)
+            ward_ed_audits.append(ward.ed_audit_expiry_week)
+            student_names.append(schedule_placement.student_name)
+            placement_names.append(schedule_placement.name)
+            placement_cohorts.append(schedule_placement.cohort)
+            placement_parts.append(schedule_placement.part)
+            placement_start.append(schedule_placement.start)
+            placement_start_dates.append(schedule_placement.start_date)
+            placement_week.append(week_index)
+            placement_durations.append(schedule_placement.duration)
+            is_driver.append(schedule_placement.is_driver)
+            ward_history.append(schedule_placement.wardhistory)
 
         schedule_df = pd.DataFrame(
             {
@@ -680,47 +594,28 @@ class Schedule:
         schedule_df.sort_values(
             by=["placement_name", "placement_start", "placement_week"], inplace=True
         )
+        return schedule_df
 
-        script_directory = os.path.dirname(os.path.abspath(__file__))
-        save_directory = os.path.join(script_directory, "..", "results")
-
-        try:
-            os.makedirs(save_directory)
-        except OSError:
-            pass  # already exists
+    def report_dataframe(self) -> pd.DataFrame:
+        """
+        Function to produce the dataframe shared by the quality checks and the report
 
-        now = datetime.now().strftime("%d_%m_%Y_%H_%M_%S")
-        full_save_path = os.path.join(save_directory, f"sched_output_{now}.csv")
-        schedule_df.to_csv(full_save_path)
-        return schedule_df
+        :returns: a pandas dataframe with a row for each week of each placement (see ScheduleReport.prepare)
+        """
+        return ScheduleReport.prepare(self.produce_dataframe())
 
-    def schedule_quality_check(self) -> Tuple[int, int, int, int]:
+    def schedule_quality_check(self, schedule: pd.DataFrame = None) -> Tuple[int, int, int, int]:
         """
         Function to do some basic checks to make sure all rules have worked as desired
 
+        :param schedule: dataframe from report_dataframe, produced if not given
         :returns: counts of the number of schedules affected by poor quality
         """
         # Check that everyone has all placements assigned
         self.quality_metrics = {}
 
-        schedule = self.produce_dataframe()
-
-        schedule["placement_start_week"] = schedule["placement_week"]
-        schedule["nurse_id"] = None
-        schedule["block"] = None
-        schedule[["nurse_id", "block"]] = schedule["placement_name"].str.split(
-            "_", expand=True, n=1
-        )
-
-        schedule["ward_name"] = schedule["ward_name"].fillna("None")
-        schedule["placement_week_date"] = pd.to_datetime(
-            schedule.placement_start_date.min()
-        )
-        schedule["placement_offset"] = (schedule["placement_week"] - 1) * 7
-        schedule["placement_week_date"] = schedule[
-            "placement_week_date"
-        ] + pd.to_timedelta(schedule["placement_offset"], unit="d")
-        schedule = schedule.drop("placement_offset", axis=1)
+        if schedule is None:
+            schedule = self.report_dataframe()
 
         all_assigned_check = schedule[["placement_name", "block"]]
         all_assigned_check = all_assigned_check.drop_duplicates()
@@ -867,222 +762,20 @@ class Schedule:
     
     def save_report(self, file_no) -> str:
         """
-        Function to save down the formatted versions of the schedules including
-        a number of views
+        Function to save down the schedule as a report to be downloaded. The quality checks are done now, but the
+        formatted views and the workbook are only built when the report's content is first needed (see
+        ScheduleReport). The report is kept as the report class object
 
+        :param file_no: integer number of the run, used in the file name
         :returns: the file name of the saved down report
         """
-        schedule = self.produce_dataframe()
-
-        schedule["placement_start_week"] = schedule["placement_week"]
-        schedule["nurse_id"] = None
-        schedule["block"] = None
-        schedule[["nurse_id", "block"]] = schedule["placement_name"].str.split(
-            "_", expand=True, n=1
-        )
-
-        schedule["ward_name"] = schedule["ward_name"].fillna("None")
-        schedule["placement_week_date"] = pd.to_datetime(
-            schedule.placement_start_date.min()
-        )
-        schedule["placement_offset"] = (schedule["placement_week"] - 1) * 7
-        schedule["placement_week_date"] = schedule[
-            "placement_week_date"
-        ] + pd.to_timedelta(schedule["placement_offset"], unit="d")
-        schedule = schedule.drop("placement_offset", axis=1)
-        (
-            incorrect_num_plac_rows,
-            incorrect_len_rows,
-            cap_exceeded_rows,
-            double_booked_rows,
-        ) = self.schedule_quality_check()
-
-        # Student-level ward allocation
-        nurse_sch = schedule[["nurse_name", "nurse_id", "placement_week_date", "ward_name"]]
-        nurse_sch_formatted = (
-            nurse_sch.groupby(["nurse_name", "nurse_id", "placement_week_date"])
-            .ward_name.first()
-            .unstack()
-        )
-
-        # Ward-level student allocation
-        ward_sch = schedule[["nurse_name", "nurse_id", "placement_week_date", "ward_name"]]
-        ward_sch_formatted = (
-            ward_sch.groupby(["ward_name", "placement_week_date"])
-            .agg({"nurse_name":", ".join,
-                  "nurse_id": ", ".join})
-            .unstack()
-        )
-
-        # Ward hours bases on 37.5 hour weeks
-        ward_hours_sch = schedule[["nurse_id", "placement_week_date", "ward_name"]]
-        ward_hours_sch_formatted = (
-            ward_hours_sch.groupby(["ward_name", "placement_week_date"])
-            .nurse_id.count()
-            .unstack()
-        )
-        ward_hours_sch_formatted.fillna(0.0, inplace=True)
-        ward_hours_sch_formatted = ward_hours_sch_formatted * 37.5
-
-        # Ward hours bases on 37.5 hour weeks
-        cohort_hours_sch = schedule[
-            ["nurse_id", "placement_week_date", "nurse_uni_cohort"]
-        ]
-        cohort_hours_sch_formatted = (
-            cohort_hours_sch.groupby(["nurse_uni_cohort", "placement_week_date"])
-            .nurse_id.count()
-            .unstack()
-        )
-        cohort_hours_sch_formatted.fillna(0.0, inplace=True)
-        cohort_hours_sch_formatted = cohort_hours_sch_formatted * 37.5
-
-        # Ward Utilisation
-        ward_util_sch = schedule[["nurse_id", "placement_week_date", "ward_name"]]
-        ward_util_sch_caps = schedule[["ward_name", "ward_capacity"]]
-        ward_util_sch_caps = ward_util_sch_caps.drop_duplicates()
-        ward_util_sch_caps.set_index("ward_name", inplace=True)
-        ward_util_sch_formatted = (
-            ward_util_sch.groupby(["ward_name", "placement_week_date"])
-            .nurse_id.count()
-            .unstack()
-        )
-        ward_util_sch_formatted.fillna(0.0, inplace=True)
-        ward_util_sch_formatted = ward_util_sch_formatted.merge(
-            ward_util_sch_caps, left_index=True, right_index=True
-        )
-        ward_util_sch_formatted = ward_util_sch_formatted.astype(float)
-        df_cols = list(ward_util_sch_formatted.columns)
-        df_cols.remove("ward_capacity")
-        ward_util_sch_formatted[df_cols] = (
-            ward_util_sch_formatted[df_cols].div(
-                ward_util_sch_formatted["ward_capacity"], axis=0
-            )
-            * 100
-        )
-        ward_util_sch_formatted = ward_util_sch_formatted.round(2)
-
-        # Quarterly utilisation
-        ward_q_util_sch = schedule[["nurse_id", "placement_week_date", "ward_name"]]
-        ward_q_util_sch_caps = schedule[["ward_name", "ward_capacity"]]
-        ward_q_util_sch_caps = ward_q_util_sch_caps.drop_duplicates()
-        ward_q_util_sch_caps.set_index("ward_name", inplace=True)
-        ward_q_util_sch.set_index("ward_name", inplace=True)
-        ward_q_util_sch_capacities = ward_q_util_sch.merge(
-            ward_q_util_sch_caps, left_index=True, right_index=True
-        )
-        ward_q_util = pd.DataFrame(
-            ward_q_util_sch_capacities.groupby(
-                ["ward_name", "placement_week_date", "ward_capacity"]
-            )["nurse_id"].count()
-        )
-        ward_q_util.reset_index(inplace=True)
-        ward_q_util.columns = [
-            "ward_name",
-            "placement_week_date",
-            "ward_capacity",
-            "student_count",
-        ]
-        ward_q_util["util"] = (
-            ward_q_util["student_count"] / ward_q_util["ward_capacity"]
-        )
-        ward_q_util["placement_q"] = ward_q_util["placement_week_date"].dt.to_period(
-            "Q"
-        )
-        ward_q_util_formatted = (
-            ward_q_util.groupby(["ward_name", "placement_q"]).util.mean().unstack()
-        )
-        ward_q_util_formatted = ward_q_util_formatted.fillna(0.0)
-        ward_q_util_formatted = ward_q_util_formatted.round(2)
-
-        # Placements on wards with expired education audits
-        ed_aud_exp = schedule[
-            [
-                "nurse_name",
-                "nurse_id",
-                "ward_name",
-                "placement_start",
-                "placement_duration",
-                "ed_audit_exp_week",
-            ]
-        ]
-        ed_aud_exp_fail = ed_aud_exp[
-            ed_aud_exp.ed_audit_exp_week
-            < (ed_aud_exp.placement_start + ed_aud_exp.placement_duration + 1)
-        ]
-        ed_aud_exp_fail = ed_aud_exp_fail.drop(
-            ["placement_start", "placement_duration", "ed_audit_exp_week"], axis=1
-        )
-        ed_aud_exp_fail = ed_aud_exp_fail.drop_duplicates()
-        ed_aud_exp_fail = ed_aud_exp_fail.sort_values(by="ward_name")
-
-        script_directory = os.path.dirname(os.path.abspath(__file__))
-        save_directory = os.path.join(script_directory, "..", "results")
-        try:
-            os.makedirs(save_directory)
-        except OSError:
-            pass  # already exists
+        schedule = self.report_dataframe()
+        quality_rows = self.schedule_quality_check(schedule)
 
         now = datetime.now().strftime("%d-%m-%Y %H-%M")
         output_file_no = file_no + 1
         file_name = f"{now} schedule output {output_file_no}-{self.viable}.xlsx"
         self.file_name = file_name
 
-        ###UHPT Output
-        schedule['placement'] = [i[1].strip() for i in
-                                     schedule['placement_name'].str.split(':')]
-        UHPT_schedule = (schedule[['nurse_uni_cohort', 'placement_part',
-                                   'nurse_id', 'nurse_name', 'is_driver?',
-                                   'ward_history', 'placement', 'ward_name']]
-                                   .drop_duplicates()
-                            .pivot(index=['nurse_uni_cohort', 'placement_part',
-                                          'nurse_id', 'nurse_name', 'is_driver?',
-                                          'ward_history'], columns='placement',
-                                          values='ward_name')).reset_index()
-        
-        #Function to make the excel file needed to create the download link
-        #(put within this function for one off use and to save typing out a long
-        #list of data frames)
-        def schedule_output_to_excel():
-            buffer = io.BytesIO()
-            writer = pd.ExcelWriter(buffer, engine='xlsxwriter')
-            UHPT_schedule.to_excel(writer, sheet_name="UHPT_Output", index=False)
-            ed_aud_exp_fail.to_excel(writer, sheet_name="wards_expired_audits",
-                                     index=False)
-            if incorrect_num_plac_rows is not None:
-                incorrect_num_plac_rows.to_excel(writer,
-                                                 sheet_name="incorrect_num_placements",
-                                                 index=False)
-            if incorrect_len_rows is not None:
-                incorrect_len_rows.to_excel(writer,
-                                            sheet_name="incorrect_len_placements",
-                                            index=False)
-            if cap_exceeded_rows is not None:
-                cap_exceeded_rows.to_excel(writer, sheet_name="capacity_exceeded",
-                                           index=False)
-            if double_booked_rows is not None:
-                double_booked_rows.to_excel(writer, sheet_name="double_booked_students",
-                                            index=False)
-            nurse_sch_formatted.to_excel(writer, sheet_name="nurse_schedule")
-            ward_sch_formatted.to_excel(writer, sheet_name="ward_schedule")
-            ward_hours_sch_formatted.to_excel(writer, sheet_name="ward_hours_schedule")
-            cohort_hours_sch_formatted.to_excel(writer,
-                                                sheet_name="cohort_hours_schedule")
-            ward_util_sch_formatted.to_excel(writer,
-                                             sheet_name="ward_weekly_util_schedule")
-            ward_q_util_formatted.to_excel(writer,
-                                           sheet_name="ward_quarterly_util_schedule")
-            writer.close()
-            output = buffer.getvalue()
-            return output
-        #Append the file and file name to the list of files
-        self.files.append((schedule_output_to_excel(), self.file_name))
+        self.report = ScheduleReport(schedule, quality_rows)
         return file_name
-    
-    def create_download_link(val, filename):
-        """Function to create a download link for the generated file.  Doing
-        it this way stops streamlit from refreshing the whole page.
-        Returns:
-        string : file download link
-        """
-        b64 = base64.b64encode(val)
-        return f'<a href="data:application/octet-stream;base64,{b64.decode()}" download="{filename}">Download {filename}</a>'
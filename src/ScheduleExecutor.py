@@ -0,0 +1,155 @@
+import math
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.Schedule import Schedule
+
+# Information shared by every task, set once in each worker process
+_shared = {}
+
+
+def _init_shared(
+    slots: list,
+    wards: list,
+    placements: list,
+    num_weeks: int,
+    index: "ProblemIndex",
+    params: "Params",
+):
+    """
+    Function to store the information needed to generate schedules, so it is only sent to each worker once
+
+    :param slots: A list of all potential placement week positions
+    :param wards: A list of all potential wards that placements can be taken on
+    :param placements: A list of all placements to be allocated
+    :param num_weeks: Integer number of weeks that placements will take place over
+    :param index: ProblemIndex of ward and placement information
+    :param params: Params for the run
+    :returns: no explicit return but sets the module's shared information
+    """
+    _shared.update(
+        slots=slots,
+        wards=wards,
+        placements=placements,
+        num_weeks=num_weeks,
+        index=index,
+        params=params,
+    )
+
+
+def _generate(seeds: list, shared: dict = None) -> list:
+    """
+    Function to randomly generate one schedule for each seed. The schedules are not scored, so no FitnessEvaluator
+    is built
+
+    :param seeds: list of integer seeds, one for each schedule
+    :param shared: dictionary of the information set by _init_shared, the worker process's own if not given
+    :returns: list of arrays of the ward id assigned to each placement (-1 where unassigned)
+    """
+    if shared is None:
+        shared = _shared
+    genomes = []
+    for seed in seeds:
+        schedule_obj = Schedule(
+            shared["slots"],
+            shared["wards"],
+            shared["placements"],
+            shared["num_weeks"],
+            shared["index"],
+            None,
+            shared["params"],
+        )
+        schedule_obj.schedule_generation(random.Random(seed))
+        genomes.append(schedule_obj.genome)
+    return genomes
+
+
+class ScheduleExecutor:
+    """
+    The ScheduleExecutor generates new schedules for the genetic algorithm, either in the main process or spread
+    across a pool of worker processes. Each schedule is generated from its own seed, so the same schedules are
+    produced whatever the number of workers. The wards, placements and scoring information are given to each
+    worker once when the pool starts, and only seeds and genomes are passed between processes.
+
+    Only the generation of new schedules (when the population is seeded and in culling) is spread across the
+    workers. Mutation, recombination and the scoring of every schedule are done in the process carrying out the
+    run, as they depend on the population and need each schedule's occupancy and fitness state.
+
+    If workers is 1 or less, or the pool cannot be used, schedules are generated in the main process.
+
+    :param slots: A list of all potential placement week positions
+    :param wards: A list of all potential wards that placements can be taken on
+    :param placements: A list of all placements to be allocated
+    :param num_weeks: Integer number of weeks that placements will take place over
+    :param index: ProblemIndex of ward and placement information
+    :param params: Params for the run
+    :param workers: Integer number of worker processes to use
+    """
+
+    # Number of batches of seeds given to each worker for each request
+    batches_per_worker = 4
+
+    def __init__(
+        self,
+        slots: list,
+        wards: list,
+        placements: list,
+        num_weeks: int,
+        index: "ProblemIndex",
+        params: "Params",
+        workers: int = 1,
+    ):
+        self.shared = (slots, wards, placements, num_weeks, index, params)
+        # The information used when generating in this process, kept by the executor so that executors for
+        # different problems (e.g. the runs of different users of the app) do not share it
+        self.local = dict(
+            slots=slots, wards=wards, placements=placements, num_weeks=num_weeks, index=index, params=params
+        )
+        self.workers = workers
+        self.pool = None
+        if workers > 1:
+            try:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_shared, initargs=self.shared
+                )
+            except (OSError, NotImplementedError) as e:
+                print(f"WARNING: Unable to start worker processes, generating schedules serially ({e})")
+
+    def __enter__(self) -> "ScheduleExecutor":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Function to shut down the worker processes, if there are any
+
+        :returns: no explicit return
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def generate(self, seeds: list) -> list:
+        """
+        Function to randomly generate one schedule for each seed
+
+        :param seeds: list of integer seeds, one for each schedule
+        :returns: list of arrays of the ward id assigned to each placement (-1 where unassigned), in the same
+        order as seeds
+        """
+        if self.pool is not None:
+            batch_size = max(1, math.ceil(len(seeds) / (self.workers * self.batches_per_worker)))
+            batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+            try:
+                return [
+                    np.asarray(genome)
+                    for genomes in self.pool.map(_generate, batches)
+                    for genome in genomes
+                ]
+            except (OSError, BrokenProcessPool) as e:
+                print(f"WARNING: Worker processes stopped, generating schedules serially ({e})")
+                self.pool = None
+        return _generate(seeds, self.local)
@@ -0,0 +1,268 @@
+import io
+import os
+from datetime import datetime
+import pandas as pd
+
+
+class ScheduleReport:
+    """
+    A ScheduleReport holds what is needed to produce the downloadable workbook for a chosen schedule: the
+    dataframe with a row for each week of each placement and the rows found by the schedule's quality checks.
+    The views of the schedule and the workbook are only built when the content is first needed, so nothing is
+    rendered for schedules which are never downloaded.
+
+    :param schedule: dataframe of the schedule prepared by prepare, shared with the quality checks
+    :param quality_rows: tuple of the rows with the wrong number of placements, the wrong placement length,
+    exceeded capacity and double booked students (each None if there are none), from Schedule.schedule_quality_check
+    :param csv_directory: directory a CSV of the schedule is saved to when the workbook is built, the results folder
+    if not given. It can be changed before the content is first needed, or set to None to not save the CSV
+    """
+
+    # Columns added to the schedule dataframe by prepare
+    derived_columns = ["placement_start_week", "nurse_id", "block", "placement_week_date"]
+
+    # Folder the schedule CSV is saved to by default
+    results_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "results")
+
+    def __init__(self, schedule: pd.DataFrame, quality_rows: tuple, csv_directory: str = results_directory):
+        self.schedule = schedule
+        self.quality_rows = quality_rows
+        self.csv_directory = csv_directory
+        self._content = None
+
+    @staticmethod
+    def prepare(schedule: pd.DataFrame) -> pd.DataFrame:
+        """
+        Function to add the columns used by the quality checks and the report to the dataframe produced by
+        Schedule.produce_dataframe
+
+        :param schedule: dataframe with a row for each week of each placement
+        :returns: the same dataframe with the student id, placement block and week date added
+        """
+        schedule["placement_start_week"] = schedule["placement_week"]
+        schedule["nurse_id"] = None
+        schedule["block"] = None
+        schedule[["nurse_id", "block"]] = schedule["placement_name"].str.split(
+            "_", expand=True, n=1
+        )
+
+        schedule["ward_name"] = schedule["ward_name"].fillna("None")
+        schedule["placement_week_date"] = pd.to_datetime(
+            schedule.placement_start_date.min()
+        )
+        schedule["placement_offset"] = (schedule["placement_week"] - 1) * 7
+        schedule["placement_week_date"] = schedule[
+            "placement_week_date"
+        ] + pd.to_timedelta(schedule["placement_offset"], unit="D")
+        schedule = schedule.drop("placement_offset", axis=1)
+        return schedule
+
+    @property
+    def content(self) -> bytes:
+        """
+        Contents of the .xlsx workbook, built the first time they are needed
+
+        :returns: bytes of the workbook
+        """
+        if self._content is None:
+            if self.csv_directory is not None:
+                self.save_csv()
+            self._content = self.build_workbook()
+        return self._content
+
+    def save_csv(self):
+        """
+        Function to save the schedule out to a CSV in csv_directory
+
+        :returns: no explicit return, the CSV is written to csv_directory
+        """
+        try:
+            os.makedirs(self.csv_directory)
+        except OSError:
+            pass  # already exists
+
+        now = datetime.now().strftime("%d_%m_%Y_%H_%M_%S")
+        full_save_path = os.path.join(self.csv_directory, f"sched_output_{now}.csv")
+        self.schedule.drop(self.derived_columns, axis=1).to_csv(full_save_path)
+
+    def build_workbook(self) -> bytes:
+        """
+        Function to build the formatted views of the schedule and write them to a workbook, including the UHPT
+        output, student and ward schedules, hours, utilisation and the rows found by the quality checks
+
+        :returns: bytes of the .xlsx workbook
+        """
+        schedule = self.schedule.copy()
+        (
+            incorrect_num_plac_rows,
+            incorrect_len_rows,
+            cap_exceeded_rows,
+            double_booked_rows,
+        ) = self.quality_rows
+
+        # Student-level ward allocation
+        nurse_sch = schedule[["nurse_name", "nurse_id", "placement_week_date", "ward_name"]]
+        nurse_sch_formatted = (
+            nurse_sch.groupby(["nurse_name", "nurse_id", "placement_week_date"])
+            .ward_name.first()
+            .unstack()
+        )
+
+        # Ward-level student allocation
+        ward_sch = schedule[["nurse_name", "nurse_id", "placement_week_date", "ward_name"]]
+        ward_sch_formatted = (
+            ward_sch.groupby(["ward_name", "placement_week_date"])
+            .agg({"nurse_name":", ".join,
+                  "nurse_id": ", ".join})
+            .unstack()
+        )
+
+        # Ward hours bases on 37.5 hour weeks
+        ward_hours_sch = schedule[["nurse_id", "placement_week_date", "ward_name"]]
+        ward_hours_sch_formatted = (
+            ward_hours_sch.groupby(["ward_name", "placement_week_date"])
+            .nurse_id.count()
+            .unstack()
+        )
+        ward_hours_sch_formatted.fillna(0.0, inplace=True)
+        ward_hours_sch_formatted = ward_hours_sch_formatted * 37.5
+
+        # Ward hours bases on 37.5 hour weeks
+        cohort_hours_sch = schedule[
+            ["nurse_id", "placement_week_date", "nurse_uni_cohort"]
+        ]
+        cohort_hours_sch_formatted = (
+            cohort_hours_sch.groupby(["nurse_uni_cohort", "placement_week_date"])
+            .nurse_id.count()
+            .unstack()
+        )
+        cohort_hours_sch_formatted.fillna(0.0, inplace=True)
+        cohort_hours_sch_formatted = cohort_hours_sch_formatted * 37.5
+
+        # Ward Utilisation
+        ward_util_sch = schedule[["nurse_id", "placement_week_date", "ward_name"]]
+        ward_util_sch_caps = schedule[["ward_name", "ward_capacity"]]
+        ward_util_sch_caps = ward_util_sch_caps.drop_duplicates()
+        ward_util_sch_caps.set_index("ward_name", inplace=True)
+        ward_util_sch_formatted = (
+            ward_util_sch.groupby(["ward_name", "placement_week_date"])
+            .nurse_id.count()
+            .unstack()
+        )
+        ward_util_sch_formatted.fillna(0.0, inplace=True)
+        ward_util_sch_formatted = ward_util_sch_formatted.merge(
+            ward_util_sch_caps, left_index=True, right_index=True
+        )
+        ward_util_sch_formatted = ward_util_sch_formatted.astype(float)
+        df_cols = list(ward_util_sch_formatted.columns)
+        df_cols.remove("ward_capacity")
+        ward_util_sch_formatted[df_cols] = (
+            ward_util_sch_formatted[df_cols].div(
+                ward_util_sch_formatted["ward_capacity"], axis=0
+            )
+            * 100
+        )
+        ward_util_sch_formatted = ward_util_sch_formatted.round(2)
+
+        # Quarterly utilisation
+        ward_q_util_sch = schedule[["nurse_id", "placement_week_date", "ward_name"]]
+        ward_q_util_sch_caps = schedule[["ward_name", "ward_capacity"]]
+        ward_q_util_sch_caps = ward_q_util_sch_caps.drop_duplicates()
+        ward_q_util_sch_caps.set_index("ward_name", inplace=True)
+        ward_q_util_sch.set_index("ward_name", inplace=True)
+        ward_q_util_sch_capacities = ward_q_util_sch.merge(
+            ward_q_util_sch_caps, left_index=True, right_index=True
+        )
+        ward_q_util = pd.DataFrame(
+            ward_q_util_sch_capacities.groupby(
+                ["ward_name", "placement_week_date", "ward_capacity"]
+            )["nurse_id"].count()
+        )
+        ward_q_util.reset_index(inplace=True)
+        ward_q_util.columns = [
+            "ward_name",
+            "placement_week_date",
+            "ward_capacity",
+            "student_count",
+        ]
+        ward_q_util["util"] = (
+            ward_q_util["student_count"] / ward_q_util["ward_capacity"]
+        )
+        ward_q_util["placement_q"] = ward_q_util["placement_week_date"].dt.to_period(
+            "Q"
+        )
+        ward_q_util_formatted = (
+            ward_q_util.groupby(["ward_name", "placement_q"]).util.mean().unstack()
+        )
+        ward_q_util_formatted = ward_q_util_formatted.fillna(0.0)
+        ward_q_util_formatted = ward_q_util_formatted.round(2)
+
+        # Placements on wards with expired education audits
+        ed_aud_exp = schedule[
+            [
+                "nurse_name",
+                "nurse_id",
+                "ward_name",
+                "placement_start",
+                "placement_duration",
+                "ed_audit_exp_week",
+            ]
+        ]
+        ed_aud_exp_fail = ed_aud_exp[
+            ed_aud_exp.ed_audit_exp_week
+            < (ed_aud_exp.placement_start + ed_aud_exp.placement_duration + 1)
+        ]
+        ed_aud_exp_fail = ed_aud_exp_fail.drop(
+            ["placement_start", "placement_duration", "ed_audit_exp_week"], axis=1
+        )
+        ed_aud_exp_fail = ed_aud_exp_fail.drop_duplicates()
+        ed_aud_exp_fail = ed_aud_exp_fail.sort_values(by="ward_name")
+
+        ###UHPT Output
+        schedule['placement'] = [i[1].strip() for i in
+                                     schedule['placement_name'].str.split(':')]
+        UHPT_schedule = (schedule[['nurse_uni_cohort', 'placement_part',
+                                   'nurse_id', 'nurse_name', 'is_driver?',
+                                   'ward_history', 'placement', 'ward_name']]
+                                   .drop_duplicates()
+                            .pivot(index=['nurse_uni_cohort', 'placement_part',
+                                          'nurse_id', 'nurse_name', 'is_driver?',
+                                          'ward_history'], columns='placement',
+                                          values='ward_name')).reset_index()
+        
+        #Function to make the excel file needed to create the download link
+        #(put within this function for one off use and to save typing out a long
+        #list of data frames)
+        def schedule_output_to_excel():
+            buffer = io.BytesIO()
+            writer = pd.ExcelWriter(buffer, engine='xlsxwriter')
+            UHPT_schedule.to_excel(writer, sheet_name="UHPT_Output", index=False)
+            ed_aud_exp_fail.to_excel(writer, sheet_name="wards_expired_audits",
+                                     index=False)
+            if incorrect_num_plac_rows is not None:
+                incorrect_num_plac_rows.to_excel(writer,
+                                                 sheet_name="incorrect_num_placements",
+                                                 index=False)
+            if incorrect_len_rows is not None:
+                incorrect_len_rows.to_excel(writer,
+                                            sheet_name="incorrect_len_placements",
+                                            index=False)
+            if cap_exceeded_rows is not None:
+                cap_exceeded_rows.to_excel(writer, sheet_name="capacity_exceeded",
+                                           index=False)
+            if double_booked_rows is not None:
+                double_booked_rows.to_excel(writer, sheet_name="double_booked_students",
+                                            index=False)
+            nurse_sch_formatted.to_excel(writer, sheet_name="nurse_schedule")
+            ward_sch_formatted.to_excel(writer, sheet_name="ward_schedule")
+            ward_hours_sch_formatted.to_excel(writer, sheet_name="ward_hours_schedule")
+            cohort_hours_sch_formatted.to_excel(writer,
+                                                sheet_name="cohort_hours_schedule")
+            ward_util_sch_formatted.to_excel(writer,
+                                             sheet_name="ward_weekly_util_schedule")
+            ward_q_util_formatted.to_excel(writer,
+                                           sheet_name="ward_quarterly_util_schedule")
+            writer.close()
+            output = buffer.getvalue()
+            return output
+        return schedule_output_to_excel()
@@ -0,0 +1,106 @@
+import random
+import numpy as np
+
+
+class Selection:
+    """
+    Selection chooses schedules from the population to be parents for recombination, with fitter schedules more
+    likely to be chosen. The method is set by selection_method in config/params.yml:
+    - roulette: each schedule is chosen with probability proportional to its fitness
+    - tournament: each choice is the fittest of tournament_size schedules picked at random
+    - stochastic_universal: as roulette, but all choices are made with evenly spaced pointers from a single spin,
+      so each schedule is chosen close to its expected number of times
+
+    Each method works on the whole population's fitness at once, so selection takes linear time in the size of the
+    population.
+
+    :param method: string name of the selection method
+    :param tournament_size: integer number of schedules in each tournament
+    :raises ValueError: if the method is not recognised
+    """
+
+    methods = ("roulette", "tournament", "stochastic_universal")
+
+    def __init__(self, method: str = "roulette", tournament_size: int = 3):
+        if method not in self.methods:
+            raise ValueError(
+                f"Unknown selection method {method}, expected one of {', '.join(self.methods)}"
+            )
+        self.method = method
+        self.tournament_size = tournament_size
+
+    def select(self, fitnesses: np.ndarray, num_selected: int, rng: random.Random = random) -> np.ndarray:
+        """
+        Function to choose schedules from the population using the selection method
+
+        :param fitnesses: array of the fitness of each schedule in the population
+        :param num_selected: integer number of schedules to choose (a schedule can be chosen more than once)
+        :param rng: random number generator the choices are drawn from (the random module if not given)
+        :returns: array of the positions of the chosen schedules within the population
+        """
+        fitnesses = np.asarray(fitnesses, dtype=np.float64)
+        # A NumPy generator seeded from rng, so all of a run's random numbers still come from one seed
+        np_rng = np.random.default_rng(rng.getrandbits(64))
+        return getattr(self, self.method)(fitnesses, num_selected, np_rng)
+
+    @staticmethod
+    def cumulative_weights(fitnesses: np.ndarray) -> np.ndarray:
+        """
+        Function to calculate the running total of selection weights, where the weight of each schedule is its
+        fitness (ignoring negative fitness). If no schedule has a positive fitness all are weighted equally
+
+        :param fitnesses: array of the fitness of each schedule in the population
+        :returns: array of the cumulative weight up to and including each schedule
+        """
+        weights = np.clip(fitnesses, 0, None)
+        if weights.sum() <= 0:
+            weights = np.ones(len(fitnesses))
+        return np.cumsum(weights)
+
+    def roulette(self, fitnesses: np.ndarray, num_selected: int, np_rng: np.random.Generator) -> np.ndarray:
+        """
+        Function to choose schedules with probability proportional to their fitness
+
+        :param fitnesses: array of the fitness of each schedule in the population
+        :param num_selected: integer number of schedules to choose
+        :param np_rng: NumPy random number generator
+        :returns: array of the positions of the chosen schedules within the population
+        """
+        cum_weights = self.cumulative_weights(fitnesses)
+        spins = np_rng.random(num_selected) * cum_weights[-1]
+        return np.minimum(
+            np.searchsorted(cum_weights, spins, side="right"), len(fitnesses) - 1
+        )
+
+    def tournament(self, fitnesses: np.ndarray, num_selected: int, np_rng: np.random.Generator) -> np.ndarray:
+        """
+        Function to choose schedules by picking the fittest from groups of schedules drawn at random
+
+        :param fitnesses: array of the fitness of each schedule in the population
+        :param num_selected: integer number of schedules to choose
+        :param np_rng: NumPy random number generator
+        :returns: array of the positions of the chosen schedules within the population
+        """
+        entrants = np_rng.integers(0, len(fitnesses), size=(num_selected, max(1, self.tournament_size)))
+        winners = np.argmax(fitnesses[entrants], axis=1)
+        return entrants[np.arange(num_selected), winners]
+
+    def stochastic_universal(
+        self, fitnesses: np.ndarray, num_selected: int, np_rng: np.random.Generator
+    ) -> np.ndarray:
+        """
+        Function to choose schedules with evenly spaced pointers around a roulette wheel, from a single spin
+
+        :param fitnesses: array of the fitness of each schedule in the population
+        :param num_selected: integer number of schedules to choose
+        :param np_rng: NumPy random number generator
+        :returns: array of the positions of the chosen schedules within the population, in a random order
+        """
+        cum_weights = self.cumulative_weights(fitnesses)
+        spacing = cum_weights[-1] / num_selected
+        pointers = np_rng.uniform(0, spacing) + spacing * np.arange(num_selected)
+        selected = np.minimum(
+            np.searchsorted(cum_weights, pointers, side="right"), len(fitnesses) - 1
+        )
+        # Pointers are in population order, so shuffle to avoid pairing schedules by position
+        return np_rng.permutation(selected)
@@ -0,0 +1,169 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+class WarmStart:
+    """
+    A WarmStart is a previous schedule used as the starting point of a run of the genetic algorithm, so that
+    re-planning after a few changes to the input data does not start from random schedules. It holds the ward each
+    current placement had in the previous schedule (placements which are new, or whose ward is no longer in the
+    input data, are unassigned) and which of these are locked. Locked placements keep their ward in every schedule
+    the run produces.
+
+    A previous schedule can be read from either:
+    - a schedule output workbook, from its UHPT_Output sheet (one row per student, one column per placement)
+    - a schedule CSV, as saved to the results folder for each chosen schedule, or any CSV with placement_name and
+      ward_name columns
+
+    Placements are matched on student id, year and placement (e.g. 81417, Year 3, Placement1), and wards on their
+    name. Either file can have a locked column (e.g. TRUE/FALSE) marking the placements (or, in UHPT_Output, the
+    students) whose wards are locked.
+
+    :param genome: integer array of the ward id assigned to each placement, -1 where unassigned
+    :param locked: boolean array of whether each placement's ward is locked, none are if not given
+    """
+
+    def __init__(self, genome: np.ndarray, locked: np.ndarray = None):
+        self.genome = np.asarray(genome, dtype=np.int32)
+        if locked is None:
+            locked = np.zeros(len(self.genome), dtype=bool)
+        # Only placements with a ward can be locked
+        self.locked = np.asarray(locked, dtype=bool) & (self.genome >= 0)
+
+    @staticmethod
+    def placement_key(placement_name: str) -> tuple:
+        """
+        Function to find the student id, year and placement of a placement from its name, which is made up of
+        these and the student's name (see DataLoader.preprocData)
+
+        :param placement_name: string name of the placement, e.g. 81417_Jo Bloggs_Year 3: Placement1
+        :returns: tuple of strings of the student id, year and placement. For a name which is not made up this way
+        (e.g. without a ":"), the student id and year are empty and the placement is the whole name, so it only
+        matches a placement with exactly the same name
+        """
+        name = str(placement_name).strip()
+        nurse_id, _, rest = name.partition("_")
+        part, separator, placement = rest.rsplit("_", maxsplit=1)[-1].partition(":")
+        if not rest or not separator:
+            return "", "", name
+        return nurse_id.strip(), part.strip(), placement.strip()
+
+    @staticmethod
+    def is_locked(value) -> bool:
+        """
+        Function to read whether a placement is locked from a cell of the locked column
+
+        :param value: value of the cell
+        :returns: bool, False if the cell is empty
+        """
+        if pd.isnull(value):
+            return False
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "yes", "y", "1", "locked")
+        return bool(value)
+
+    @classmethod
+    def from_assignments(cls, assignments: pd.DataFrame, placements: list, wards: list) -> "WarmStart":
+        """
+        Function to create a warm start from the ward of each placement in a previous schedule
+
+        :param assignments: dataframe with nurse_id, placement_part, placement and ward_name columns, and
+        optionally locked
+        :param placements: A list of all placements to be allocated
+        :param wards: A list of all potential wards that placements can be taken on
+        :returns: WarmStart with a ward for each placement found in the previous schedule
+        """
+        positions = {
+            cls.placement_key(placement.name): position for position, placement in enumerate(placements)
+        }
+        ward_ids = {str(ward.ward).strip(): ward_id for ward_id, ward in enumerate(wards)}
+        genome = np.full(len(placements), -1, dtype=np.int32)
+        locked = np.zeros(len(placements), dtype=bool)
+        has_locked = "locked" in assignments.columns
+        unmatched_placements, unmatched_wards = 0, 0
+        for row in assignments.itertuples(index=False):
+            if pd.isnull(row.ward_name) or str(row.ward_name).strip() in ("", "None"):
+                continue
+            position = positions.get((str(row.nurse_id).strip(), str(row.placement_part).strip(),
+                                      str(row.placement).strip()))
+            ward_id = ward_ids.get(str(row.ward_name).strip())
+            if position is None:
+                unmatched_placements += 1
+            elif ward_id is None:
+                unmatched_wards += 1
+            else:
+                genome[position] = ward_id
+                locked[position] = has_locked and cls.is_locked(row.locked)
+        if unmatched_placements:
+            print(f"WARNING: {unmatched_placements} placements in the previous schedule are not in the input data "
+                  "and are ignored")
+        if unmatched_wards:
+            print(f"WARNING: {unmatched_wards} placements in the previous schedule are on wards which are not in "
+                  "the input data, so will be placed again")
+        return cls(genome, locked)
+
+    @classmethod
+    def from_file(cls, file, placements: list, wards: list, file_name: str = None) -> "WarmStart":
+        """
+        Function to create a warm start from a schedule output workbook or schedule CSV
+
+        :param file: path of the file, or a file object
+        :param placements: A list of all placements to be allocated
+        :param wards: A list of all potential wards that placements can be taken on
+        :param file_name: name of the file, used to tell whether it is a workbook or CSV when file is a file object
+        :returns: WarmStart with a ward for each placement found in the previous schedule
+        :raises ValueError: if the file is not a schedule output workbook or schedule CSV
+        """
+        if file_name is None:
+            file_name = file if isinstance(file, str) else getattr(file, "name", "")
+        extension = os.path.splitext(str(file_name))[1].lower()
+        if extension == ".csv":
+            schedule = pd.read_csv(file)
+            if not {"placement_name", "ward_name"}.issubset(schedule.columns):
+                raise ValueError("The schedule CSV needs placement_name and ward_name columns")
+            # Rows are repeated for each week of a placement in the results CSV
+            schedule = schedule.drop_duplicates(subset="placement_name")
+            keys = [cls.placement_key(name) for name in schedule["placement_name"]]
+            assignments = pd.DataFrame(keys, columns=["nurse_id", "placement_part", "placement"])
+            assignments["ward_name"] = schedule["ward_name"].to_numpy()
+            if "locked" in schedule.columns:
+                assignments["locked"] = schedule["locked"].to_numpy()
+        elif extension in (".xlsx", ".xls"):
+            sheets = pd.read_excel(file, sheet_name=None)
+            if "UHPT_Output" not in sheets:
+                raise ValueError("The schedule workbook needs a UHPT_Output sheet")
+            output = sheets["UHPT_Output"]
+            id_columns = ["nurse_uni_cohort", "placement_part", "nurse_id", "nurse_name", "is_driver?",
+                          "ward_history", "locked"]
+            if not {"nurse_id", "placement_part"}.issubset(output.columns):
+                raise ValueError("The UHPT_Output sheet needs nurse_id and placement_part columns")
+            assignments = output.melt(
+                id_vars=[column for column in id_columns if column in output.columns],
+                var_name="placement",
+                value_name="ward_name",
+            )
+        else:
+            raise ValueError("The previous schedule must be a schedule output workbook (.xlsx) or schedule CSV")
+        return cls.from_assignments(assignments, placements, wards)
+
+    def lock_before(self, placements: list, date) -> "WarmStart":
+        """
+        Function to lock the ward of every placement starting before a date, e.g. those which have already begun
+
+        :param placements: A list of all placements to be allocated
+        :param date: date before which placements are locked
+        :returns: the WarmStart, with locked updated
+        """
+        start_dates = pd.to_datetime(pd.Series([placement.start_date for placement in placements]))
+        self.locked |= (start_dates < pd.to_datetime(date)).to_numpy() & (self.genome >= 0)
+        return self
+
+    def summary(self) -> str:
+        """
+        Function to describe the warm start, for display
+
+        :returns: string of the number of placements with a ward and the number locked
+        """
+        return (f"{int((self.genome >= 0).sum())} of {len(self.genome)} placements have a ward from the previous "
+                f"schedule, {int(self.locked.sum())} of which are locked")
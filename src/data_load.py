@@ -4,7 +4,6 @@ from src.Slot import Slot
 from src.Ward import Ward
 from src.Placement import Placement
 import re
-import streamlit as st
 
 class DataLoader:
     def readData(self, filename):#filename: str):
@@ -29,10 +28,10 @@ class DataLoader:
         #Convert student id to int
         self.students["student_id"] = self.students["student_id"].astype('Int64')
         #check date columns to ensure they match
-        if self.students["course_start"].dtype != object:
+        if pd.api.types.is_datetime64_any_dtype(self.students["course_start"]):
             self.students["course_start"] = pd.to_datetime(self.students["course_start"]).dt.strftime("%b-%y")
                 #check date columns to ensure they match
-        if self.uni_placements["course_start"].dtype != object:
+        if pd.api.types.is_datetime64_any_dtype(self.uni_placements["course_start"]):
             self.uni_placements["course_start"] = pd.to_datetime(self.uni_placements["course_start"]).dt.strftime("%b-%y")
         self.students["student_name"] = (
             self.students["Forename"].str.strip().astype(str)
@@ -199,6 +198,20 @@ class DataLoader:
             - 1
         )
 
+    def schedule_weeks(self) -> int:
+        """
+        Function to calculate the number of weeks the schedule needs to cover
+
+        :returns: the integer number of weeks between the first and last placement start, plus the maximum
+        placement length so that even the longest placement fits
+        """
+        num_weeks = int(np.round((pd.to_datetime(
+                    self.student_placements["placement_start_date_raw"].max())
+                    - pd.to_datetime(
+                      self.student_placements["placement_start_date_raw"].min()))
+                    / np.timedelta64(1, "W"), 0))
+        return num_weeks + int(self.student_placements["placement_len_weeks"].max()) + 1
+
     def preprocData(self, num_weeks: int):
         """
         Function to convert dataframes into lists of Class objects for Genetic Algorithm
@@ -0,0 +1,77 @@
+"""
+Shared fixtures for the tests. Each test problem is built from fake data (see fake_data_generation) with the
+benchmark suite's load_problem, so the tests do not need any real input data. The make_* fixtures are factories,
+so a test can build as many schedules or genetic algorithms as it needs from the shared problem.
+"""
+import random
+import pytest
+from benchmarks.run_benchmarks import load_problem
+from src.FitnessEvaluator import FitnessEvaluator
+from src.GeneticAlgorithm import GeneticAlgorithm
+from src.Params import Params
+from src.Schedule import Schedule
+
+
+@pytest.fixture(scope="session")
+def problem() -> tuple:
+    """
+    A small problem shared by every test: slots, wards, placements, number of weeks and ProblemIndex
+    """
+    return load_problem(60, 10, 1)
+
+
+@pytest.fixture(scope="session")
+def params() -> Params:
+    """
+    The parameters in config/params.yml, with runs stopping after a few iterations without improvement
+    """
+    return Params.load(overrides={"genetic_algorithm_params": {"max_no_change_iterations": 3}})
+
+
+@pytest.fixture
+def make_schedule(problem, params):
+    """
+    Factory for a scored Schedule made by schedule_generation, called with the seed of the generation and
+    optionally the parameters to use instead of the params fixture
+    """
+    slots, wards, placements, num_weeks, index = problem
+
+    def make(seed: int, schedule_params: Params = None) -> Schedule:
+        schedule_params = schedule_params or params
+        evaluator = FitnessEvaluator(index, schedule_params.schedule_params)
+        schedule = Schedule(slots, wards, placements, num_weeks, index, evaluator, schedule_params)
+        schedule.schedule_generation(random.Random(seed))
+        schedule.get_fitness()
+        return schedule
+
+    return make
+
+
+@pytest.fixture
+def make_ga(problem, params):
+    """
+    Factory for a seeded GeneticAlgorithm, called with the population size, the seed of the run, and any other
+    GeneticAlgorithm arguments. The parameters can be given with ga_params instead of the params fixture
+    """
+    slots, wards, placements, num_weeks, index = problem
+
+    def make(pop_size: int, seed: int, ga_params: Params = None, **kwargs) -> GeneticAlgorithm:
+        ga = GeneticAlgorithm(slots, wards, placements, pop_size, num_weeks, 0, index, ga_params or params,
+                              seed=seed, **kwargs)
+        ga.seed_schedules()
+        return ga
+
+    return make
+
+
+@pytest.fixture
+def full_fitness(problem, params):
+    """
+    Function to score a schedule from scratch with a new FitnessEvaluator, so no cache or fitness state is used
+    """
+    index = problem[4]
+
+    def score(schedule: Schedule) -> dict:
+        return FitnessEvaluator(index, params.schedule_params).evaluate(*schedule.fitness_inputs())
+
+    return score
@@ -0,0 +1,40 @@
+import random
+import numpy as np
+import pytest
+from src.FitnessCache import FitnessCache
+
+
+def test_fitness_cache_returns_copies():
+    cache = FitnessCache(1)
+    genome = np.arange(5, dtype=np.int32)
+    result = {"fitness": 0.5, "schedule_eval_scores": {"mean_ward_util": 0.1}}
+    cache.put(cache.key(genome), result)
+    result["schedule_eval_scores"]["mean_ward_util"] = 0.9
+    first = cache.get(cache.key(genome))
+    first["schedule_eval_scores"]["mean_ward_util"] = 0.8
+    assert cache.get(cache.key(genome))["schedule_eval_scores"]["mean_ward_util"] == 0.1
+    assert cache.stats()["hits"] == 2
+
+
+def test_fitness_cache_evicts_least_recently_used():
+    cache = FitnessCache(0.001)
+    genomes = [np.full(5, i, dtype=np.int32) for i in range(20)]
+    for genome in genomes:
+        cache.put(cache.key(genome), {"fitness": 0.5, "schedule_eval_scores": {}})
+    assert cache.used_bytes <= cache.budget_bytes
+    assert cache.evictions > 0
+    assert cache.get(cache.key(genomes[-1])) is not None
+    assert cache.get(cache.key(genomes[0])) is None
+
+
+def test_delta_mutation_looks_up_cache(params, make_schedule):
+    params = params.override({"schedule_params": {"delta_fitness": True}})
+    schedule = make_schedule(1, params)
+    first = schedule.mutation(3, random.Random(2))
+    hits = schedule.evaluator.cache.hits
+    second = schedule.mutation(3, random.Random(2))
+    assert np.array_equal(first.genome, second.genome)
+    assert schedule.evaluator.cache.hits == hits + 1
+    assert second.fitness == pytest.approx(first.fitness)
+    second.schedule_eval_scores["mean_ward_util"] = -1.0
+    assert first.schedule_eval_scores["mean_ward_util"] != -1.0
@@ -0,0 +1,44 @@
+import json
+import os
+import numpy as np
+import pytest
+from src.FitnessEvaluator import FitnessEvaluator
+
+# Results of the original list-based get_fitness, kept so the vectorised evaluator can be checked against it
+with open(os.path.join(os.path.dirname(__file__), "data", "baseline_fitness.json")) as f:
+    BASELINE = json.load(f)
+
+
+def baseline_inputs(problem):
+    wards, placements = problem[1], problem[2]
+    placement_ids = {placement.name: placement_id for placement_id, placement in enumerate(placements)}
+    ward_ids = {ward.ward: ward_id for ward_id, ward in enumerate(wards)}
+    assert sorted(placement_ids) == sorted(BASELINE["placements"])
+    for case in BASELINE["cases"]:
+        assigned = [(placement_ids[name], ward_ids[ward_name])
+                    for name, ward_name in zip(BASELINE["placements"], case["wards"]) if ward_name is not None]
+        assigned.sort()
+        placement_indices = np.array([placement_id for placement_id, _ in assigned], dtype=np.int64)
+        ward_indices = np.array([ward_id for _, ward_id in assigned], dtype=np.int64)
+        yield placement_indices, ward_indices, case
+
+
+def assert_matches(result, case):
+    assert result["fitness"] == pytest.approx(case["fitness"], rel=1e-12)
+    assert result["viable"] == case["viable"]
+    assert result["non_viable_reason"] == case["non_viable_reason"]
+    assert result["schedule_eval_scores"] == pytest.approx(case["schedule_eval_scores"], rel=1e-12)
+
+
+def test_evaluate_matches_baseline(problem, params):
+    evaluator = FitnessEvaluator(problem[4], params.schedule_params)
+    for placement_indices, ward_indices, case in baseline_inputs(problem):
+        assert_matches(evaluator.evaluate(placement_indices, ward_indices), case)
+
+
+def test_population_batches_match_baseline(problem, params):
+    evaluator = FitnessEvaluator(problem[4], params.schedule_params)
+    evaluator.max_batch_placements = 150
+    placement_indices, ward_indices, cases = zip(*baseline_inputs(problem))
+    for result, case in zip(evaluator.evaluate_population(list(placement_indices), list(ward_indices)), cases):
+        assert_matches(result, case)
@@ -0,0 +1,65 @@
+import random
+import numpy as np
+import pytest
+from src.FitnessEvaluator import FitnessEvaluator
+from src.FitnessState import FitnessState
+from src.Occupancy import Occupancy
+from src.ProblemIndex import ProblemIndex
+
+
+def assert_same_result(result, expected):
+    assert result["fitness"] == pytest.approx(expected["fitness"])
+    assert result["viable"] == expected["viable"]
+    assert result["non_viable_reason"] == expected["non_viable_reason"]
+    assert result["schedule_eval_scores"] == pytest.approx(expected["schedule_eval_scores"])
+
+
+def test_fitness_state_moves_match_full_scoring(problem, make_schedule):
+    schedule = make_schedule(1)
+    placement_indices, ward_indices = schedule.fitness_inputs()
+    state = FitnessState(schedule.evaluator, placement_indices, ward_indices)
+    rng = random.Random(2)
+    for _ in range(200):
+        entry = rng.randrange(len(placement_indices))
+        state.move(entry, rng.randrange(len(problem[1])))
+        assert_same_result(state.result(), schedule.evaluator.evaluate(placement_indices, state.ward))
+
+
+def test_delta_mutation_matches_full_scoring(params, make_schedule, full_fitness):
+    params = params.override({"schedule_params": {"delta_fitness": True}})
+    schedule = make_schedule(3, params)
+    rng = random.Random(4)
+    for _ in range(50):
+        mutant = schedule.mutation(3, rng)
+        assert mutant.fitness == pytest.approx(full_fitness(mutant)["fitness"])
+        schedule = mutant
+
+
+@pytest.mark.parametrize("weeks_short", [0, 1, 3])
+def test_weeks_at_end_of_schedule(problem, params, weeks_short):
+    slots, wards, placements, _, index = problem
+    # With weeks_short 0 the last placement ends in the last week of the schedule, otherwise placements run
+    # past the end
+    num_weeks = int((index.placement_weeks + index.placement_durations).max()) - weeks_short
+    index = ProblemIndex(slots, wards, placements, num_weeks)
+    evaluator = FitnessEvaluator(index, params.schedule_params)
+    placement_indices = np.arange(len(placements))
+    # Two neighbouring wards, so counts spilling into the next ward's weeks would be seen
+    rng = random.Random(weeks_short)
+    ward_indices = np.array([rng.randrange(2) for _ in placements])
+
+    occupancy = Occupancy(index.num_wards, num_weeks, index.num_parts)
+    occupancy.add_placements(ward_indices, index.placement_weeks, index.placement_durations, index.placement_parts)
+    starts = index.placement_weeks < num_weeks
+    expected = np.zeros(len(placements), dtype=np.int64)
+    expected[starts] = occupancy.totals[ward_indices[starts], index.placement_weeks[starts]]
+    checks = evaluator.placement_checks(np.zeros(len(placements), dtype=np.int64), placement_indices, ward_indices)
+    assert np.array_equal(checks["ward_count"], expected)
+
+    state = FitnessState(evaluator, placement_indices, ward_indices)
+    last = [int(entry) for entry in np.argsort(index.placement_weeks + index.placement_durations)[-10:]]
+    for entry in last + last:
+        state.move(entry, 1 - int(state.ward[entry]))
+        rebuilt = FitnessState(evaluator, placement_indices, state.ward)
+        assert np.array_equal(state.occupancy.totals, rebuilt.occupancy.totals)
+        assert_same_result(state.result(), evaluator.evaluate(placement_indices, state.ward))
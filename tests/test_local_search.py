@@ -0,0 +1,62 @@
+import copy
+import random
+import numpy as np
+import pytest
+from src.LocalSearch import LocalSearch
+
+
+@pytest.fixture
+def schedule(make_schedule):
+    return make_schedule(1)
+
+
+@pytest.mark.parametrize("method", ["hill_climbing", "simulated_annealing"])
+def test_polish_matches_full_scoring(schedule, full_fitness, method):
+    genome = schedule.genome.copy()
+    local_search = LocalSearch(method, 30, 1000)
+    polished = local_search.polish(schedule, random.Random(2))
+    assert np.array_equal(schedule.genome, genome)
+    assert polished.fitness >= schedule.fitness
+    assert polished.fitness == pytest.approx(full_fitness(polished)["fitness"])
+    assert local_search.stats["fitness"] == pytest.approx(polished.fitness)
+
+
+@pytest.mark.parametrize("method", ["hill_climbing", "simulated_annealing"])
+def test_polish_is_repeatable(schedule, method):
+    first = LocalSearch(method, 30, 500).polish(schedule, random.Random(3))
+    second = LocalSearch(method, 30, 500).polish(schedule, random.Random(3))
+    assert np.array_equal(first.genome, second.genome)
+
+
+def test_hill_climbing_stops_at_local_optimum(schedule):
+    polished = LocalSearch("hill_climbing", 60, 10**7).polish(schedule, random.Random(4))
+    assert LocalSearch("hill_climbing", 60, 10**7).polish(polished, random.Random(5)) is polished
+
+
+def test_placements_without_another_ward_are_not_moved(schedule):
+    schedule.index = copy.copy(schedule.index)
+    schedule.index.eligible_ward_ids = [ward_ids[:1] for ward_ids in schedule.index.eligible_ward_ids]
+    assert LocalSearch("simulated_annealing", 30, 1000).polish(schedule, random.Random(6)) is schedule
+
+
+def test_none_leaves_schedule(schedule):
+    local_search = LocalSearch("none")
+    assert local_search.polish(schedule) is schedule
+    assert local_search.stats["moves"] == 0
+    with pytest.raises(ValueError):
+        LocalSearch("tabu_search")
+
+
+def test_run_polishes_chosen_schedule(params, make_ga, full_fitness):
+    params = params.override({"genetic_algorithm_params": {"local_search": "hill_climbing",
+                                                           "local_search_moves": 2000}})
+    ga = make_ga(10, 7, params)
+    continue_eval, chosen_schedule = ga.evaluate()[:2]
+    while continue_eval:
+        continue_eval, chosen_schedule = ga.evolve()[:2]
+    stats = ga.local_search.stats
+    assert stats["method"] == "hill_climbing" and stats["moves"] > 0
+    assert chosen_schedule is ga.best_schedule["schedule"]
+    assert chosen_schedule.fitness == pytest.approx(stats["fitness"])
+    assert stats["fitness"] >= stats["start_fitness"]
+    assert chosen_schedule.fitness == pytest.approx(full_fitness(chosen_schedule)["fitness"])
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def test_culled_schedules_can_replace_schedules(make_ga):
+    ga = make_ga(10, 1)
+    generate_schedules = ga.generate_schedules
+    culled = []
+
+    def generate_fittest(num_schedules):
+        # Make the culled schedules fitter than any mutated schedule or offspring
+        new_schedules = generate_schedules(num_schedules)
+        for schedule in new_schedules:
+            schedule["fitness"] = 2.0
+        culled.extend(new_schedules)
+        return new_schedules
+
+    ga.generate_schedules = generate_fittest
+    ga.evolve()
+    assert len(culled) == ga.new_schedule_count > 0
+    assert any(schedule is culled_schedule for schedule in ga.schedules for culled_schedule in culled)
+    assert ga.best_schedule["fitness"] == 2.0
+
+
+def test_update_population_keeps_protected_schedules(make_ga):
+    ga = make_ga(10, 2)
+    fitnesses = np.array([schedule["fitness"] for schedule in ga.schedules])
+    num_protected = len(ga.schedules) - int(len(ga.schedules) * (1 - ga.changed_protected_proportion))
+    protected = [ga.schedules[position] for position in np.argsort(-fitnesses)[:num_protected]]
+    ga.new_schedules = [dict(schedule, fitness=schedule["fitness"] + 1) for schedule in ga.schedules]
+    ga.update_population()
+    assert all(any(schedule is kept for kept in ga.schedules) for schedule in protected)
@@ -0,0 +1,37 @@
+import random
+import pytest
+
+
+def test_delta_mutation_with_repair_matches_full_scoring(params, make_schedule, full_fitness):
+    params = params.override({
+        "schedule_params": {"delta_fitness": True},
+        "genetic_algorithm_params": {"repair_offspring": True},
+    })
+    schedule = make_schedule(3, params)
+    rng = random.Random(4)
+    for _ in range(50):
+        mutant = schedule.mutation(3, rng)
+        assert mutant.fitness == pytest.approx(full_fitness(mutant)["fitness"])
+        schedule = mutant
+
+
+def test_repaired_offspring_break_no_constraints(params, make_schedule, full_fitness):
+    params = params.override({"genetic_algorithm_params": {"repair_offspring": True}})
+    first, second = make_schedule(5, params), make_schedule(6, params)
+    rng = random.Random(7)
+    for offspring in first.recombination(second, 5, 2, rng) + [first.mutation(10, rng)]:
+        assert len(offspring.violations()) == 0
+        assert offspring.fitness == pytest.approx(full_fitness(offspring)["fitness"])
+
+
+def test_repair_keeps_placements_on_last_ward(problem, make_schedule):
+    last_ward = len(problem[1]) - 1
+    schedule = make_schedule(8)
+    # Mutation can move placements to the last ward, and repair must not undo a valid move
+    placement_index = next(placement_index for placement_index in range(len(schedule.placements))
+                           if schedule.genome[placement_index] != last_ward
+                           and last_ward in schedule.valid_ward_ids(placement_index))
+    schedule.move_placement(placement_index, last_ward)
+    assert len(schedule.violations()) == 0
+    assert schedule.repair(random.Random(9)) == 0
+    assert schedule.genome[placement_index] == last_ward
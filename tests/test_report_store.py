@@ -0,0 +1,66 @@
+import os
+import zipfile
+import pytest
+from src.ReportStore import ReportStore
+
+
+@pytest.fixture
+def report(make_ga):
+    schedule = make_ga(4, 1).best_schedule["schedule"]
+    schedule.save_report(0)
+    schedule.report.csv_directory = None
+    return schedule.report
+
+
+def test_oldest_files_are_evicted(report):
+    with ReportStore(0.01) as store:
+        store.add("first.csv", b"x" * 4000)
+        store.add("second.csv", b"y" * 4000)
+        store.add("third.csv", b"z" * 4000)
+        assert store.names() == ["second.csv", "third.csv"]
+        assert store.evicted == ["first.csv"]
+        assert store.used_bytes <= store.max_bytes
+        with pytest.raises(KeyError):
+            store.read("first.csv")
+
+
+def test_reports_are_kept_on_disk_until_read(report):
+    with ReportStore(10) as store:
+        store.add("schedule.xlsx", report)
+        path, pending, size = store.entries["schedule.xlsx"]
+        assert pending and os.path.getsize(path) == size
+        content = store.read("schedule.xlsx")
+        assert content[:2] == b"PK"
+        assert not os.path.exists(path)
+        assert store.used_bytes == len(content)
+
+
+def test_bundle_contains_kept_files(report):
+    with ReportStore(10) as store:
+        store.add("comparison.csv", b"a,b\n1,2\n")
+        store.add("schedule.xlsx", report)
+        with store.bundle(["comparison.csv", "schedule.xlsx", "missing.csv"]) as bundle:
+            names = zipfile.ZipFile(bundle).namelist()
+        assert names == ["comparison.csv", "schedule.xlsx"]
+
+
+def test_closed_store_removes_directory():
+    store = ReportStore(1)
+    store.add("file.csv", b"1")
+    store.close()
+    assert not os.path.exists(store.directory)
+
+
+def test_pending_reports_count_towards_budget(report):
+    with ReportStore(10) as store:
+        store.add("first.xlsx", report)
+        first_path, _, pickled_size = store.entries["first.xlsx"]
+        # Room for one pickled report, so adding another removes the first from disk
+        store.max_bytes = pickled_size * 3 // 2
+        store.add("second.xlsx", report)
+        assert store.names() == ["second.xlsx"]
+        assert store.evicted == ["first.xlsx"]
+        assert not os.path.exists(first_path)
+        content = store.read("second.xlsx")
+        assert store.used_bytes == len(content)
+        assert os.listdir(store.directory) == [os.path.basename(store.entries["second.xlsx"][0])]
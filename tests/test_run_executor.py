@@ -0,0 +1,37 @@
+from itertools import zip_longest
+from benchmarks.run_benchmarks import load_problem
+from src.RunExecutor import RunExecutor
+from src.ScheduleExecutor import ScheduleExecutor
+
+
+def run_summaries(problem, params, run_workers, generation_workers):
+    slots, wards, placements, num_weeks, index = problem
+    summaries = {}
+    with ScheduleExecutor(*problem, params, generation_workers) as executor, \
+         RunExecutor(slots, wards, placements, num_weeks, index, params, run_workers, executor) as runs:
+        for event, details in runs.run(3, 12, seed=11):
+            if event == "finished":
+                summaries[details["run_no"]] = (details["seed"], details["fitness"], details["iteration"])
+    return summaries
+
+
+def test_runs_do_not_depend_on_workers(problem, params):
+    serial = run_summaries(problem, params, 1, 1)
+    assert sorted(serial) == [0, 1, 2]
+    assert run_summaries(problem, params, 1, 3) == serial
+    assert run_summaries(problem, params, 3, 1) == serial
+
+
+def test_serial_executors_do_not_share_problems(problem, params):
+    other_problem = load_problem(40, 8, 2)
+    expected = [run_summaries(problem, params, 1, 1), run_summaries(other_problem, params, 1, 1)]
+    summaries = [{}, {}]
+    with RunExecutor(*problem, params) as first, RunExecutor(*other_problem, params) as second:
+        # Take the events of the two executors in turn, as two sessions of the app running at once would
+        runs = zip_longest(first.run(3, 12, seed=11), second.run(3, 12, seed=11), fillvalue=(None, None))
+        for events in runs:
+            for position, (event, details) in enumerate(events):
+                if event == "finished":
+                    summaries[position][details["run_no"]] = (details["seed"], details["fitness"],
+                                                               details["iteration"])
+    assert summaries == expected
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+from benchmarks.run_benchmarks import load_problem
+from src.RunJob import RunJob
+
+
+def job_results(job):
+    """
+    The fitness and number of placements of the schedule chosen by each run of a finished job
+    """
+    return {
+        summary["run_no"]: (summary["fitness"], summary["files"][0][0].schedule["placement_name"].nunique())
+        for summary in job.summaries
+    }
+
+
+def test_close_while_running(problem, params):
+    slots, wards, placements, num_weeks, index = problem
+    errors = []
+    previous_hook = threading.excepthook
+    threading.excepthook = lambda args: errors.append(args.exc_value)
+    try:
+        for delay in (0, 0.2, 0.5):
+            job = RunJob(slots, wards, placements, num_weeks, index, params, 3, 12, seed=1).start()
+            time.sleep(delay)
+            job.close()
+            job.thread.join(timeout=60)
+            assert not job.thread.is_alive()
+            assert job.status in ("cancelled", "finished")
+            assert not os.path.exists(job.store.directory)
+    finally:
+        threading.excepthook = previous_hook
+    assert errors == []
+
+
+def test_finished_job_keeps_files(problem, params):
+    slots, wards, placements, num_weeks, index = problem
+    job = RunJob(slots, wards, placements, num_weeks, index, params, 2, 12, seed=1).start()
+    job.thread.join(timeout=60)
+    assert job.status == "finished"
+    assert len(job.summaries) == 2
+    assert job.file_names[0].endswith("schedule comparison.csv")
+    assert all(file_name in job.store for file_name in job.file_names)
+    job.close()
+    assert not os.path.exists(job.store.directory)
+
+
+def test_concurrent_jobs_match_jobs_run_alone(problem, params):
+    problems = [problem, load_problem(40, 8, 2)]
+    expected = []
+    for job_problem in problems:
+        job = RunJob(*job_problem, params, 2, 12, seed=3).start()
+        job.thread.join(timeout=60)
+        expected.append(job_results(job))
+        job.close()
+    jobs = [RunJob(*job_problem, params, 2, 12, seed=3) for job_problem in problems]
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        job.thread.join(timeout=60)
+        assert job.status == "finished"
+    assert [job_results(job) for job in jobs] == expected
+    assert expected[0][0][1] != expected[1][0][1]
+    for job in jobs:
+        job.close()
@@ -0,0 +1,37 @@
+import numpy as np
+from src.ScheduleExecutor import ScheduleExecutor
+
+
+def test_generation_does_not_depend_on_workers(problem, params):
+    seeds = list(range(12))
+    with ScheduleExecutor(*problem, params, workers=1) as serial, ScheduleExecutor(*problem, params, workers=3) as pool:
+        for genome, other in zip(serial.generate(seeds), pool.generate(seeds)):
+            assert np.array_equal(genome, other)
+
+
+def evolve_with_culls(problem, params, make_ga, workers):
+    with ScheduleExecutor(*problem, params, workers) as executor:
+        ga = make_ga(10, 4, executor=executor)
+        generate_schedules = ga.generate_schedules
+        culled = []
+
+        def generate_fittest(num_schedules):
+            new_schedules = generate_schedules(num_schedules)
+            for schedule in new_schedules:
+                schedule["fitness"] = 2.0
+            culled.extend(new_schedules)
+            return new_schedules
+
+        ga.generate_schedules = generate_fittest
+        ga.evolve()
+    kept = [schedule for schedule in culled if any(schedule is other for other in ga.schedules)]
+    return [schedule["schedule"].genome for schedule in culled], [schedule["schedule"].genome for schedule in kept]
+
+
+def test_pool_generated_culls_reach_population(problem, params, make_ga):
+    serial_culled, serial_kept = evolve_with_culls(problem, params, make_ga, 1)
+    pool_culled, pool_kept = evolve_with_culls(problem, params, make_ga, 3)
+    assert len(pool_kept) > 0
+    assert len(pool_culled) == len(serial_culled) and len(pool_kept) == len(serial_kept)
+    for genome, other in zip(serial_culled + serial_kept, pool_culled + pool_kept):
+        assert np.array_equal(genome, other)
@@ -0,0 +1,23 @@
+import random
+import numpy as np
+from src.Schedule import Schedule
+
+
+def test_generated_wards_are_eligible_with_capacity(make_schedule):
+    for seed in range(5):
+        schedule = make_schedule(seed)
+        assert (schedule.genome >= 0).all()
+        assert len(schedule.violations()) == 0
+
+
+def test_generation_can_choose_every_eligible_ward(problem, params):
+    slots, wards, placements, num_weeks, index = problem
+    chosen = np.zeros(index.eligible.shape, dtype=bool)
+    for seed in range(40):
+        schedule = Schedule(slots, wards, placements, num_weeks, index, None, params)
+        schedule.schedule_generation(random.Random(seed))
+        chosen[np.arange(len(placements)), schedule.genome] = True
+    assert not (chosen & ~index.eligible).any()
+    # The original generation loop never chose the last ward
+    assert chosen[:, len(wards) - 1].any()
+    assert chosen.any(axis=0)[index.eligible.any(axis=0)].all()
@@ -0,0 +1,26 @@
+import os
+import warnings
+import pandas as pd
+
+
+def test_workbook_is_only_built_when_needed(make_ga, tmp_path):
+    schedule = make_ga(4, 1).best_schedule["schedule"]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        schedule.save_report(0)
+        report = schedule.report
+        report.csv_directory = str(tmp_path)
+        assert report._content is None
+        content = report.content
+    assert content[:2] == b"PK"
+    assert report.content is content
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_week_dates_follow_placement_weeks(make_ga):
+    schedule = make_ga(4, 2).best_schedule["schedule"]
+    schedule.save_report(0)
+    rows = schedule.report.schedule
+    first_date = pd.to_datetime(rows["placement_start_date"].min())
+    expected = first_date + pd.to_timedelta((rows["placement_week"] - 1) * 7, unit="D")
+    assert (rows["placement_week_date"] == expected).all()
@@ -0,0 +1,84 @@
+import io
+import random
+import numpy as np
+import pandas as pd
+from src.LocalSearch import LocalSearch
+from src.WarmStart import WarmStart
+
+
+def locked_warm_start(make_ga, lock_every=3):
+    genome = make_ga(10, 1).best_schedule["schedule"].genome.copy()
+    locked = np.zeros(len(genome), dtype=bool)
+    locked[::lock_every] = True
+    return WarmStart(genome, locked)
+
+
+def test_locks_survive_a_run(params, make_ga):
+    warm_start = locked_warm_start(make_ga)
+    params = params.override({"genetic_algorithm_params": {"repair_offspring": True}})
+    ga = make_ga(20, 2, params, warm_start=warm_start)
+    continue_eval = ga.evaluate()[0]
+    while continue_eval:
+        continue_eval = ga.evolve()[0]
+        for schedule in ga.schedules:
+            genome = schedule["schedule"].genome
+            assert (genome[warm_start.locked] == warm_start.genome[warm_start.locked]).all()
+
+
+def test_locks_survive_mutation_and_repair(problem, make_ga):
+    wards = problem[1]
+    warm_start = locked_warm_start(make_ga, lock_every=2)
+    schedule = make_ga(4, 3, warm_start=warm_start).schedules[0]["schedule"]
+    rng = random.Random(4)
+    for _ in range(20):
+        schedule = schedule.mutation(10, rng)
+        # Put every placement on a ward it could break a constraint on, then repair
+        schedule.genome[:] = len(wards) - 1
+        schedule.genome[warm_start.locked] = warm_start.genome[warm_start.locked]
+        schedule._occupancy = None
+        schedule.fitness_state = None
+        schedule.repair(rng)
+        assert (schedule.genome[warm_start.locked] == warm_start.genome[warm_start.locked]).all()
+
+
+def test_local_search_keeps_locks(make_ga):
+    warm_start = locked_warm_start(make_ga)
+    schedule = make_ga(4, 5, warm_start=warm_start).best_schedule["schedule"]
+    polished = LocalSearch("simulated_annealing", 30, 2000).polish(schedule, random.Random(6))
+    assert (polished.genome[warm_start.locked] == warm_start.genome[warm_start.locked]).all()
+
+
+def test_warm_start_from_schedule_csv(problem, make_ga):
+    wards, placements = problem[1], problem[2]
+    schedule = make_ga(4, 7).best_schedule["schedule"]
+    output = schedule.report_dataframe()[["placement_name", "ward_name"]].drop_duplicates("placement_name")
+    output["locked"] = ["TRUE" if position % 2 else "" for position in range(len(output))]
+    csv = io.StringIO()
+    output.to_csv(csv, index=False)
+    csv.seek(0)
+    warm_start = WarmStart.from_file(csv, placements, wards, "previous.csv")
+    assert (warm_start.genome == schedule.genome).all()
+    assert 0 < warm_start.locked.sum() < len(placements)
+    first_start = min(pd.Timestamp(placement.start_date) for placement in placements)
+    warm_start.lock_before(placements, first_start + pd.Timedelta(days=1))
+    assert warm_start.locked[[pd.Timestamp(p.start_date) == first_start for p in placements]].all()
+
+
+def test_placement_key_falls_back_to_whole_name():
+    assert WarmStart.placement_key("81417_Jo Bloggs_Year 3: Placement1") == ("81417", "Year 3", "Placement1")
+    assert WarmStart.placement_key("81417_Jo Bloggs_Placement1") == ("", "", "81417_Jo Bloggs_Placement1")
+    assert WarmStart.placement_key(" Placement1 ") == ("", "", "Placement1")
+
+
+def test_csv_rows_without_placement_keys_are_skipped(problem, make_ga, capsys):
+    wards, placements = problem[1], problem[2]
+    schedule = make_ga(4, 8).best_schedule["schedule"]
+    output = schedule.report_dataframe()[["placement_name", "ward_name"]].drop_duplicates("placement_name")
+    output = pd.concat([output, pd.DataFrame({"placement_name": ["Total", "81417_Jo Bloggs"],
+                                              "ward_name": [wards[0].ward, wards[0].ward]})])
+    csv = io.StringIO()
+    output.to_csv(csv, index=False)
+    csv.seek(0)
+    warm_start = WarmStart.from_file(csv, placements, wards, "previous.csv")
+    assert (warm_start.genome == schedule.genome).all()
+    assert "2 placements in the previous schedule are not in the input data" in capsys.readouterr().out
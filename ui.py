@@ -2,140 +2,192 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import yaml
-import os
+import io
+import uuid
 from src.create_inputs import InputTemplate
 from src.create_inputs import StudentTab
 from src.data_load import DataLoader
-from src.GeneticAlgorithm import GeneticAlgorithm
-from src.Schedule import Schedule
+from src.ProblemIndex import ProblemIndex
+from src.Params import Params
+from src.JobManager import JobManager
+from src.RunJob import RunJob
+from src.WarmStart import WarmStart
 from fake_data_generation.generate_fake_data import FakeData
 
 ################################################################################
                         #Main function to run the alg#
 ################################################################################
-def main(num_schedules: int, pop_size: int):
+def session_key() -> str:
     """
-    Function to run Nursing Placement Optimisation tool end-to-end
+    Function to get the key of this user's session, creating it the first
+    time. The key is kept in the page's address, so it is the same when the
+    page is refreshed.
+
+    :returns: string key of the session
+    """
+    if "session" not in st.query_params:
+        st.query_params["session"] = uuid.uuid4().hex
+    return st.query_params["session"]
+
+@st.cache_resource
+def job_manager() -> JobManager:
+    """
+    Function to get the JobManager shared by every session of the app, which
+    keeps the runs each session has started
+
+    :returns: JobManager
+    """
+    return JobManager(params.ui_params.job_expiry_hours)
+
+def main(num_schedules: int, pop_size: int, seed: int = None,
+         previous_schedule=None, lock_before=None) -> RunJob:
+    """
+    Function to run Nursing Placement Optimisation tool end-to-end. The runs
+    happen in the background, so they carry on if the page is rerun or
+    refreshed, and their progress and results are shown by show_job
     :param num_schedules: the overall integer number of schedules to output
     from the tool. Can be thought of as number of times the tool is run
     :param pop_size: the size of the population to be used for each run. This
     is the integer number of schedules randomly produced for each run of the
     tool, which are used as the base to find the best performing schedule from
+    :param seed: integer seed for the random numbers used by the runs, so they
+    can be repeated. Chosen at random if not given
+    :param previous_schedule: uploaded schedule output workbook or schedule CSV
+    to start each run from, runs start from random schedules if not given
+    :param lock_before: date before which placements keep their ward from the
+    previous schedule
     
-    :returns: A series of .xlsx files, which contain the schedules, as well as
-    a comparison file which shows the scores of each schedule beside each other
+    :returns: RunJob producing a series of .xlsx files, which contain the
+    schedules, as well as a comparison file which shows the scores of each
+    schedule beside each other
     """
-    st.subheader("Cycle information")
-    st.subheader("Last saved schedule details")
-    ui_schedule_results = st.empty()
-
-    num_weeks = int(np.round((pd.to_datetime(
-                dataload.student_placements["placement_start_date_raw"].max())
-                - pd.to_datetime(
-                  dataload.student_placements["placement_start_date_raw"].min()))
-                / np.timedelta64(1, "W"), 0))
-
-    # Add maximum placement length so that schedule is large enough to
-    # accommodate even the longest placement
-    num_weeks = (num_weeks
-                 + int(dataload.student_placements["placement_len_weeks"].max())
-                 + 1)
+    # Schedule is large enough to accommodate even the longest placement
+    num_weeks = dataload.schedule_weeks()
 
     slots, wards, placements = dataload.preprocData(num_weeks)
+    # Ward and placement information shared by every run
+    index = ProblemIndex(slots, wards, placements, num_weeks)
+    # Previous schedule (if given) to start the runs from
+    warm_start = None
+    if previous_schedule is not None:
+        try:
+            warm_start = WarmStart.from_file(previous_schedule, placements,
+                                             wards)
+        except ValueError as e:
+            st.error(f"Unable to use the previous schedule: {e}")
+            return None
+        if lock_before is not None:
+            warm_start.lock_before(placements, lock_before)
+    # Start the runs in the background, replacing any this session started
+    # before
+    return job_manager().submit(session_key(),
+                                RunJob(slots, wards, placements, num_weeks,
+                                       index, params, num_schedules, pop_size,
+                                       seed, warm_start))
 
-    num_iter = num_schedules
-    scheduleCompare = []
-    placeholder = st.empty()
-    graph_placeholder = st.empty()
-    for schedule in range(num_iter):
-        GA = GeneticAlgorithm(slots, wards, placements, pop_size, num_weeks, schedule)
-        GA.seed_schedules()
-        (continue_eval, chosen_schedule, fitness, iteration,
-         schedule_fitnesses, download_files) = GA.evaluate()
-        # prev_fitness = 0
-        while continue_eval:
-            with placeholder.container():
-                metric1, metric2, metric3 = st.columns(3)
-                metric1.metric("Schedule # being generated", schedule + 1)
-                metric2.metric("Current schedule version generating", iteration)
-                metric3.metric("Highest schedule fitness score", np.round(fitness, 4))
-                with graph_placeholder.container():
-                    fig, ax = plt.subplots(figsize=(20, 5))
-                    ax.hist(schedule_fitnesses, bins=100, color="#005EB8",
-                            edgecolor="#003087")
-                    ax.set_title("Distribution of Fitness Scores")
-                    ax.set_ylabel("Count of Schedules")
-                    ax.set_xlabel("Fitness Score")
-                    ax.set_ylim([0, 35])
-                    ax.set_xlim([0.3, 1])
-                    fig.set_facecolor("#ececec")
-                    ax.set_facecolor("#ececec")
-                    st.pyplot(fig, clear_figure=True)
-                    st.info("The above plot shows a histogram of fitness scores for schedules created by the algorithm. A score of 1 is the best possible score, while a score of 0 is the worst possible")
-                (continue_eval, chosen_schedule, fitness, iteration,
-                 schedule_fitnesses) = GA.evolve()
-        viable = (chosen_schedule.file_name.split("-", maxsplit=10)[-1]
-                  .replace(".xlsx", ""))
-        schedule_scores = chosen_schedule.schedule_eval_scores
-        quality_scores = chosen_schedule.quality_metrics
-        scheduleCompare.append([chosen_schedule.file_name,
-                                viable,
-                                chosen_schedule.non_viable_reason,
-                                iteration,
-                                np.round(chosen_schedule.fitness, 4),
-                                np.round(schedule_scores["mean_ward_util"], 2),
-                                np.round(schedule_scores["mean_uniq_deps"], 2),
-                                np.round(schedule_scores["mean_uniq_wards"], 2),
-                                np.round(quality_scores["num_incorr_num_plac"], 2),
-                                np.round(quality_scores["num_incorrect_length"], 2),
-                                np.round(quality_scores["num_capacity_exceeded"], 2),
-                                np.round(quality_scores["num_double_booked"], 2)])
+def show_progress(job: RunJob):
+    """
+    Function to show the live metrics of the runs in progress, and a chart of
+    the fitness of the latest run's population at each iteration
+    :param job: RunJob carrying out the runs
+    """
+    with job.lock:
+        progress = job.progress
+        if progress.latest_run not in progress.latest:
+            return
+        details = progress.latest[progress.latest_run]
+        metric1, metric2, metric3 = st.columns(3)
+        metric1.metric("Schedule # being generated", details["run_no"] + 1)
+        metric2.metric("Current schedule version generating", details["iteration"])
+        metric3.metric("Highest schedule fitness score", np.round(details["fitness"], 4))
+        if len(progress.latest) > 1:
+            st.dataframe(pd.DataFrame(
+                [[run_no + 1, run["iteration"], np.round(run["fitness"], 4)]
+                 for run_no, run in sorted(progress.latest.items())],
+                columns=["Schedule #",
+                         "Current schedule version generating",
+                         "Highest schedule fitness score"]))
+        history = progress.history_frame(details["run_no"])
+    history = history.rename(columns={"max": "Highest",
+                                      "q90": "90th percentile",
+                                      "q50": "Median",
+                                      "mean": "Mean",
+                                      "q10": "10th percentile",
+                                      "min": "Lowest"})
+    st.line_chart(history[["Highest", "90th percentile", "Median",
+                           "Mean", "10th percentile", "Lowest"]],
+                  x_label="Schedule version", y_label="Fitness Score")
+    st.info("The above chart shows the highest, lowest, mean and median fitness scores of the schedules created by the algorithm for schedule #%s, along with the 10th and 90th percentiles. A score of 1 is the best possible score, while a score of 0 is the worst possible" %(details["run_no"] + 1))
 
-        scheduleCompareDF = pd.DataFrame(scheduleCompare,
-                                         columns=["Schedule file name",
-                                                  "Viable schedule?",
-                                                  "Non-viable reason",
-                                                  "Number of iterations to generate",
-                                                  "Schedule Fitness Score",
-                                                  "Placement Utilisation score ",
-                                                  "Unique Specialities Score",
-                                                  "Unique Wards Score",
-                                                  "No. students with incorrect no. of placements",
-                                                  "No. of placements with the incorrect length",
-                                                  "No. of ward-weeks where capacity is exceeded",
-                                                  "No. of placements where student is double-booked"])
-        scheduleCompareDF["Non-viable reason"] = scheduleCompareDF["Non-viable reason"].fillna("")
-        ui_schedule_results.dataframe(scheduleCompareDF.style
-                                    .highlight_max(axis=0, color="lightgreen"))
-    script_directory = os.path.dirname(os.path.abspath(__file__))
-    save_directory = os.path.join(script_directory, "results")
-    try:
-        os.makedirs(save_directory)
-    except OSError:
-        pass  # already exists
+def show_job(job: RunJob, polling: bool = False):
+    """
+    Function to show the progress of a job and the schedules it has produced,
+    with download buttons for the output files once it has stopped
+    :param job: RunJob carrying out the runs
+    :param polling: whether this is being redrawn every progress_interval
+    seconds while the job runs, in which case the whole page is redrawn once
+    it stops
+    """
+    if polling and not job.running:
+        st.rerun()
+    st.subheader("Cycle information")
+    if job.running:
+        st.info(f"{len(job.summaries)} of {job.num_runs} schedules generated. "
+                "Schedules are generated in the background, so you can keep "
+                "using or refresh this page without stopping them.")
+        st.button("Stop generating schedules", on_click=job.cancel,
+                  disabled=job.cancel_requested.is_set(),
+                  key="stop generating schedules")
+    st.subheader("Last saved schedule details")
+    if job.summaries:
+        st.dataframe(job.comparison().style
+                     .highlight_max(axis=0, color="lightgreen"))
+    if job.running:
+        show_progress(job)
+        return
 
-    now = datetime.now().strftime("%d-%m-%Y %H-%M")
-    file_name = f"{now} schedule comparison.csv"
-    #Create the comparison dataframe and add it as first in the list of download
-    #files
-    def convert_to_csv(df):
-        return df.to_csv(index=False).encode("utf-8")
-    CompareDF = convert_to_csv(scheduleCompareDF)
-    download_files = [(CompareDF, file_name)] + download_files
+    #The job has stopped, so show how it ended and the files to download
+    if job.status == "failed":
+        st.error(f"Schedule production failed: {job.error}")
+    elif job.status == "cancelled":
+        st.warning("Schedule production stopped, "
+                   f"{len(job.summaries)} of {job.num_runs} schedules were "
+                   "generated")
+    elif job.viable:
+        #Only celebrate once for each job
+        if st.session_state.get("celebrated") != job.started:
+            st.session_state["celebrated"] = job.started
+            st.balloons()
+        st.success("Schedule production complete!")
+    else:
+        st.error("Schedule production complete, no viable schedules found")
+    if not job.file_names:
+        return
 
-    #Create the download link for each of the created files
+    #Create the download button for each of the created files, read from disk.
+    #Files are kept in the job's store, and workbooks are only built when they
+    #are first read, for the chosen schedules
+    store = job.store
     st.header("Download Output Files")
-    for file, file_name in download_files:
-        download_link = Schedule.create_download_link(file, file_name)
-        st.markdown(download_link, unsafe_allow_html=True)
-
-    viableBool = False
-
-    if scheduleCompareDF["Viable schedule?"].astype(bool).sum() > 0:
-        viableBool = True
-    return viableBool
+    for file_name in job.file_names:
+        if file_name not in store:
+            st.warning(f"{file_name} is no longer available, as older files "
+                       "are removed to save space")
+            continue
+        #Pass a function rather than the file's contents, so each file is only
+        #read (and a workbook only built) when its button is clicked
+        st.download_button(f"Download {file_name}",
+                           data=lambda name=file_name: store.read(name),
+                           file_name=file_name,
+                           key=f"download {file_name}")
+    #All of the files zipped together, only produced when downloaded
+    comparison_name = job.file_names[0]
+    st.download_button("Download all files (.zip)",
+                       data=lambda: store.bundle(job.file_names),
+                       file_name=comparison_name.replace("comparison.csv",
+                                                         "outputs.zip"),
+                       mime="application/zip",
+                       key="download all files")
 
 ################################################################################
                             #Generic page config#
@@ -156,18 +208,18 @@ with col1:
 #Add information about the nurse scheduler and contact details if issues
 OG_link = "https://github.com/nhsx/skunkworks-nursing-placement-schedule-optimisation"
 UHPT_link = "https://github.com/Emily-OBrien-NHS/skunkworks-nursing-placement-schedule-optimisation"
-DOWNLOAD_TEMPLATE_link = Schedule.create_download_link(
-                         InputTemplate.create_input_template(),
-                         "Input Template.xlsx")
 #Add links to the original and UHPT githubs
 st.markdown("This nuse placement tool is adapted from the NHS AI (Artificial "
             "Intelligence) Lab Skunkworks team's original scheduler for use at "
             "UHPT.  The original code repo can be [found here](%s). The UHPT "
             "adapted code repo for this app can be [found here](%s)."
             %(OG_link, UHPT_link))
-#Add download link for input template.
-st.markdown("You can download a blank excel input template here: %s"
-            %DOWNLOAD_TEMPLATE_link, unsafe_allow_html=True)
+#Add download button for input template, only created when downloaded.
+st.markdown("You can download a blank excel input template here:")
+st.download_button("Download Input Template.xlsx",
+                   data=InputTemplate.create_input_template,
+                   file_name="Input Template.xlsx",
+                   key="download input template")
 #Add contact details
 st.markdown("If you have any issues using this app, please first refer back to "
             "the user instructions and/or warning messages.  If you still have "
@@ -196,12 +248,11 @@ page = st.selectbox("Choose your page",
 if page == "Run algorithm":
     dataload = DataLoader()
     # Open the config params file to get some key arguments
-    with open("config/params.yml") as f:
-        params = yaml.load(f, Loader=yaml.FullLoader)
+    params = Params.load()
     # From the config file, read in the number of chromosomes (this is genetic
     # algorithm terminology for the size of the population, or in this case the
     # number of schedules being created to use to find the best solution)
-    numberOfChromosomes = params["ui_params"]["numberOfChromosomes"]
+    numberOfChromosomes = params.ui_params.numberOfChromosomes
 
     #Select wether using own or fake data
     file_source = st.selectbox("Select your data source",
@@ -209,12 +260,18 @@ if page == "Run algorithm":
     
     #If fake data, create that data and use it
     if file_source == "Fake data":
-        #create fake data
-        fake_data = FakeData
-        #add fake data download link
-        st.markdown(fake_data.fake_data_download_link, unsafe_allow_html=True)
-        #use this as the input file
-        input_file = fake_data.fake_data_file
+        #create fake data, once per session so it doesn't change on reruns
+        if "fake_data" not in st.session_state:
+            st.session_state["fake_data"] = FakeData()
+        fake_data = st.session_state["fake_data"]
+        #add fake data download button
+        st.download_button("Download Fake Data.xlsx",
+                           data=fake_data.fake_data_file,
+                           file_name="Fake Data.xlsx",
+                           key="download fake data")
+        #use this as the input file (as a file object, pandas does not read
+        #bytes directly)
+        input_file = io.BytesIO(fake_data.fake_data_file)
     #else use the file upload
     elif file_source == "Your own data":
         #User to upload input file
@@ -279,9 +336,35 @@ if page == "Run algorithm":
                 num_schedules = st.slider(
                                 "Choose number of schedules to generate",
                                 min_value=1, max_value=10, value=2, step=1,
-                                help="Note that once you click the Run button "
-                                "below, moving this slider again with cancel "
-                                "the program")
+                                help="Schedules are generated in the "
+                                "background, so once you click the Run button "
+                                "below, moving this slider or refreshing the "
+                                "page does not stop them")
+                #Optional seed so that a set of schedules can be reproduced
+                seed = st.number_input(
+                       "Random seed (optional)", value=None, min_value=0,
+                       step=1, help="Running again with the same input file, "
+                       "parameters and seed produces the same schedules. The "
+                       "seed used for each schedule is shown in the schedule "
+                       "comparison.")
+                #Optional previous schedule to start from, so re-planning after
+                #a few changes keeps most of it
+                previous_schedule = st.file_uploader(
+                       "Previous schedule to start from (optional)",
+                       type=["xlsx", "csv"], key="previous schedule",
+                       help="A schedule output file (or schedule CSV) produced "
+                       "by this tool. Each run starts from this schedule, "
+                       "keeping wards for the placements it has and choosing "
+                       "wards for any new placements. Placements can be "
+                       "locked with a locked column.")
+                lock_before = None
+                if previous_schedule is not None:
+                    lock_before = st.date_input(
+                           "Keep the previous wards of placements starting "
+                           "before (optional)", value=None,
+                           help="Placements starting before this date keep "
+                           "their ward from the previous schedule in every "
+                           "schedule generated, e.g. those already underway.")
                     
                 #Flag if more students than placements
                 st.header("Student and Capacity Counts")
@@ -438,21 +521,33 @@ if page == "Run algorithm":
                     and (len(going_to_expire_wards_string) == 0)):
                     st.info("All ward audits are up to date")
 
-                #Run the algorithm with the inputted datal
+                #Run the algorithm with the inputted datal, unless schedules
+                #are already being generated
+                job = job_manager().get(session_key())
                 run_button = st.empty()
-                end_message = st.empty()
-                if run_button.button("Click here to start running"):
-                    viableBool = main(num_schedules, numberOfChromosomes)
-                    if viableBool:
-                        st.balloons()
-                        end_message.success("Schedule production complete!")
-                    else:
-                        end_message.error("Schedule production complete, no "
-                                          "viable schedules found")
+                if run_button.button("Click here to start running",
+                                     disabled=job is not None and job.running):
+                    if main(num_schedules, numberOfChromosomes,
+                            None if seed is None else int(seed),
+                            previous_schedule, lock_before) is not None:
+                        #Redraw the page so the button shows the run has
+                        #started
+                        st.rerun()
     else:
         #If no file uploaded, prompt user to upload one.
         st.warning("you need to upload an excel file.")
 
+    #Show the schedules this session is generating (or has generated), which
+    #carry on in the background if the page is rerun or refreshed. While they
+    #are being generated, this is redrawn every progress_interval seconds
+    job = job_manager().get(session_key())
+    if job is not None:
+        if job.running:
+            st.fragment(show_job, run_every=params.ui_params.progress_interval
+                        )(job, polling=True)
+        else:
+            show_job(job)
+
 ################################################################################
                         #Create student input sheet page#
 ################################################################################
@@ -469,13 +564,14 @@ elif page == "Create Student Input Sheet":
         else:
             try:
                 #If correct columns, create the students sheet and provide
-                #download link.
+                #download button.
                 create_inputs = StudentTab()
                 student_tab = (create_inputs
                                .create_student_tab(uploaded_student_file))
-                download_link = Schedule.create_download_link(student_tab,
-                                                            "Student Tab.xlsx")
-                st.markdown(download_link, unsafe_allow_html=True)
+                st.download_button("Download Student Tab.xlsx",
+                                   data=student_tab,
+                                   file_name="Student Tab.xlsx",
+                                   key="download student tab")
             except FileNotFoundError:
                 st.error("Some issue in input file. Please ensure it follows "
                          "the correct format.")